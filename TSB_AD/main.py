@@ -3,30 +3,20 @@
 # License: Apache-2.0 License
 
 import pandas as pd
-import torch
-import random, argparse
+import argparse
 from sklearn.preprocessing import MinMaxScaler
 from .evaluation.metrics import get_metrics
 from .utils.slidingWindows import find_length_rank
+from .utils.utility import seed_everything
 from .model_wrapper import *
 from .HP_list import Optimal_Uni_algo_HP_dict
 
-# seeding
-seed = 2024
-torch.manual_seed(seed)
-torch.cuda.manual_seed(seed)
-torch.cuda.manual_seed_all(seed)
-np.random.seed(seed)
-random.seed(seed)
-torch.backends.cudnn.benchmark = False
-torch.backends.cudnn.deterministic = True
-
-print("CUDA Available: ", torch.cuda.is_available())
-print("cuDNN Version: ", torch.backends.cudnn.version())
-
 
 if __name__ == '__main__':
 
+    # seeding (torch is only imported and seeded if the detector needs it)
+    seed_everything(2024)
+
     ## ArgumentParser
     parser = argparse.ArgumentParser(description='Running TSB-AD')
     parser.add_argument('--filename', type=str, default='001_NAB_id_1_Facility_tr_1007_1st_2014.csv')
@@ -1,17 +1,63 @@
 import numpy as np
-import math
 from .utils.slidingWindows import find_length_rank
 
 Unsupervise_AD_Pool = ['FFT', 'SR', 'NORMA', 'Series2Graph', 'Sub_IForest', 'IForest', 'LOF', 'Sub_LOF', 'POLY', 'MatrixProfile', 'Sub_PCA', 'PCA', 'HBOS', 
                         'Sub_HBOS', 'KNN', 'Sub_KNN','KMeansAD', 'KMeansAD_U', 'KShapeAD', 'COPOD', 'CBLOF', 'COF', 'EIF', 'RobustPCA', 'Lag_Llama', 'TimesFM', 'Chronos', 'MOMENT_ZS']
 Semisupervise_AD_Pool = ['Left_STAMPi', 'SAND', 'MCD', 'Sub_MCD', 'OCSVM', 'Sub_OCSVM', 'AutoEncoder', 'CNN', 'LSTMAD', 'TranAD', 'USAD', 'OmniAnomaly', 
                         'AnomalyTransformer', 'TimesNet', 'FITS', 'Donut', 'OFA', 'MOMENT_FT', 'M2N2']
+# detectors that import torch; the other ones never load it
+Torch_AD_Pool = ['Lag_Llama', 'TimesFM', 'Chronos', 'MOMENT_ZS', 'AutoEncoder', 'CNN', 'LSTMAD', 'TranAD', 'USAD', 'OmniAnomaly', 
+                        'AnomalyTransformer', 'TimesNet', 'FITS', 'Donut', 'OFA', 'MOMENT_FT', 'M2N2']
 
-def run_Unsupervise_AD(model_name, data, **kwargs):
+# classical detectors that follow the float dtype policy (dtype of run_Unsupervise_AD/run_Semisupervise_AD);
+# every other back end gets the series in float64
+Float_Dtype_AD_Pool = ['Sub_IForest', 'IForest', 'Sub_LOF', 'LOF', 'Sub_PCA', 'PCA', 'Sub_HBOS', 'HBOS', 'Sub_KNN', 'KNN',
+                       'KMeansAD', 'KMeansAD_U', 'COPOD', 'CBLOF', 'COF', 'Sub_OCSVM', 'OCSVM', 'Sub_MCD', 'MCD']
+
+# unsupervised detectors that can score a long series chunk by chunk (see run_Unsupervise_AD_chunked):
+# their model class, and whether its window is the period of the series (the Sub_ runners)
+Chunk_AD_Models = {'Sub_IForest': ('IForest', True), 'IForest': ('IForest', False), 'Sub_LOF': ('LOF', True),
+                   'LOF': ('LOF', False), 'Sub_PCA': ('PCA', True), 'PCA': ('PCA', False), 'Sub_HBOS': ('HBOS', True),
+                   'HBOS': ('HBOS', False), 'Sub_KNN': ('KNN', True), 'KNN': ('KNN', False), 'CBLOF': ('CBLOF', False)}
+Chunk_AD_Pool = list(Chunk_AD_Models)
+
+def _check_scoring_stride(model_name, function_to_call, scoring_stride):
+    """scoring_stride scores every scoring_stride-th window only; it is supported
+    by the window-based detectors and the torch reconstruction detectors."""
+    import inspect
+    if 'scoring_stride' not in inspect.signature(function_to_call).parameters:
+        raise ValueError(f"{model_name} does not support scoring_stride")
+    if int(scoring_stride) < 1:
+        raise ValueError(f"scoring_stride should be a positive integer. Got {scoring_stride}")
+    return int(scoring_stride)
+
+def _call_detector(function_to_call, datas, kwargs, paa_factor=1, paa_method='mean', dtype=None):
+    """paa_factor > 1 runs the detector on the piecewise aggregate approximation
+    of the series (see utils.downsampling) and maps the score back to every point.
+    dtype (e.g. np.float32) casts the series and sets the float dtype policy of
+    the classical detectors for the run (see utils.utility.float_dtype); the
+    callers only pass it for the detectors of Float_Dtype_AD_Pool."""
+    if dtype is not None:
+        from .utils.utility import float_dtype
+        with float_dtype(dtype):
+            datas = tuple(np.asarray(data, dtype=dtype) for data in datas)
+            return _call_detector(function_to_call, datas, kwargs, paa_factor, paa_method)
+    if paa_factor == 1:
+        return function_to_call(*datas, **kwargs)
+    from .utils.downsampling import run_downsampled
+    return run_downsampled(function_to_call, datas, kwargs, paa_factor, paa_method)
+
+def run_Unsupervise_AD(model_name, data, scoring_stride=1, paa_factor=1, paa_method='mean', dtype=None, **kwargs):
     try:
         function_name = f'run_{model_name}'
         function_to_call = globals()[function_name]
-        results = function_to_call(data, **kwargs)
+        if scoring_stride != 1:
+            kwargs['scoring_stride'] = _check_scoring_stride(model_name, function_to_call, scoring_stride)
+        if model_name in Torch_AD_Pool:
+            from .utils.utility import seed_torch
+            seed_torch()
+        results = _call_detector(function_to_call, (data,), kwargs, paa_factor, paa_method,
+                                 dtype if model_name in Float_Dtype_AD_Pool else None)
         return results
     except KeyError:
         error_message = f"Model function '{function_name}' is not defined."
@@ -22,12 +68,69 @@ def run_Unsupervise_AD(model_name, data, **kwargs):
         print(error_message)
         return error_message
 
+def _make_chunk_detector(model_name, data, **kwargs):
+    """Unfitted detector of a Chunk_AD_Pool runner, with the runner's parameters
+    (its defaults included) and, for the Sub_ runners, the period of data as window."""
+    import importlib, inspect
+    class_name, periodic = Chunk_AD_Models[model_name]
+    runner = globals()[f'run_{model_name}']
+    arguments = inspect.signature(runner).bind(data, **kwargs)
+    arguments.apply_defaults()
+    params = dict(arguments.arguments)
+    params.pop('data')
+    if periodic:
+        params['slidingWindow'] = find_length_rank(data, rank=params.pop('periodicity'))
+    cls = getattr(importlib.import_module(f'.models.{class_name}', __package__), class_name)
+    accepted = inspect.signature(cls).parameters
+    return cls(**{name: value for name, value in params.items() if name in accepted})
+
+def run_Unsupervise_AD_chunked(model_name, reader, **kwargs):
+    """Score a series chunk by chunk from a ``utils.series_reader.ChunkedSeriesReader``,
+    so that it is never loaded whole.
+
+    The detector of ``model_name`` (one of Chunk_AD_Pool, with the parameters of its
+    runner) is fitted once, on the first chunk, whose period also gives the window of
+    the Sub_ detectors. Every chunk, the first one included, is then scored by its
+    decision_function, so that all the scores come from one model on one scale. Each
+    point gets the score of the chunk in which it is new, the overlap with the
+    previous chunk serving as left context only (give the reader an overlap of a few
+    windows).
+
+    The model only knows the first chunk: compared to a fit on the whole series,
+    normal behaviour that first appears later scores as anomalous, and anomalies of
+    the first chunk are part of the training data. The first chunk should cover
+    several periods of the normal behaviour.
+    """
+    from .utils.series_reader import stitch_chunk_scores
+    if model_name not in Chunk_AD_Pool:
+        error_message = f"{model_name} does not support chunked scoring"
+        print(error_message)
+        return error_message
+    try:
+        clf, chunk_scores, bounds = None, [], []
+        for chunk in reader:
+            if clf is None:
+                clf = _make_chunk_detector(model_name, chunk.data, **kwargs)
+                clf.fit(chunk.data)
+            chunk_scores.append(clf.decision_function(chunk.data))
+            bounds.append((chunk.start, chunk.overlap))
+        return stitch_chunk_scores(chunk_scores, bounds)
+    except Exception as e:
+        error_message = f"An error occurred while running the model '{model_name}' by chunks: {str(e)}"
+        print(error_message)
+        return error_message
 
-def run_Semisupervise_AD(model_name, data_train, data_test, **kwargs):
+def run_Semisupervise_AD(model_name, data_train, data_test, scoring_stride=1, paa_factor=1, paa_method='mean', dtype=None, **kwargs):
     try:
         function_name = f'run_{model_name}'
         function_to_call = globals()[function_name]
-        results = function_to_call(data_train, data_test, **kwargs)
+        if scoring_stride != 1:
+            kwargs['scoring_stride'] = _check_scoring_stride(model_name, function_to_call, scoring_stride)
+        if model_name in Torch_AD_Pool:
+            from .utils.utility import seed_torch
+            seed_torch()
+        results = _call_detector(function_to_call, (data_train, data_test), kwargs, paa_factor, paa_method,
+                                 dtype if model_name in Float_Dtype_AD_Pool else None)
         return results
     except KeyError:
         error_message = f"Model function '{function_name}' is not defined."
@@ -45,32 +148,35 @@ def run_FFT(data, ifft_parameters=5, local_neighbor_window=21, local_outlier_thr
     score = clf.decision_scores_ 
     return score.ravel()
 
-def run_Sub_IForest(data, periodicity=1, n_estimators=100, max_features=1, n_jobs=1):
+def run_Sub_IForest(data, periodicity=1, n_estimators=100, max_features=1, n_jobs=1, scoring_stride=1):
     from .models.IForest import IForest
     slidingWindow = find_length_rank(data, rank=periodicity)
-    clf = IForest(slidingWindow=slidingWindow, n_estimators=n_estimators, max_features=max_features, n_jobs=n_jobs)
+    clf = IForest(slidingWindow=slidingWindow, n_estimators=n_estimators, max_features=max_features, n_jobs=n_jobs, scoring_stride=scoring_stride)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_IForest(data, slidingWindow=100, n_estimators=100, max_features=1, n_jobs=1):
+def run_IForest(data, slidingWindow=100, n_estimators=100, max_features=1, n_jobs=1, scoring_stride=1):
     from .models.IForest import IForest
-    clf = IForest(slidingWindow=slidingWindow, n_estimators=n_estimators, max_features=max_features, n_jobs=n_jobs)
+    clf = IForest(slidingWindow=slidingWindow, n_estimators=n_estimators, max_features=max_features, n_jobs=n_jobs, scoring_stride=scoring_stride)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_Sub_LOF(data, periodicity=1, n_neighbors=30, metric='minkowski', n_jobs=1):
+def run_Sub_LOF(data, periodicity=1, n_neighbors=30, metric='minkowski', n_jobs=1, scoring_stride=1, reduction=None,
+                neighbor_search=None):
     from .models.LOF import LOF
     slidingWindow = find_length_rank(data, rank=periodicity)
-    clf = LOF(slidingWindow=slidingWindow, n_neighbors=n_neighbors, metric=metric, n_jobs=n_jobs)
+    clf = LOF(slidingWindow=slidingWindow, n_neighbors=n_neighbors, metric=metric, n_jobs=n_jobs, scoring_stride=scoring_stride, reduction=reduction,
+              neighbor_search=neighbor_search)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_LOF(data, slidingWindow=1, n_neighbors=30, metric='minkowski', n_jobs=1):
+def run_LOF(data, slidingWindow=1, n_neighbors=30, metric='minkowski', n_jobs=1, scoring_stride=1, neighbor_search=None):
     from .models.LOF import LOF
-    clf = LOF(slidingWindow=slidingWindow, n_neighbors=n_neighbors, metric=metric, n_jobs=n_jobs)
+    clf = LOF(slidingWindow=slidingWindow, n_neighbors=n_neighbors, metric=metric, n_jobs=n_jobs, scoring_stride=scoring_stride,
+              neighbor_search=neighbor_search)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
@@ -116,6 +222,7 @@ def run_KShapeAD(data, periodicity=1):
 
 def run_Series2Graph(data, periodicity=1):
     from .models.Series2Graph import Series2Graph
+    from .utils.utility import pad_window_scores
     slidingWindow = find_length_rank(data, rank=periodicity)
 
     data = data.squeeze()
@@ -125,106 +232,117 @@ def run_Series2Graph(data, periodicity=1):
     s2g.score(query_length=query_length,dataset=data)
 
     score = s2g.decision_scores_
-    score = np.array([score[0]]*math.ceil(query_length//2) + list(score) + [score[-1]]*(query_length//2))
+    score = pad_window_scores(score, query_length + 1)
     return score.ravel()
 
-def run_Sub_PCA(data, periodicity=1, n_components=None, n_jobs=1):
+def run_Sub_PCA(data, periodicity=1, n_components=None, n_jobs=1, scoring_stride=1, reduction=None):
     from .models.PCA import PCA
     slidingWindow = find_length_rank(data, rank=periodicity)
-    clf = PCA(slidingWindow = slidingWindow, n_components=n_components)
+    clf = PCA(slidingWindow = slidingWindow, n_components=n_components, scoring_stride=scoring_stride, reduction=reduction)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_PCA(data, slidingWindow=100, n_components=None, n_jobs=1):
+def run_PCA(data, slidingWindow=100, n_components=None, n_jobs=1, scoring_stride=1):
     from .models.PCA import PCA
-    clf = PCA(slidingWindow = slidingWindow, n_components=n_components)
+    clf = PCA(slidingWindow = slidingWindow, n_components=n_components, scoring_stride=scoring_stride)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
 def run_NORMA(data, periodicity=1, clustering='hierarchical', n_jobs=1):
     from .models.NormA import NORMA
+    from .utils.utility import pad_window_scores
     slidingWindow = find_length_rank(data, rank=periodicity)
     clf = NORMA(pattern_length=slidingWindow, nm_size=3*slidingWindow, clustering=clustering)
     clf.fit(data)
     score = clf.decision_scores_
-    score = np.array([score[0]]*math.ceil((slidingWindow-1)/2) + list(score) + [score[-1]]*((slidingWindow-1)//2))
+    score = pad_window_scores(score, slidingWindow)
     if len(score) > len(data):
         start = len(score) - len(data)
         score = score[start:]
     return score.ravel()
 
-def run_Sub_HBOS(data, periodicity=1, n_bins=10, tol=0.5, n_jobs=1):
+def run_Sub_HBOS(data, periodicity=1, n_bins=10, tol=0.5, n_jobs=1, scoring_stride=1):
     from .models.HBOS import HBOS
     slidingWindow = find_length_rank(data, rank=periodicity)
-    clf = HBOS(slidingWindow=slidingWindow, n_bins=n_bins, tol=tol)
+    clf = HBOS(slidingWindow=slidingWindow, n_bins=n_bins, tol=tol, scoring_stride=scoring_stride)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_HBOS(data, slidingWindow=1, n_bins=10, tol=0.5, n_jobs=1):
+def run_HBOS(data, slidingWindow=1, n_bins=10, tol=0.5, n_jobs=1, scoring_stride=1):
     from .models.HBOS import HBOS
-    clf = HBOS(slidingWindow=slidingWindow, n_bins=n_bins, tol=tol)
+    clf = HBOS(slidingWindow=slidingWindow, n_bins=n_bins, tol=tol, scoring_stride=scoring_stride)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_Sub_OCSVM(data_train, data_test, kernel='rbf', nu=0.5, periodicity=1, n_jobs=1):
+def run_Sub_OCSVM(data_train, data_test, kernel='rbf', nu=0.5, periodicity=1, n_jobs=1, scoring_stride=1, reduction=None,
+                  approximation=None, n_components=100):
     from .models.OCSVM import OCSVM
     slidingWindow = find_length_rank(data_test, rank=periodicity)
-    clf = OCSVM(slidingWindow=slidingWindow, kernel=kernel, nu=nu)
+    clf = OCSVM(slidingWindow=slidingWindow, kernel=kernel, nu=nu, scoring_stride=scoring_stride, reduction=reduction,
+                approximation=approximation, n_components=n_components)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_OCSVM(data_train, data_test, kernel='rbf', nu=0.5, slidingWindow=1, n_jobs=1):
+def run_OCSVM(data_train, data_test, kernel='rbf', nu=0.5, slidingWindow=1, n_jobs=1, scoring_stride=1,
+              approximation=None, n_components=100):
     from .models.OCSVM import OCSVM
-    clf = OCSVM(slidingWindow=slidingWindow, kernel=kernel, nu=nu)
+    clf = OCSVM(slidingWindow=slidingWindow, kernel=kernel, nu=nu, scoring_stride=scoring_stride,
+                approximation=approximation, n_components=n_components)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_Sub_MCD(data_train, data_test, support_fraction=None, periodicity=1, n_jobs=1):
+def run_Sub_MCD(data_train, data_test, support_fraction=None, periodicity=1, n_jobs=1, scoring_stride=1, reduction=None,
+                subsample=None):
     from .models.MCD import MCD
     slidingWindow = find_length_rank(data_test, rank=periodicity)
-    clf = MCD(slidingWindow=slidingWindow, support_fraction=support_fraction)
+    clf = MCD(slidingWindow=slidingWindow, support_fraction=support_fraction, scoring_stride=scoring_stride, reduction=reduction,
+              subsample=subsample)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_MCD(data_train, data_test, support_fraction=None, slidingWindow=1, n_jobs=1):
+def run_MCD(data_train, data_test, support_fraction=None, slidingWindow=1, n_jobs=1, scoring_stride=1, subsample=None):
     from .models.MCD import MCD
-    clf = MCD(slidingWindow=slidingWindow, support_fraction=support_fraction)
+    clf = MCD(slidingWindow=slidingWindow, support_fraction=support_fraction, scoring_stride=scoring_stride,
+              subsample=subsample)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_Sub_KNN(data, n_neighbors=10, method='largest', periodicity=1, n_jobs=1):
+def run_Sub_KNN(data, n_neighbors=10, method='largest', periodicity=1, n_jobs=1, scoring_stride=1, reduction=None,
+                neighbor_search=None):
     from .models.KNN import KNN
     slidingWindow = find_length_rank(data, rank=periodicity)
-    clf = KNN(slidingWindow=slidingWindow, n_neighbors=n_neighbors,method=method, n_jobs=n_jobs)
+    clf = KNN(slidingWindow=slidingWindow, n_neighbors=n_neighbors,method=method, n_jobs=n_jobs, scoring_stride=scoring_stride, reduction=reduction,
+              neighbor_search=neighbor_search)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_KNN(data, slidingWindow=1, n_neighbors=10, method='largest', n_jobs=1):
+def run_KNN(data, slidingWindow=1, n_neighbors=10, method='largest', n_jobs=1, scoring_stride=1, neighbor_search=None):
     from .models.KNN import KNN
-    clf = KNN(slidingWindow=slidingWindow, n_neighbors=n_neighbors, method=method, n_jobs=n_jobs)
+    clf = KNN(slidingWindow=slidingWindow, n_neighbors=n_neighbors, method=method, n_jobs=n_jobs, scoring_stride=scoring_stride,
+              neighbor_search=neighbor_search)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_KMeansAD(data, n_clusters=20, window_size=20, n_jobs=1):
+def run_KMeansAD(data, n_clusters=20, window_size=20, n_jobs=1, scoring_stride=1, batch_size=None):
     from .models.KMeansAD import KMeansAD
-    clf = KMeansAD(k=n_clusters, window_size=window_size, stride=1, n_jobs=n_jobs)
+    clf = KMeansAD(k=n_clusters, window_size=window_size, stride=scoring_stride, n_jobs=n_jobs, batch_size=batch_size)
     score = clf.fit_predict(data)
     return score.ravel()
 
-def run_KMeansAD_U(data, n_clusters=20, periodicity=1,n_jobs=1):
+def run_KMeansAD_U(data, n_clusters=20, periodicity=1,n_jobs=1, scoring_stride=1, batch_size=None):
     from .models.KMeansAD import KMeansAD
     slidingWindow = find_length_rank(data, rank=periodicity)
-    clf = KMeansAD(k=n_clusters, window_size=slidingWindow, stride=1, n_jobs=n_jobs)
+    clf = KMeansAD(k=n_clusters, window_size=slidingWindow, stride=scoring_stride, n_jobs=n_jobs, batch_size=batch_size)
     score = clf.fit_predict(data)
     return score.ravel()
 
@@ -235,16 +353,16 @@ def run_COPOD(data, n_jobs=1):
     score = clf.decision_scores_
     return score.ravel()
 
-def run_CBLOF(data, n_clusters=8, alpha=0.9, n_jobs=1):
+def run_CBLOF(data, n_clusters=8, alpha=0.9, n_jobs=1, batch_size=None):
     from .models.CBLOF import CBLOF
-    clf = CBLOF(n_clusters=n_clusters, alpha=alpha, n_jobs=n_jobs)
+    clf = CBLOF(n_clusters=n_clusters, alpha=alpha, n_jobs=n_jobs, batch_size=batch_size)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
 
-def run_COF(data, n_neighbors=30):
+def run_COF(data, n_neighbors=30, method='knn', n_jobs=1, neighbor_search=None):
     from .models.COF import COF
-    clf = COF(n_neighbors=n_neighbors)
+    clf = COF(n_neighbors=n_neighbors, method=method, n_jobs=n_jobs, neighbor_search=neighbor_search)
     clf.fit(data)
     score = clf.decision_scores_
     return score.ravel()
@@ -289,51 +407,51 @@ def run_LSTMAD(data_train, data_test, window_size=100, lr=0.0008):
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_TranAD(data_train, data_test, win_size=10, lr=1e-3):
+def run_TranAD(data_train, data_test, win_size=10, lr=1e-3, scoring_stride=1):
     from .models.TranAD import TranAD
-    clf = TranAD(win_size=win_size, feats=data_test.shape[1], lr=lr)
+    clf = TranAD(win_size=win_size, feats=data_test.shape[1], lr=lr, scoring_stride=scoring_stride)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_AnomalyTransformer(data_train, data_test, win_size=100, lr=1e-4, batch_size=128):
+def run_AnomalyTransformer(data_train, data_test, win_size=100, lr=1e-4, batch_size=128, scoring_stride=1):
     from .models.AnomalyTransformer import AnomalyTransformer
-    clf = AnomalyTransformer(win_size=win_size, input_c=data_test.shape[1], lr=lr, batch_size=batch_size)
+    clf = AnomalyTransformer(win_size=win_size, input_c=data_test.shape[1], lr=lr, batch_size=batch_size, scoring_stride=scoring_stride)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_OmniAnomaly(data_train, data_test, win_size=100, lr=0.002):
+def run_OmniAnomaly(data_train, data_test, win_size=100, lr=0.002, scoring_stride=1):
     from .models.OmniAnomaly import OmniAnomaly
-    clf = OmniAnomaly(win_size=win_size, feats=data_test.shape[1], lr=lr)
+    clf = OmniAnomaly(win_size=win_size, feats=data_test.shape[1], lr=lr, scoring_stride=scoring_stride)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_USAD(data_train, data_test, win_size=5, lr=1e-4):
+def run_USAD(data_train, data_test, win_size=5, lr=1e-4, scoring_stride=1):
     from .models.USAD import USAD
-    clf = USAD(win_size=win_size, feats=data_test.shape[1], lr=lr)
+    clf = USAD(win_size=win_size, feats=data_test.shape[1], lr=lr, scoring_stride=scoring_stride)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_Donut(data_train, data_test, win_size=120, lr=1e-4, batch_size=128):
+def run_Donut(data_train, data_test, win_size=120, lr=1e-4, batch_size=128, scoring_stride=1):
     from .models.Donut import Donut
-    clf = Donut(win_size=win_size, input_c=data_test.shape[1], lr=lr, batch_size=batch_size)
+    clf = Donut(win_size=win_size, input_c=data_test.shape[1], lr=lr, batch_size=batch_size, scoring_stride=scoring_stride)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_TimesNet(data_train, data_test, win_size=96, lr=1e-4):
+def run_TimesNet(data_train, data_test, win_size=96, lr=1e-4, scoring_stride=1):
     from .models.TimesNet import TimesNet
-    clf = TimesNet(win_size=win_size, enc_in=data_test.shape[1], lr=lr, epochs=50)
+    clf = TimesNet(win_size=win_size, enc_in=data_test.shape[1], lr=lr, epochs=50, scoring_stride=scoring_stride)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
 
-def run_FITS(data_train, data_test, win_size=100, lr=1e-3):
+def run_FITS(data_train, data_test, win_size=100, lr=1e-3, scoring_stride=1):
     from .models.FITS import FITS
-    clf = FITS(win_size=win_size, input_c=data_test.shape[1], lr=lr, batch_size=128)
+    clf = FITS(win_size=win_size, input_c=data_test.shape[1], lr=lr, batch_size=128, scoring_stride=scoring_stride)
     clf.fit(data_train)
     score = clf.decision_function(data_test)
     return score.ravel()
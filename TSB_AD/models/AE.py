@@ -7,7 +7,7 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
-import torch, math
+import torch
 from sklearn.utils import check_array
 from sklearn.utils.validation import check_is_fitted
 from torch import nn
@@ -18,6 +18,7 @@ from .base import BaseDetector
 from ..utils.stat_models import pairwise_distances_no_broadcast
 from ..utils.dataset import TSDataset
 from ..utils.utility import get_activation_by_name   
+from ..utils.utility import pad_window_scores
 
 class InnerAutoencoder(nn.Module):
     def __init__(self,
@@ -400,8 +401,6 @@ class AutoEncoder(BaseDetector):
                 outlier_scores[data_idx] = pairwise_distances_no_broadcast(
                     data, self.model(data_cuda).cpu().numpy())
 
-        if outlier_scores.shape[0] < n_samples:
-            outlier_scores = np.array([outlier_scores[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(outlier_scores) + [outlier_scores[-1]]*((self.slidingWindow-1)//2))
+        outlier_scores = pad_window_scores(outlier_scores, self.slidingWindow, n_samples)
 
         return outlier_scores
\ No newline at end of file
@@ -20,6 +20,7 @@ import tqdm
 import torchinfo
 from ..utils.dataset import ReconstructDataset
 from ..utils.torch_utility import get_gpu
+from ..utils.utility import pad_window_scores, window_scores_to_points
 
 class EarlyStopping:
     def __init__(self, patience=7, verbose=False, delta=0):
@@ -314,8 +315,10 @@ class AnomalyTransformer():
                  k=3,
                  lr=1e-4,
                  patience=7,
-                 validation_size=0.2):
+                 validation_size=0.2,
+                 scoring_stride=1):
         super().__init__()
+        self.scoring_stride = scoring_stride
         self.__anomaly_score = None
         
         self.cuda = True
@@ -467,7 +470,7 @@ class AnomalyTransformer():
         criterion = nn.MSELoss(reduce=False)
         
         test_loader = DataLoader(
-            dataset=ReconstructDataset(data, window_size=self.win_size),
+            dataset=ReconstructDataset(data, window_size=self.win_size, stride=self.scoring_stride),
             batch_size=self.batch_size,
             shuffle=False
         )
@@ -518,18 +521,14 @@ class AnomalyTransformer():
             
         self.__anomaly_score = scores
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = window_scores_to_points(self.__anomaly_score, self.win_size, self.scoring_stride, len(data))
         
         return self.__anomaly_score
 
 
     def anomaly_score(self) -> np.ndarray:
 
-        if self.__anomaly_score.shape[0] < self.ts_len:
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = pad_window_scores(self.__anomaly_score, self.win_size, self.ts_len)
 
         return self.__anomaly_score
     
@@ -9,8 +9,8 @@ import warnings
 
 import numpy as np
 from scipy.spatial.distance import cdist
-from sklearn.cluster import KMeans
-from sklearn.utils import check_array
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.utils import check_array, gen_batches
 from sklearn.utils.validation import check_is_fitted
 from sklearn.utils.estimator_checks import check_estimator
 
@@ -60,7 +60,8 @@ class CBLOF(BaseDetector):
         If ``cluster_centers_`` is not in the attributes once the model is fit,
         it is calculated as the mean of the samples in a cluster.
 
-        If not set, CBLOF uses KMeans for scalability. See
+        If not set, CBLOF uses KMeans for scalability, or MiniBatchKMeans if
+        ``batch_size`` is set. See
         https://scikit-learn.org/stable/modules/generated/sklearn.cluster.KMeans.html
 
     alpha : float in (0.5, 1), optional (default=0.9)
@@ -89,6 +90,15 @@ class CBLOF(BaseDetector):
         number generator; If None, the random number generator is the
         RandomState instance used by `np.random`.
 
+    batch_size : int, optional (default=None)
+        If set, the default clustering is mini-batch k-means with batches of
+        ``batch_size`` samples, in about linear time, and ``partial_fit``
+        updates it (and the cluster sizes) with new samples.
+
+    chunk_size : int, optional (default=10000)
+        Number of samples assigned and scored at a time by
+        ``decision_function``, which bounds its memory.
+
 
     Attributes
     ----------
@@ -133,7 +143,7 @@ class CBLOF(BaseDetector):
     def __init__(self, n_clusters=8, contamination=0.1,
                  clustering_estimator=None, alpha=0.9, beta=5,
                  use_weights=False, check_estimator=False, random_state=0,
-                 n_jobs=1, normalize=True):
+                 n_jobs=1, normalize=True, batch_size=None, chunk_size=10000):
         super(CBLOF, self).__init__(contamination=contamination)
         self.n_clusters = n_clusters
         self.clustering_estimator = clustering_estimator
@@ -143,6 +153,8 @@ class CBLOF(BaseDetector):
         self.check_estimator = check_estimator
         self.random_state = random_state
         self.normalize = normalize
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
 
     # noinspection PyIncorrectDocstring
     def fit(self, X, y=None):
@@ -170,9 +182,12 @@ class CBLOF(BaseDetector):
 
         # check parameters
         # number of clusters are default to 8
-        self._validate_estimator(default=KMeans(
-            n_clusters=self.n_clusters,
-            random_state=self.random_state))
+        if self.batch_size is None:
+            default = KMeans(n_clusters=self.n_clusters, random_state=self.random_state)
+        else:
+            default = MiniBatchKMeans(n_clusters=self.n_clusters, batch_size=self.batch_size,
+                                      random_state=self.random_state)
+        self._validate_estimator(default=default)
 
         self.clustering_estimator_.fit(X=X, y=y)
         # Get the labels of the clustering results
@@ -189,6 +204,7 @@ class CBLOF(BaseDetector):
                           format(self.n_clusters_, self.n_clusters))
 
         self._set_cluster_centers(X, n_features)
+        self.n_samples_ = n_samples
         self._set_small_large_clusters(n_samples)
 
         self.decision_scores_ = self._decision_function(X,
@@ -197,6 +213,39 @@ class CBLOF(BaseDetector):
         self._process_decision_scores()
         return self
 
+    def partial_fit(self, X, y=None):
+        """Update the clustering and the cluster sizes with new samples, for a
+        clustering estimator with ``partial_fit`` (e.g. with ``batch_size``).
+        The small and large clusters are derived again from the updated sizes;
+        ``decision_scores_`` and ``threshold_`` are those of ``fit``.
+
+        Parameters
+        ----------
+        X : numpy array of shape (n_samples, n_features)
+            The new samples.
+
+        Returns
+        -------
+        self : object
+        """
+        check_is_fitted(self, ['decision_scores_', 'threshold_', 'labels_'])
+        if not hasattr(self.clustering_estimator_, 'partial_fit'):
+            raise ValueError("partial_fit needs a clustering estimator with partial_fit, e.g. set batch_size")
+        X = check_array(X)
+        if self.normalize: X = zscore(X, axis=1, ddof=1)
+
+        self.clustering_estimator_.partial_fit(X)
+        labels = np.concatenate([self.clustering_estimator_.predict(X[rows])
+                                 for rows in gen_batches(X.shape[0], self.chunk_size)])
+        counts = np.bincount(labels, minlength=self.n_clusters_)
+        self.cluster_sizes_ = np.r_[self.cluster_sizes_, np.zeros(len(counts) - self.n_clusters_, dtype=int)] + counts
+        self.n_clusters_ = self.cluster_sizes_.shape[0]
+        self.n_samples_ += X.shape[0]
+
+        self.cluster_centers_ = self.clustering_estimator_.cluster_centers_
+        self._set_small_large_clusters(self.n_samples_)
+        return self
+
     def decision_function(self, X):
         """Predict raw anomaly score of X using the fitted detector.
 
@@ -217,8 +266,12 @@ class CBLOF(BaseDetector):
         """
         check_is_fitted(self, ['decision_scores_', 'threshold_', 'labels_'])
         X = check_array(X)
-        labels = self.clustering_estimator_.predict(X)
-        return self._decision_function(X, labels)
+        # samples are assigned to their nearest cluster and scored chunk_size at a time
+        scores = np.empty(X.shape[0], dtype=X.dtype)
+        for rows in gen_batches(X.shape[0], self.chunk_size):
+            labels = self.clustering_estimator_.predict(X[rows])
+            scores[rows] = self._decision_function(X[rows], labels)
+        return scores
 
     def _validate_estimator(self, default=None):
         """Check the value of alpha and beta and clustering algorithm.
@@ -251,14 +304,14 @@ class CBLOF(BaseDetector):
             warnings.warn("The chosen clustering for CBLOF does not have"
                           "the center of clusters. Calculate the center"
                           "as the mean of the clusters.")
-            self.cluster_centers_ = np.zeros([self.n_clusters_, n_features])
+            self.cluster_centers_ = np.zeros([self.n_clusters_, n_features], dtype=X.dtype)
             for i in range(self.n_clusters_):
                 self.cluster_centers_[i, :] = np.mean(
                     X[np.where(self.cluster_labels_ == i)], axis=0)
 
     def _set_small_large_clusters(self, n_samples):
         # Sort the index of clusters by the number of samples belonging to it
-        size_clusters = np.bincount(self.cluster_labels_)
+        size_clusters = self.cluster_sizes_
 
         # Sort the order from the largest to the smallest
         sorted_cluster_indices = np.argsort(size_clusters * -1)
@@ -304,7 +357,7 @@ class CBLOF(BaseDetector):
 
     def _decision_function(self, X, labels):
         # Initialize the score array
-        scores = np.zeros([X.shape[0], ])
+        scores = np.zeros([X.shape[0], ], dtype=X.dtype)
 
         small_indices = np.where(
             np.isin(labels, self.small_cluster_labels_))[0]
@@ -11,11 +11,14 @@ import warnings
 from operator import itemgetter
 
 import numpy as np
+import sklearn
+from joblib import Parallel, delayed, effective_n_jobs
 from scipy.spatial import distance_matrix
 from scipy.spatial import minkowski_distance
-from sklearn.utils import check_array
+from sklearn.utils import check_array, gen_batches
 
 from .base import BaseDetector
+from .neighbors import get_neighbor_graph, make_neighbor_search
 from ..utils.utility import check_parameter
 
 
@@ -27,7 +30,7 @@ class COF(BaseDetector):
 
     See :cite:`tang2002enhancing` for details.
     
-    Two version of COF are supported:
+    Three versions of COF are supported:
 
     - Fast COF: computes the entire pairwise distance matrix at the cost of a
       O(n^2) memory requirement.
@@ -35,6 +38,16 @@ class COF(BaseDetector):
       Use this implementation when it is not feasible to fit the n-by-n 
       distance in memory. This leads to a linear overhead because many 
       distances will have to be recalculated.
+    - Neighbor graph COF: reads the nearest neighbors from the neighbor graph
+      shared with KNN and LOF (see ``neighbors``), computed with a tree, and
+      only computes the k-by-k distances among the neighbors of each point,
+      by blocks of points in parallel. It needs O(n*k) memory. As Fast COF,
+      it sorts the k + 1 nearest points, the point itself included, by
+      (distance, index) and drops the first one, so its scores equal those
+      of Fast COF, also on data with duplicate points (except with the
+      approximate or sharded search, which keep the order of the graph).
+      The paths and chaining costs are kept with the graph, so other
+      n_neighbors values on the same data are read from them.
 
     Parameters
     ----------
@@ -55,6 +68,24 @@ class COF(BaseDetector):
         - 'fast' Fast COF, computes the full pairwise distance matrix up front.
         - 'memory' Memory-efficient COF, computes pairwise distances only when
           needed at the cost of computational speed.
+        - 'knn' Neighbor graph COF, computes the k nearest neighbors of every
+          point with a tree and the distances among them.
+
+    n_jobs : int, optional (default=1)
+        The number of threads of the 'knn' method (neighbor search and
+        chaining distances). If ``-1``, the number of CPU cores.
+
+    working_memory : int, optional (default=None)
+        Memory cap, in MiB, of the blocks of points of the 'knn' method.
+        Defaults to sklearn's ``working_memory``.
+
+    neighbor_search : str or RPForest, optional (default=None)
+        Neighbor search of the 'knn' method: None or 'exact', 'approximate'
+        (a ``neighbors.RPForest``) or an RPForest, whose ``n_trees`` trades
+        recall for speed. The approximate search is not recommended for COF
+        on series of up to tens of thousands of windows: the chaining costs
+        dominate, so it is not faster, and the missed neighbors change the
+        scores much more than those of KNN or LOF.
 
     Attributes
     ----------
@@ -79,7 +110,8 @@ class COF(BaseDetector):
         Number of neighbors to use by default for k neighbors queries.
     """
 
-    def __init__(self, contamination=0.1, n_neighbors=20, method="fast"):
+    def __init__(self, contamination=0.1, n_neighbors=20, method="fast", n_jobs=1, working_memory=None,
+                 neighbor_search=None):
         super(COF, self).__init__(contamination=contamination)
         if isinstance(n_neighbors, int):
             check_parameter(n_neighbors, low=1, param_name='n_neighbors')
@@ -88,6 +120,9 @@ class COF(BaseDetector):
                 "n_neighbors should be int. Got %s" % type(n_neighbors))
         self.n_neighbors = n_neighbors
         self.method = method
+        self.n_jobs = n_jobs
+        self.working_memory = working_memory
+        self.neighbor_search = neighbor_search
 
     def fit(self, X, y=None):
         """Fit detector. y is ignored in unsupervised methods.
@@ -145,8 +180,10 @@ class COF(BaseDetector):
             return self._cof_fast(X)
         elif self.method.lower() == "memory":
             return self._cof_memory(X)
+        elif self.method.lower() == "knn":
+            return self._cof_knn(X)
         else:
-            raise ValueError("method should be set to either \'fast\' or \'memory\'. Got %s" % self.method)
+            raise ValueError("method should be set to either \'fast\', \'memory\' or \'knn\'. Got %s" % self.method)
 
     def _cof_memory(self, X):
         """
@@ -164,7 +201,7 @@ class COF(BaseDetector):
         ac_dist, cof_ = np.zeros((X.shape[0])), np.zeros((X.shape[0]))
         for i in range(X.shape[0]):
             #sbn_path = np.argsort(dist_matrix[i])
-            sbn_path = np.argsort(minkowski_distance(X[i,:],X,p=2))
+            sbn_path = np.argsort(minkowski_distance(X[i,:],X,p=2), kind='stable')
             sbn_path_index[i,:] = sbn_path[1: self.n_neighbors_ + 1]
             cost_desc = np.zeros((self.n_neighbors_))
             for j in range(self.n_neighbors_):
@@ -193,7 +230,7 @@ class COF(BaseDetector):
         dist_matrix = np.array(distance_matrix(X, X))
         sbn_path_index, ac_dist, cof_ = [], [], []
         for i in range(X.shape[0]):
-            sbn_path = np.argsort(dist_matrix[i])
+            sbn_path = np.argsort(dist_matrix[i], kind='stable')
             sbn_path_index.append(sbn_path[1: self.n_neighbors_ + 1])
             cost_desc = []
             for j in range(self.n_neighbors_):
@@ -208,4 +245,122 @@ class COF(BaseDetector):
         for _g in range(X.shape[0]):
             cof_.append((ac_dist[_g] * self.n_neighbors_) /
                         np.sum(itemgetter(*sbn_path_index[_g])(ac_dist)))
-        return np.nan_to_num(cof_)
\ No newline at end of file
+        return np.nan_to_num(cof_)
+
+    def _cof_knn(self, X):
+        """
+        Connectivity-Based Outlier Factor (COF) Algorithm
+        This function is called internally to calculate the
+        Connectivity-Based Outlier Factor (COF) as an outlier
+        score for observations.
+        This function reads the neighbors from the shared neighbor graph.
+        The cost of the j-th edge of the set-based nearest path only depends
+        on the first j neighbors, so the costs computed for the k_max
+        neighbors of the graph serve every n_neighbors <= k_max.
+        :return: numpy array containing COF scores for observations.
+                 The greater the COF, the greater the outlierness.
+        """
+        X = check_array(X)
+        n_neighbors = min(self.n_neighbors_, X.shape[0] - 1)
+        graph = get_neighbor_graph(X, n_neighbors, neighbor_search=make_neighbor_search(self.neighbor_search),
+                                   n_jobs=self.n_jobs)
+        if 'cof_paths' not in graph.derived_:
+            paths = self._sbn_paths(X, graph)
+            graph.derived_['cof_costs'] = self._chaining_costs(X, paths)
+            graph.derived_['cof_paths'] = paths
+        sbn_path_index = graph.derived_['cof_paths'][:, 1:n_neighbors + 1]
+        cost_desc = graph.derived_['cof_costs'][:, :n_neighbors]
+
+        neighbor_add1 = n_neighbors + 1
+        weights = (2. * (neighbor_add1 - np.arange(1, neighbor_add1))) / (neighbor_add1 * n_neighbors)
+        ac_dist = np.sum(cost_desc * weights, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cof_ = (ac_dist * n_neighbors) / np.sum(ac_dist[sbn_path_index], axis=1)
+        return np.nan_to_num(cof_)
+
+    def _sbn_paths(self, X, graph):
+        """The first k + 1 points (k neighbors of the graph) of every point
+        sorted by (distance, index), the point itself included, as Fast COF
+        orders a row of the distance matrix. The first one is the point or a
+        duplicate of it. The graph excludes the point itself and breaks ties
+        at the k-th distance in the order of the tree, so the points within
+        that distance are queried again from the tree (or, for a brute force
+        index, read from the rows of the distance matrix) and sorted on the
+        distances of scipy's distance_matrix. Searches without radius queries
+        (approximate or sharded) keep the order of the graph."""
+        n_samples, n_neighbors = graph.indices_.shape
+        nn = graph.nn_
+        if not hasattr(nn, 'radius_neighbors'):
+            return np.concatenate([np.arange(n_samples)[:, None], graph.indices_], axis=1)
+
+        if getattr(nn, '_tree', None) is None:
+            # a block holds the (n_samples, n_features) differences of each of its points and their squares
+            row_bytes = 8 * n_samples * (2 * X.shape[1] + 1)
+        else:
+            # a block holds the candidates of each of its points, more than k + 1 on ties
+            row_bytes = 8 * 4 * (n_neighbors + 1) * (X.shape[1] + 1)
+        working_memory = self.working_memory or sklearn.get_config()['working_memory']
+        block_size = max(1, int(working_memory * 2 ** 20 // row_bytes))
+        blocks = list(gen_batches(n_samples, block_size))
+
+        n_jobs = min(effective_n_jobs(self.n_jobs), len(blocks))
+        if n_jobs <= 1:
+            paths = [_block_sbn_paths(X, graph, block) for block in blocks]
+        else:
+            paths = Parallel(n_jobs=n_jobs, prefer='threads')(
+                delayed(_block_sbn_paths)(X, graph, block) for block in blocks)
+        return np.concatenate(paths)
+
+    def _chaining_costs(self, X, paths):
+        """Edge costs of the set-based nearest paths ``paths`` (n_samples,
+        k + 1): the j-th cost is the distance of the j-th neighbor to the
+        closest of the first j points of the path. Computed by blocks of
+        points in n_jobs threads."""
+        n_samples, n_neighbors = paths.shape[0], paths.shape[1] - 1
+        # a block holds the (k, k + 1, n_features) differences of each of its points
+        row_bytes = 8 * n_neighbors * (n_neighbors + 1) * (X.shape[1] + 1)
+        working_memory = self.working_memory or sklearn.get_config()['working_memory']
+        block_size = max(1, int(working_memory * 2 ** 20 // row_bytes))
+        blocks = list(gen_batches(n_samples, block_size))
+
+        n_jobs = min(effective_n_jobs(self.n_jobs), len(blocks))
+        if n_jobs <= 1:
+            costs = [_block_chaining_costs(X, paths, block) for block in blocks]
+        else:
+            costs = Parallel(n_jobs=n_jobs, prefer='threads')(
+                delayed(_block_chaining_costs)(X, paths, block) for block in blocks)
+        return np.concatenate(costs)
+
+
+def _block_sbn_paths(X, graph, rows):
+    """Set-based nearest paths (see ``COF._sbn_paths``) of the points ``rows``."""
+    n_neighbors = graph.n_neighbors
+    tree = getattr(graph.nn_, '_tree', None)
+    if tree is None:
+        dist = minkowski_distance(X[rows, None, :], X[None, :, :], p=2)
+        radius = np.partition(dist, n_neighbors, axis=1)[:, n_neighbors]
+        point, candidates = np.nonzero(dist <= radius[:, None])
+        point += rows.start
+        counts = np.bincount(point - rows.start, minlength=rows.stop - rows.start)
+    else:
+        # the tree distances may differ from scipy's in the last bits
+        candidates = tree.query_radius(X[rows], r=graph.distances_[rows, -1] * (1. + 1e-9))
+        counts = np.array([len(c) for c in candidates])
+        point = np.repeat(np.arange(rows.start, rows.stop), counts)
+        candidates = np.concatenate(candidates)
+    dist = minkowski_distance(X[point], X[candidates], p=2)
+    order = np.lexsort((candidates, dist, point))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return candidates[order][starts[:, None] + np.arange(n_neighbors + 1)]
+
+
+def _block_chaining_costs(X, paths, rows):
+    """Chaining costs (see ``COF._chaining_costs``) of the points ``rows``."""
+    n_neighbors = paths.shape[1] - 1
+    points = X[paths[rows]]
+    # distances of the neighbors 1..k to the path points 0..k, as scipy's distance_matrix
+    dist_path = minkowski_distance(points[:, 1:, None, :], points[:, None, :, :], p=2)
+    # the cost of the neighbor j + 1 is over the path points 0..j
+    later = np.triu(np.ones((n_neighbors, n_neighbors + 1), dtype=bool), k=1)
+    dist_path[:, later] = np.inf
+    return dist_path.min(axis=2)
@@ -5,48 +5,48 @@ Original source: [https://github.com/yzhao062/pyod]
 
 from __future__ import division
 from __future__ import print_function
-import warnings
 
 import numpy as np
 
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
 from scipy.stats import skew as skew_sp
 from sklearn.utils.validation import check_is_fitted
 from sklearn.utils import check_array
+from sklearn.utils import gen_batches
 
 from .base import BaseDetector
-from ..utils.stat_models import column_ecdf
-from ..utils.utility import _partition_estimators
+from ..utils.stat_models import FittedECDF
 from ..utils.utility import zscore
 
 def skew(X, axis=0):
     return np.nan_to_num(skew_sp(X, axis=axis))
 
-def _parallel_ecdf(n_dims, X):
-    """Private method to calculate ecdf in parallel.    
+def _copod_scores(ecdf, skewness, X, include_self):
+    """COPOD scores of the rows of X.
+
     Parameters
     ----------
-    n_dims : int
-        The number of dimensions of the current input matrix
+    ecdf : FittedECDF
+        The ECDF of the training data.
+
+    skewness : numpy array of shape (n_features,)
+        Sign of the skewness of the training columns.
 
     X : numpy array
-        The subarray for building the ECDF
+        The rows to score.
+
+    include_self : bool
+        Count each row in the ECDF, see ``FittedECDF``.
 
     Returns
     -------
-    U_l_mat : numpy array
-        ECDF subarray.
-
-    U_r_mat : numpy array
-        ECDF subarray.
+    scores : numpy array of shape (n_samples,)
     """
-    U_l_mat = np.zeros([X.shape[0], n_dims])
-    U_r_mat = np.zeros([X.shape[0], n_dims])
-
-    for i in range(n_dims):
-        U_l_mat[:, i: i + 1] = column_ecdf(X[:, i: i + 1])
-        U_r_mat[:, i: i + 1] = column_ecdf(X[:, i: i + 1] * -1)
-    return U_l_mat, U_r_mat
+    U_l = -1 * np.log(ecdf.left(X, include_self))
+    U_r = -1 * np.log(ecdf.right(X, include_self))
+    U_skew = U_l * -1 * np.sign(skewness - 1) + U_r * np.sign(skewness + 1)
+    O = np.maximum(U_skew, np.add(U_l, U_r) / 2)
+    return O.sum(axis=1)
 
 class COPOD(BaseDetector):
     """COPOD class for Copula Based Outlier Detector.
@@ -54,6 +54,12 @@ class COPOD(BaseDetector):
     based on empirical copula models.
     See :cite:`li2020copod` for details.
 
+    The training data is fitted once: its ECDF is kept as the sorted columns
+    (``utils.stat_models.FittedECDF``) and new samples are scored against it
+    by binary search, in chunks of rows, without refitting. Each new sample
+    gets the score it would have if it were appended alone to the training
+    data.
+
     Parameters
     ----------
     contamination : float in (0., 0.5), optional (default=0.1)
@@ -62,12 +68,22 @@ class COPOD(BaseDetector):
         define the threshold on the decision function.
         
     n_jobs : optional (default=1)
-        The number of jobs to run in parallel for both `fit` and
-        `predict`. If -1, then the number of jobs is set to the
+        The number of threads scoring the chunks of rows in both `fit` and
+        `decision_function`. If -1, then the number of jobs is set to the
         number of cores.
 
+    chunk_size : int, optional (default=10000)
+        Number of rows scored at once, which bounds the memory of scoring
+        whatever the number of samples.
+
     Attributes
     ----------
+    ecdf_ : FittedECDF
+        The ECDF of the training data, i.e. its sorted columns.
+
+    skewness_ : numpy array of shape (n_features,)
+        Sign of the skewness of the training columns.
+
     decision_scores_ : numpy array of shape (n_samples,)
         The outlier scores of the training data.
         The higher, the more abnormal. Outliers tend to have higher
@@ -84,12 +100,12 @@ class COPOD(BaseDetector):
         ``threshold_`` on ``decision_scores_``.
     """
 
-    def __init__(self, contamination=0.1, n_jobs=1, normalize=True):
+    def __init__(self, contamination=0.1, n_jobs=1, normalize=True, chunk_size=10000):
         super(COPOD, self).__init__(contamination=contamination)
 
-        #TODO: Make it parameterized for n_jobs
         self.n_jobs = n_jobs
         self.normalize = normalize
+        self.chunk_size = chunk_size
 
     def fit(self, X, y=None):
         """Fit detector. y is ignored in unsupervised methods.
@@ -108,8 +124,9 @@ class COPOD(BaseDetector):
         if self.normalize: X = zscore(X, axis=1, ddof=1)
 
         self._set_n_classes(y)
-        self.decision_scores_ = self.decision_function(X)
-        self.X_train = X
+        self.ecdf_ = FittedECDF().fit(X)
+        self.skewness_ = np.sign(skew(X, axis=0))
+        self.decision_scores_ = self._score_chunks(X, include_self=False)
         self._process_decision_scores()
         return self
 
@@ -126,80 +143,13 @@ class COPOD(BaseDetector):
         anomaly_scores : numpy array of shape (n_samples,)
             The anomaly score of the input samples.
         """
-        # use multi-thread execution
-        if self.n_jobs != 1:
-            return self._decision_function_parallel(X)
-        if hasattr(self, 'X_train'):
-            original_size = X.shape[0]
-            X = np.concatenate((self.X_train, X), axis=0)
-        self.U_l = -1 * np.log(column_ecdf(X))
-        self.U_r = -1 * np.log(column_ecdf(-X))
-
-        skewness = np.sign(skew(X, axis=0))
-        self.U_skew = self.U_l * -1 * np.sign(
-            skewness - 1) + self.U_r * np.sign(skewness + 1)
-        self.O = np.maximum(self.U_skew, np.add(self.U_l, self.U_r) / 2)
-        if hasattr(self, 'X_train'):
-            decision_scores_ = self.O.sum(axis=1)[-original_size:]
-        else:
-            decision_scores_ = self.O.sum(axis=1)
-        return decision_scores_.ravel()
-
-    def _decision_function_parallel(self, X):
-        """Predict raw anomaly score of X using the fitted detector.
-         For consistency, outliers are assigned with larger anomaly scores.
-        Parameters
-        ----------
-        X : numpy array of shape (n_samples, n_features)
-            The training input samples. Sparse matrices are accepted only
-            if they are supported by the base estimator.
-        Returns
-        -------
-        anomaly_scores : numpy array of shape (n_samples,)
-            The anomaly score of the input samples.
-        """
-        if hasattr(self, 'X_train'):
-            original_size = X.shape[0]
-            X = np.concatenate((self.X_train, X), axis=0)
-
-        n_samples, n_features = X.shape[0], X.shape[1]
-
-        if n_features < 2:
-            raise ValueError(
-                'n_jobs should not be used on one dimensional dataset')
-
-        if n_features <= self.n_jobs:
-            self.n_jobs = n_features
-            warnings.warn("n_features <= n_jobs; setting them equal instead.")
-
-        n_jobs, n_dims_list, starts = _partition_estimators(n_features,
-                                                            self.n_jobs)
-
-        all_results = Parallel(n_jobs=n_jobs, max_nbytes=None,
-                               verbose=True)(
-            delayed(_parallel_ecdf)(
-                n_dims_list[i],
-                X[:, starts[i]:starts[i + 1]],
-            )
-            for i in range(n_jobs))
-
-        # recover the results
-        self.U_l = np.zeros([n_samples, n_features])
-        self.U_r = np.zeros([n_samples, n_features])
-
-        for i in range(n_jobs):
-            self.U_l[:, starts[i]:starts[i + 1]] = all_results[i][0]
-            self.U_r[:, starts[i]:starts[i + 1]] = all_results[i][1]
-
-        self.U_l = -1 * np.log(self.U_l)
-        self.U_r = -1 * np.log(self.U_r)
-
-        skewness = np.sign(skew(X, axis=0))
-        self.U_skew = self.U_l * -1 * np.sign(
-            skewness - 1) + self.U_r * np.sign(skewness + 1)
-        self.O = np.maximum(self.U_skew, np.add(self.U_l, self.U_r) / 2)
-        if hasattr(self, 'X_train'):
-            decision_scores_ = self.O.sum(axis=1)[-original_size:]
-        else:
-            decision_scores_ = self.O.sum(axis=1)
-        return decision_scores_.ravel()
\ No newline at end of file
+        check_is_fitted(self, ['ecdf_', 'skewness_'])
+        X = check_array(X)
+        return self._score_chunks(X, include_self=True)
+
+    def _score_chunks(self, X, include_self):
+        """Scores of the rows of X, chunk_size rows at a time in n_jobs threads."""
+        chunks = list(gen_batches(X.shape[0], self.chunk_size))
+        scores = Parallel(n_jobs=min(effective_n_jobs(self.n_jobs), len(chunks)), prefer='threads')(
+            delayed(_copod_scores)(self.ecdf_, self.skewness_, X[rows], include_self) for rows in chunks)
+        return np.concatenate(scores).ravel().astype(X.dtype, copy=False)
@@ -9,13 +9,14 @@ import torchinfo
 import torch
 from torch import nn, optim
 import tqdm
-import os, math
+import os
 import torch.nn.functional as F
 from torch.utils.data import DataLoader
 from typing import Tuple, Sequence, Union, Callable
 
 from ..utils.torch_utility import EarlyStoppingTorch, get_gpu
 from ..utils.dataset import ReconstructDataset    
+from ..utils.utility import window_scores_to_points
 
 class DonutModel(nn.Module):
     def __init__(self, input_dim, hidden_dim, latent_dim, mask_prob) -> None:
@@ -265,8 +266,10 @@ class Donut():
                  lr=1e-4,
                  l2_coff=1e-3,
                  patience=3,
-                 validation_size=0):
+                 validation_size=0,
+                 scoring_stride=1):
         super().__init__()
+        self.scoring_stride = scoring_stride
         self.__anomaly_score = None
         
         self.cuda = True
@@ -362,7 +365,7 @@ class Donut():
     def decision_function(self, data):
         
         test_loader = DataLoader(
-            dataset=ReconstructDataset(data, window_size=self.win_size),
+            dataset=ReconstructDataset(data, window_size=self.win_size, stride=self.scoring_stride),
             batch_size=self.batch_size,
             shuffle=False
         )
@@ -400,9 +403,7 @@ class Donut():
             
         self.__anomaly_score = scores
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = window_scores_to_points(self.__anomaly_score, self.win_size, self.scoring_stride, len(data))
         
         return self.__anomaly_score
 
@@ -14,10 +14,10 @@ import numpy as np
 import torch
 from torch import nn, optim
 from torch.utils.data import DataLoader
-import math
 
 from ..utils.torch_utility import EarlyStoppingTorch, get_gpu
 from ..utils.dataset import ReconstructDataset    
+from ..utils.utility import window_scores_to_points
 
 class Model(nn.Module):
 
@@ -86,9 +86,11 @@ class FITS():
                  cut_freq=12,
                  epochs=50,
                  lr=1e-3,
-                 validation_size=0.2
+                 validation_size=0.2,
+                 scoring_stride=1
                  ):
         super().__init__()
+        self.scoring_stride = scoring_stride
         self.__anomaly_score = None
         
         self.cuda = True
@@ -181,7 +183,7 @@ class FITS():
     
     def decision_function(self, data):
         test_loader = DataLoader(
-            dataset=ReconstructDataset(data, window_size=self.win_size),
+            dataset=ReconstructDataset(data, window_size=self.win_size, stride=self.scoring_stride),
             batch_size=self.batch_size,
             shuffle=False
         )
@@ -207,9 +209,7 @@ class FITS():
         assert scores.ndim == 1
         self.__anomaly_score = scores
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = window_scores_to_points(self.__anomaly_score, self.win_size, self.scoring_stride, len(data))
         
         return self.__anomaly_score
 
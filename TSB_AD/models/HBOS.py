@@ -7,15 +7,14 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
-import math
 from numba import njit
 from sklearn.utils import check_array
 from sklearn.utils.validation import check_is_fitted
 
-from .feature import Window
+from .feature import get_window_matrix
 from .base import BaseDetector
 from ..utils.utility import check_parameter, get_optimal_n_bins, invert_order
-from ..utils.utility import zscore
+from ..utils.utility import window_scores_to_points
 
 
 class HBOS(BaseDetector):
@@ -48,6 +47,11 @@ class HBOS(BaseDetector):
         i.e. the proportion of outliers in the data set. Used when fitting to
         define the threshold on the decision function.
 
+    scoring_stride : int, optional (default=1)
+        Only every ``scoring_stride``-th window is used (to fit and to score).
+        Point scores are interpolated between the scored windows, which makes
+        the detector roughly ``scoring_stride`` times faster.
+
     Attributes
     ----------
     bin_edges_ : numpy array of shape (n_bins + 1, n_features )
@@ -73,7 +77,7 @@ class HBOS(BaseDetector):
         ``threshold_`` on ``decision_scores_``.
     """
 
-    def __init__(self, slidingWindow=100, sub=True, n_bins=10, alpha=0.1, tol=0.5, contamination=0.1, normalize=True):
+    def __init__(self, slidingWindow=100, sub=True, n_bins=10, alpha=0.1, tol=0.5, contamination=0.1, normalize=True, scoring_stride=1):
         super(HBOS, self).__init__(contamination=contamination)
         self.slidingWindow = slidingWindow
         self.sub = sub
@@ -81,6 +85,7 @@ class HBOS(BaseDetector):
         self.alpha = alpha
         self.tol = tol
         self.normalize = normalize
+        self.scoring_stride = scoring_stride
 
         check_parameter(alpha, 0, 1, param_name='alpha')
         check_parameter(tol, 0, 1, param_name='tol')
@@ -104,12 +109,7 @@ class HBOS(BaseDetector):
         n_samples, n_features = X.shape
 
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize)
 
         # validate inputs X and y (optional)
         X = check_array(X)
@@ -160,9 +160,7 @@ class HBOS(BaseDetector):
         self.decision_scores_ = invert_order(np.sum(outlier_scores, axis=1))
 
         # padded decision_scores_
-        if self.decision_scores_.shape[0] < n_samples:
-            self.decision_scores_ = np.array([self.decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(self.decision_scores_) + [self.decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        self.decision_scores_ = window_scores_to_points(self.decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
         self._process_decision_scores()
         return self
 
@@ -188,12 +186,7 @@ class HBOS(BaseDetector):
 
         n_samples, n_features = X.shape
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize)
                         
         X = check_array(X)
 
@@ -211,9 +204,7 @@ class HBOS(BaseDetector):
         # invert outlier scores. Outliers comes with higher outlier scores
         decision_scores_ = invert_order(np.sum(outlier_scores, axis=1))
         # padded decision_scores_
-        if decision_scores_.shape[0] < n_samples:
-            decision_scores_ = np.array([decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(decision_scores_) + [decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        decision_scores_ = window_scores_to_points(decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
         return decision_scores_
 
 
@@ -250,7 +241,7 @@ def _calculate_outlier_scores_auto(X, bin_edges, hist, alpha,
     """
 
     n_samples, n_features = X.shape[0], X.shape[1]
-    outlier_scores = np.zeros(shape=(n_samples, n_features))
+    outlier_scores = np.zeros(shape=(n_samples, n_features), dtype=X.dtype)
 
     for i in range(n_features):
 
@@ -338,7 +329,7 @@ def _calculate_outlier_scores(X, bin_edges, hist, n_bins, alpha,
     """
 
     n_samples, n_features = X.shape[0], X.shape[1]
-    outlier_scores = np.zeros(shape=(n_samples, n_features))
+    outlier_scores = np.zeros(shape=(n_samples, n_features), dtype=X.dtype)
 
     for i in range(n_features):
 
@@ -7,18 +7,17 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
-import math
 from joblib import Parallel
 from joblib.parallel import delayed
 from sklearn.ensemble import IsolationForest
 from sklearn.utils import check_array
 from sklearn.utils.validation import check_is_fitted
 
-from .feature import Window
+from .feature import get_window_matrix, WindowNormalizer
 from .base import BaseDetector
 # noinspection PyProtectedMember
 from ..utils.utility import invert_order
-from ..utils.utility import zscore
+from ..utils.utility import window_scores_to_points
 
 class IForest(BaseDetector):
     """Wrapper of scikit-learn Isolation Forest with more functionalities.
@@ -106,6 +105,17 @@ class IForest(BaseDetector):
     verbose : int, optional (default=0)
         Controls the verbosity of the tree building process.
 
+    chunk_size : int, optional (default=None)
+        If set, the window matrix is never built: the forest is fit on at most
+        ``chunk_size`` windows drawn at random (each tree only uses
+        ``max_samples`` of them anyway) and windows are normalized and scored
+        ``chunk_size`` at a time. If None, the whole matrix is built.
+
+    scoring_stride : int, optional (default=1)
+        Only every ``scoring_stride``-th window is used (to fit and to score).
+        Point scores are interpolated between the scored windows, which makes
+        the detector roughly ``scoring_stride`` times faster.
+
     Attributes
     ----------
     estimators_ : list of DecisionTreeClassifier
@@ -148,7 +158,8 @@ class IForest(BaseDetector):
                  behaviour='old',
                  random_state=0,         # set the random state
                  verbose=0, 
-                 normalize=True):
+                 normalize=True, scoring_stride=1,
+                 chunk_size=None):
         super(IForest, self).__init__(contamination=contamination)
         self.slidingWindow = slidingWindow
         self.sub = sub
@@ -161,6 +172,8 @@ class IForest(BaseDetector):
         self.random_state = random_state
         self.verbose = verbose
         self.normalize = normalize
+        self.scoring_stride = scoring_stride
+        self.chunk_size = chunk_size
 
     def fit(self, X, y=None):
         """Fit detector. y is ignored in unsupervised methods.
@@ -181,12 +194,14 @@ class IForest(BaseDetector):
         n_samples, n_features = X.shape
 
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)        
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        if self.chunk_size is None:
+            X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize)
+            blocks = [X]
+        else:
+            normalizer = WindowNormalizer(window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                          block_size=self.chunk_size).fit(X)
+            X = normalizer.subsample(self.chunk_size, random_state=self.random_state)
+            blocks = (block for _, block in normalizer.iter_blocks())
 
         # validate inputs X and y (optional)
         X = check_array(X)
@@ -208,12 +223,11 @@ class IForest(BaseDetector):
         self.detector_.fit(X=X, y=None, sample_weight=None)
 
         # invert decision_scores_. Outliers comes with higher outlier scores.
-        self.decision_scores_ = invert_order(self.detector_.decision_function(X))
+        self.decision_scores_ = invert_order(
+            np.concatenate([self.detector_.decision_function(block) for block in blocks]))
 
         # padded decision_scores_
-        if self.decision_scores_.shape[0] < n_samples:
-            self.decision_scores_ = np.array([self.decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(self.decision_scores_) + [self.decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        self.decision_scores_ = window_scores_to_points(self.decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
         self._process_decision_scores()
         return self
 
@@ -239,19 +253,18 @@ class IForest(BaseDetector):
 
         n_samples, n_features = X.shape
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        if self.chunk_size is None:
+            blocks = [get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize)]
+        else:
+            normalizer = WindowNormalizer(window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                          block_size=self.chunk_size).fit(X)
+            blocks = (block for _, block in normalizer.iter_blocks())
                 
         # invert outlier scores. Outliers comes with higher outlier scores
-        decision_scores_ = invert_order(self.detector_.decision_function(X))
+        decision_scores_ = invert_order(
+            np.concatenate([self.detector_.decision_function(block) for block in blocks]))
         # padded decision_scores_
-        if decision_scores_.shape[0] < n_samples:
-            decision_scores_ = np.array([decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(decision_scores_) + [decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        decision_scores_ = window_scores_to_points(decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
         return decision_scores_
 
     @property
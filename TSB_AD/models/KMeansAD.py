@@ -4,65 +4,113 @@ Original source: [https://github.com/TimeEval/TimeEval-algorithms]
 """
 
 from sklearn.base import BaseEstimator, OutlierMixin
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.utils import gen_batches
 import numpy as np
 from numpy.lib.stride_tricks import sliding_window_view
-from ..utils.utility import zscore
+from ..utils.utility import zscore, reverse_windowing
 
 class KMeansAD(BaseEstimator, OutlierMixin):
-    def __init__(self, k, window_size, stride, n_jobs=1, normalize=True):
+    """K-means clustering of the sliding windows, scored by the distance of
+    each window to its centroid.
+
+    With ``batch_size`` set, the clusters are fitted by mini-batch k-means on
+    batches of windows drawn at random from the series, and the windows are
+    scored ``chunk_size`` at a time, so the window matrix is never built:
+    memory is bounded by the batch and chunk sizes. ``partial_fit`` then
+    updates the clusters with the next part of the series.
+    """
+    def __init__(self, k, window_size, stride, n_jobs=1, normalize=True, batch_size=None, chunk_size=10000,
+                 random_state=None):
         self.k = k
         self.window_size = window_size
         self.stride = stride
-        self.model = KMeans(n_clusters=k)
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+        self.model = self._make_model()
         self.padding_length = 0
         self.normalize = normalize
+        self._tail = None
+
+    def _make_model(self):
+        if self.batch_size is None:
+            return KMeans(n_clusters=self.k)
+        return MiniBatchKMeans(n_clusters=self.k, batch_size=self.batch_size, random_state=self.random_state)
 
     def _preprocess_data(self, X: np.ndarray) -> np.ndarray:
         flat_shape = (X.shape[0] - (self.window_size - 1), -1)  # in case we have a multivariate TS
         slides = sliding_window_view(X, window_shape=self.window_size, axis=0).reshape(flat_shape)[::self.stride, :]
         self.padding_length = X.shape[0] - (slides.shape[0] * self.stride + self.window_size - self.stride)
-        print(f"Required padding_length={self.padding_length}")
         if self.normalize: slides = zscore(slides, axis=1, ddof=1)
         return slides
 
-    def _custom_reverse_windowing(self, scores: np.ndarray) -> np.ndarray:
-        print("Reversing window-based scores to point-based scores:")
-        print(f"Before reverse-windowing: scores.shape={scores.shape}")
-        # compute begin and end indices of windows
-        begins = np.array([i * self.stride for i in range(scores.shape[0])])
-        ends = begins + self.window_size
+    def _n_windows(self, X: np.ndarray) -> int:
+        return max(0, (X.shape[0] - self.window_size) // self.stride + 1)
 
-        # prepare target array
-        unwindowed_length = self.stride * (scores.shape[0] - 1) + self.window_size + self.padding_length
-        mapped = np.full(unwindowed_length, fill_value=np.nan)
-
-        # only iterate over window intersections
-        indices = np.unique(np.r_[begins, ends])
-        for i, j in zip(indices[:-1], indices[1:]):
-            window_indices = np.flatnonzero((begins <= i) & (j-1 < ends))
-            # print(i, j, window_indices)
-            mapped[i:j] = np.nanmean(scores[window_indices])
+    def _windows(self, X: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """The windows ``indices`` of X, as rows of ``_preprocess_data``."""
+        starts = indices * self.stride
+        slides = X[starts[:, None] + np.arange(self.window_size)]
+        # (n, window, n_features) -> (n, n_features * window), channel-major as sliding_window_view
+        slides = np.moveaxis(slides, 1, -1).reshape(len(indices), -1)
+        if self.normalize: slides = zscore(slides, axis=1, ddof=1)
+        return slides
 
-        # replace untouched indices with 0 (especially for the padding at the end)
-        np.nan_to_num(mapped, copy=False)
-        print(f"After reverse-windowing: scores.shape={mapped.shape}")
-        return mapped
+    def _custom_reverse_windowing(self, scores: np.ndarray) -> np.ndarray:
+        unwindowed_length = self.stride * (scores.shape[0] - 1) + self.window_size + self.padding_length
+        return reverse_windowing(scores, self.window_size, self.stride, unwindowed_length)
 
     def fit(self, X: np.ndarray, y=None, preprocess=True) -> 'KMeansAD':
+        if self.batch_size is not None and preprocess:
+            self.model = self._make_model()
+            self._tail = None
+            return self.partial_fit(X)
         if preprocess:
             X = self._preprocess_data(X)
         self.model.fit(X)
         return self
 
+    def partial_fit(self, X: np.ndarray, y=None) -> 'KMeansAD':
+        """Update the clusters (mini-batch mode) with the windows of X, the
+        part of the series that follows the data seen so far: the windows
+        overlapping the previous part are included."""
+        if self.batch_size is None:
+            raise ValueError("partial_fit needs the mini-batch mode, set batch_size")
+        if self._tail is not None:
+            X = np.concatenate([self._tail, X])
+        n_windows = self._n_windows(X)
+        # the windows are visited once, in random batches
+        rng = np.random.RandomState(self.random_state)
+        order = rng.permutation(n_windows)
+        for batch in gen_batches(n_windows, self.batch_size):
+            self.model.partial_fit(self._windows(X, order[batch]))
+        self._tail = X[n_windows * self.stride:]
+        return self
+
     def predict(self, X: np.ndarray, preprocess=True) -> np.ndarray:
+        if self.batch_size is not None and preprocess:
+            return self._predict_chunks(X)
         if preprocess:
             X = self._preprocess_data(X)
         clusters = self.model.predict(X)
         diffs = np.linalg.norm(X - self.model.cluster_centers_[clusters], axis=1)
         return self._custom_reverse_windowing(diffs)
 
+    def _predict_chunks(self, X: np.ndarray) -> np.ndarray:
+        """``predict`` with the windows built and scored chunk_size at a time."""
+        n_windows = self._n_windows(X)
+        self.padding_length = X.shape[0] - (n_windows * self.stride + self.window_size - self.stride)
+        diffs = np.empty(n_windows)
+        for rows in gen_batches(n_windows, self.chunk_size):
+            slides = self._windows(X, np.arange(rows.start, rows.stop))
+            clusters = self.model.predict(slides)
+            diffs[rows] = np.linalg.norm(slides - self.model.cluster_centers_[clusters], axis=1)
+        return self._custom_reverse_windowing(diffs)
+
     def fit_predict(self, X, y=None) -> np.ndarray:
+        if self.batch_size is not None:
+            return self.fit(X).predict(X)
         X = self._preprocess_data(X)
         self.fit(X, y, preprocess=False)
-        return self.predict(X, preprocess=False)
\ No newline at end of file
+        return self.predict(X, preprocess=False)
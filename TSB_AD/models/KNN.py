@@ -8,16 +8,19 @@ from __future__ import print_function
 from warnings import warn
 
 import numpy as np
+import sklearn
+from joblib import Parallel, delayed, effective_n_jobs
 from sklearn.neighbors import BallTree
 from sklearn.neighbors import NearestNeighbors
 from sklearn.utils.validation import check_is_fitted
 from sklearn.utils.validation import check_is_fitted
 from sklearn.utils import check_array
-import math
+from sklearn.utils import gen_even_slices
 
 from .base import BaseDetector
-from .feature import Window
-from ..utils.utility import zscore
+from .feature import WindowNormalizer, WindowStream, make_projection
+from .neighbors import ShardedNeighbors, get_neighbor_graph, get_search_matrix, make_neighbor_search
+from ..utils.utility import window_scores_to_points
 
 class KNN(BaseDetector):
     # noinspection PyPep8
@@ -115,7 +118,41 @@ class KNN(BaseDetector):
     n_jobs : int, optional (default = 1)
         The number of parallel jobs to run for neighbors search.
         If ``-1``, then the number of jobs is set to the number of CPU cores.
-        Affects only kneighbors and kneighbors_graph methods.
+        Affects the kneighbors queries of ``fit`` and the tree queries of
+        ``decision_function``, which run in threads over slices of each block.
+
+    chunk_size : int, optional (default=None)
+        If set, windows are normalized ``chunk_size`` at a time in O(n) and
+        ``decision_function`` queries the tree block by block, so that the
+        window matrix of the scored series is never built. The tree itself
+        still holds all the training windows.
+
+    working_memory : int, optional (default=None)
+        Memory cap, in MiB, of ``decision_function``. If set, the windows are
+        normalized and queried block by block as with ``chunk_size``, with
+        blocks sized to fit in it. Otherwise the window matrix is built and
+        queried in blocks of sklearn's ``working_memory``.
+
+    scoring_stride : int, optional (default=1)
+        Only every ``scoring_stride``-th window is used (to fit and to score).
+        Point scores are interpolated between the scored windows, which makes
+        the detector roughly ``scoring_stride`` times faster.
+
+    reduction : str or WindowProjection, optional (default=None)
+        Dimensionality reduction of the windows before the detector sees them:
+        'random_projection', 'paa' or a ``feature.WindowProjection`` (see
+        there for the target dimension). It is fitted in ``fit`` and reused by
+        ``decision_function``.
+
+    neighbor_search : str or RPForest, optional (default=None)
+        None or 'exact' for the exact neighbor search, 'approximate' for a
+        ``neighbors.RPForest`` with default parameters, or an RPForest whose
+        ``n_trees`` sets the recall/speed tradeoff. The approximate search is
+        much faster on long windows and only supports the Euclidean metric.
+        The forest also answers the queries of ``decision_function``.
+        With the exact search, window matrices above the sharding threshold
+        (see ``neighbors.set_sharding``) are memory-mapped and searched by
+        ``neighbors.ShardedNeighbors``, with the same scores.
 
     Attributes
     ----------
@@ -138,8 +175,8 @@ class KNN(BaseDetector):
     """
     def __init__(self, slidingWindow=100, sub=True, contamination=0.1, n_neighbors=10, method='largest',
                  radius=1.0, algorithm='auto', leaf_size=30,
-                 metric='minkowski', p=2, metric_params=None, n_jobs=1, normalize=True,
-                 **kwargs):
+                 metric='minkowski', p=2, metric_params=None, n_jobs=1, normalize=True, scoring_stride=1,
+                 chunk_size=None, reduction=None, working_memory=None, neighbor_search=None, **kwargs):
                 
         self.slidingWindow = slidingWindow
         self.sub = sub
@@ -152,7 +189,12 @@ class KNN(BaseDetector):
         self.p = p
         self.metric_params = metric_params
         self.normalize = normalize
+        self.scoring_stride = scoring_stride
+        self.reduction = reduction
         self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.working_memory = working_memory
+        self.neighbor_search = neighbor_search
 
         if self.algorithm != 'auto' and self.algorithm != 'ball_tree':
             warn('algorithm parameter is deprecated and will be removed '
@@ -186,21 +228,29 @@ class KNN(BaseDetector):
             Fitted estimator.
         """
         n_samples, n_features = X.shape
+        series = X
 
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        self.projection_ = make_projection(self.reduction)
+        # memory-mapped above the sharding threshold, see neighbors.set_sharding
+        X = get_search_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                              projection=self.projection_, block_size=self.chunk_size)
 
         # validate inputs X and y (optional)
         X = check_array(X)
 
-        self.neigh_.fit(X)
+        # the neighbor graph is shared with the other n_neighbors/method settings on the same windows
+        params = self.neigh_.get_params()
+        params.pop('n_neighbors')
+        self.neighbor_search_ = make_neighbor_search(self.neighbor_search)
+        graph = get_neighbor_graph(X, self.n_neighbors, neighbor_search=self.neighbor_search_, **params)
+        self.neigh_ = graph.nn_
 
-        if self.neigh_._tree is not None:
+        if self.neighbor_search_ is not None or isinstance(self.neigh_, ShardedNeighbors):
+            # the forest (or the shards) answers the tree queries of decision_function
+            self.tree_ = self.neigh_
+
+        elif self.neigh_._tree is not None:
             self.tree_ = self.neigh_._tree
 
         else:
@@ -213,15 +263,14 @@ class KNN(BaseDetector):
                                       metric=self.metric)
 
 
-        dist_arr, _ = self.neigh_.kneighbors(n_neighbors=self.n_neighbors,
-                                             return_distance=True)
+        dist_arr, _ = graph.kneighbors(self.n_neighbors)
 
         self.decision_scores_ = self._get_dist_by_method(dist_arr)
         # padded decision_scores_
-        if self.decision_scores_.shape[0] < n_samples:
-            self.decision_scores_ = np.array([self.decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(self.decision_scores_) + [self.decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        self.decision_scores_ = window_scores_to_points(self.decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
 
+        self.stream_ = WindowStream(window=self.slidingWindow, normalize=self.normalize,
+                                    projection=self.projection_).fit(series, stride=self.scoring_stride)
         return self
 
     def decision_function(self, X):
@@ -242,41 +291,72 @@ class KNN(BaseDetector):
         anomaly_scores : numpy array of shape (n_samples,)
             The anomaly score of the input samples.
         """
-        print("inside decision Function")
         # check_is_fitted(self, ['tree_', 'decision_scores_',
         #                        'threshold_', 'labels_'])
 
         n_samples = X.shape[0]
         X = check_array(X)
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
-
-        # initialize the output score
-        pred_scores = np.zeros([X.shape[0], 1])
-
-        for i in range(X.shape[0]):
-            x_i = X[i, :]
-            x_i = np.asarray(x_i).reshape(1, x_i.shape[0])
-
-            # get the distance of the current point
-            dist_arr, _ = self.tree_.query(x_i, k=self.n_neighbors)
-            dist = self._get_dist_by_method(dist_arr)
-            pred_score_i = dist[-1]
-
-            # record the current item
-            pred_scores[i, :] = pred_score_i
-
-        pred_scores = pred_scores.ravel()
-        if pred_scores.shape[0] < n_samples:
-            padded_decision_scores_ = np.array([pred_scores[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(pred_scores) + [pred_scores[-1]]*((self.slidingWindow-1)//2))
-
-        return padded_decision_scores_
-    
+        block_size = self._block_size(X.shape[1])
+        if self.chunk_size is not None or self.working_memory is not None:
+            normalizer = WindowNormalizer(window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                          block_size=block_size, projection=self.projection_).fit(X)
+            blocks = (block for _, block in normalizer.iter_blocks())
+        else:
+            X = get_search_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                  projection=self.projection_)
+            blocks = (X[start:start + block_size] for start in range(0, X.shape[0], block_size))
+
+        pred_scores = np.concatenate([self._get_dist_by_method(self._query(block)) for block in blocks])
+        return window_scores_to_points(pred_scores, self.slidingWindow, self.scoring_stride, n_samples)
+
+    def score_stream(self, X):
+        """Anomaly scores of the next points of the stream that follows the
+        training series (or the series given to ``start_stream``).
+
+        Each point gets the score of the window that ends at it, so the scores
+        are causal: with ``decision_function`` the score of a window goes to
+        its center. Univariate windows are normalized with the statistics of
+        the training windows.
+
+        Parameters
+        ----------
+        X : numpy array of shape (n_points, n_features)
+            The new points, a micro-batch of any length.
+
+        Returns
+        -------
+        anomaly_scores : numpy array of shape (n_points,)
+        """
+        check_is_fitted(self, ['stream_'])
+        return self._get_dist_by_method(self._query(self.stream_.transform(X)))
+
+    def start_stream(self, X):
+        """Restart the stream of ``score_stream`` after the series X (its last
+        ``slidingWindow - 1`` points are used)."""
+        check_is_fitted(self, ['stream_'])
+        self.stream_.reset(X)
+        return self
+
+    def _block_size(self, n_features):
+        """Number of windows scored at once: chunk_size, or as many as fit in
+        the working memory (window row plus neighbor distances and indices)."""
+        if self.chunk_size is not None:
+            return self.chunk_size
+        n_dims = self.slidingWindow * n_features if self.projection_ is None else self.projection_.n_components_
+        row_bytes = 8 * (n_dims + 2 * self.n_neighbors)
+        working_memory = self.working_memory or sklearn.get_config()['working_memory']
+        return max(1, int(working_memory * 2 ** 20 // row_bytes))
+
+    def _query(self, X):
+        """Distances of the rows of X to their n_neighbors nearest training
+        windows, with the tree queried in n_jobs threads (the shards have
+        their own process pool)."""
+        n_jobs = min(effective_n_jobs(self.n_jobs), X.shape[0])
+        if n_jobs <= 1 or isinstance(self.tree_, ShardedNeighbors):
+            return self.tree_.query(X, k=self.n_neighbors)[0]
+        results = Parallel(n_jobs=n_jobs, prefer='threads')(
+            delayed(self.tree_.query)(X[s], k=self.n_neighbors) for s in gen_even_slices(X.shape[0], n_jobs))
+        return np.concatenate([dist for dist, _ in results])
 
     def _get_dist_by_method(self, dist_arr):
         """Internal function to decide how to process passed in distance array
@@ -6,20 +6,20 @@ Original source: [https://github.com/yzhao062/pyod]
 from __future__ import division
 from __future__ import print_function
 import numpy as np
-import math
-from sklearn.neighbors import LocalOutlierFactor
 from sklearn.utils.validation import check_array
 from sklearn.utils.validation import check_is_fitted
 
 from .base import BaseDetector
-from .feature import Window
-from ..utils.utility import invert_order
-from ..utils.utility import zscore
+from .feature import WindowStream, make_projection
+from .neighbors import get_neighbor_graph, get_search_matrix, make_neighbor_search
+from ..utils.utility import window_scores_to_points
 
 # noinspection PyProtectedMember
 class LOF(BaseDetector):
     """Wrapper of scikit-learn LOF Class with more functionalities.
     Unsupervised Outlier Detection using Local Outlier Factor (LOF).
+    The scores are those of scikit-learn's LocalOutlierFactor, computed from
+    a neighbor graph shared across n_neighbors values (see ``neighbors``).
 
     The anomaly score of each sample is called Local Outlier Factor.
     It measures the local deviation of density of a given sample with
@@ -106,12 +106,31 @@ class LOF(BaseDetector):
         If ``-1``, then the number of jobs is set to the number of CPU cores.
         Affects only kneighbors and kneighbors_graph methods.
 
-    novelty : bool (default=False)
-        By default, LocalOutlierFactor is only meant to be used for outlier
-        detection (novelty=False). Set novelty to True if you want to use
-        LocalOutlierFactor for novelty detection. In this case be aware that
-        that you should only use predict, decision_function and score_samples
-        on new unseen data and not on the training set.
+    novelty : bool (default=True)
+        Ignored, kept for backward compatibility. The training scores are the
+        outlier factors of the training windows, and ``decision_function``
+        and ``score_stream`` always score their input as new data with
+        respect to the training windows (novelty detection).
+
+    scoring_stride : int, optional (default=1)
+        Only every ``scoring_stride``-th window is used (to fit and to score).
+        Point scores are interpolated between the scored windows, which makes
+        the detector roughly ``scoring_stride`` times faster.
+
+    reduction : str or WindowProjection, optional (default=None)
+        Dimensionality reduction of the windows before the detector sees them:
+        'random_projection', 'paa' or a ``feature.WindowProjection`` (see
+        there for the target dimension). It is fitted in ``fit`` and reused by
+        ``decision_function``.
+
+    neighbor_search : str or RPForest, optional (default=None)
+        None or 'exact' for the exact neighbor search, 'approximate' for a
+        ``neighbors.RPForest`` with default parameters, or an RPForest (its
+        ``n_trees`` trades recall for speed). Approximate search only supports
+        the Euclidean metric; the scores are then approximate LOF scores.
+        With the exact search, window matrices above the sharding threshold
+        (see ``neighbors.set_sharding``) are memory-mapped and searched by
+        ``neighbors.ShardedNeighbors``, with the same scores.
 
     Attributes
     ----------
@@ -138,7 +157,8 @@ class LOF(BaseDetector):
 
     def __init__(self, slidingWindow=100, sub=True, n_neighbors=20, algorithm='auto', leaf_size=30,
                  metric='minkowski', p=2, metric_params=None,
-                 contamination=0.1, n_jobs=1, novelty=True, normalize=True):
+                 contamination=0.1, n_jobs=1, novelty=True, normalize=True, scoring_stride=1, reduction=None,
+                 neighbor_search=None):
         super(LOF, self).__init__(contamination=contamination)
 
         self.slidingWindow = slidingWindow
@@ -152,6 +172,9 @@ class LOF(BaseDetector):
         self.n_jobs = n_jobs
         self.novelty = novelty
         self.normalize = normalize
+        self.scoring_stride = scoring_stride
+        self.reduction = reduction
+        self.neighbor_search = neighbor_search
 
     # noinspection PyIncorrectDocstring
     def fit(self, X, y=None):
@@ -171,40 +194,38 @@ class LOF(BaseDetector):
             Fitted estimator.
         """
         n_samples, n_features = X.shape
+        series = X
 
-        # print('self.slidingWindow: ', self.slidingWindow)
-
-        # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        # Converting time series data into matrix format, memory-mapped above the
+        # sharding threshold (see neighbors.set_sharding)
+        self.projection_ = make_projection(self.reduction)
+        X = get_search_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                              projection=self.projection_)
                 
         # validate inputs X and y (optional)
         X = check_array(X)
         self._set_n_classes(y)
 
-        self.detector_ = LocalOutlierFactor(n_neighbors=self.n_neighbors,
-                                            algorithm=self.algorithm,
-                                            leaf_size=self.leaf_size,
-                                            metric=self.metric,
-                                            p=self.p,
-                                            metric_params=self.metric_params,
-                                            contamination=self.contamination,
-                                            n_jobs=self.n_jobs,
-                                            novelty=self.novelty)
-        self.detector_.fit(X=X, y=y)
+        # the neighbor graph is shared with the other n_neighbors settings on the same windows,
+        # the scores are computed as in scikit-learn's LocalOutlierFactor
+        self.n_neighbors_ = max(1, min(self.n_neighbors, X.shape[0] - 1))
+        self.neighbor_search_ = make_neighbor_search(self.neighbor_search)
+        graph = get_neighbor_graph(X, self.n_neighbors_, neighbor_search=self.neighbor_search_, algorithm=self.algorithm,
+                                   leaf_size=self.leaf_size, metric=self.metric, p=self.p,
+                                   metric_params=self.metric_params, n_jobs=self.n_jobs)
+        self.neigh_ = graph.nn_
+        distances, indices = graph.kneighbors(self.n_neighbors_)
+        self._distances_fit_X_ = distances
+        self._lrd = self._local_reachability_density(distances, indices)
 
         # Invert decision_scores_. Outliers comes with higher outlier scores
-        self.decision_scores_ = invert_order(self.detector_.negative_outlier_factor_)
+        self.decision_scores_ = np.mean(self._lrd[indices] / self._lrd[:, np.newaxis], axis=1)
 
         # padded decision_scores_
-        if self.decision_scores_.shape[0] < n_samples:
-            self.decision_scores_ = np.array([self.decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(self.decision_scores_) + [self.decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        self.decision_scores_ = window_scores_to_points(self.decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
 
+        self.stream_ = WindowStream(window=self.slidingWindow, normalize=self.normalize,
+                                    projection=self.projection_).fit(series, stride=self.scoring_stride)
         self._process_decision_scores()
         return self
 
@@ -229,35 +250,56 @@ class LOF(BaseDetector):
 
         check_is_fitted(self, ['decision_scores_', 'threshold_', 'labels_'])
 
-        print('self.slidingWindow: ', self.slidingWindow)
         n_samples, n_features = X.shape
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
-                
-        # Invert outlier scores. Outliers comes with higher outlier scores
-        # noinspection PyProtectedMember
-        try:
-            decision_scores_ = invert_order(self.detector_._score_samples(X))
-        except AttributeError:
-            try:
-                decision_scores_ = invert_order(self.detector_._decision_function(X))
-            except AttributeError:
-                decision_scores_ = invert_order(self.detector_.score_samples(X))
+        X = get_search_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                              projection=self.projection_)
+
+        decision_scores_ = self._score_windows(X)
 
         # padded decision_scores_
-        if decision_scores_.shape[0] < n_samples:
-            decision_scores_ = np.array([decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(decision_scores_) + [decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        decision_scores_ = window_scores_to_points(decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
         return decision_scores_
 
-    @property
-    def n_neighbors_(self):
-        """The actual number of neighbors used for kneighbors queries.
-        Decorator for scikit-learn LOF attributes.
+    def score_stream(self, X):
+        """Anomaly scores of the next points of the stream that follows the
+        training series (or the series given to ``start_stream``).
+
+        Only the new windows are queried: the neighbor index and the
+        reachability densities of the training windows are kept from ``fit``.
+        Each point gets the score of the window that ends at it (with
+        ``decision_function`` the score of a window goes to its center), and
+        univariate windows are normalized with the training statistics.
+
+        Parameters
+        ----------
+        X : numpy array of shape (n_points, n_features)
+            The new points, a micro-batch of any length.
+
+        Returns
+        -------
+        anomaly_scores : numpy array of shape (n_points,)
         """
-        return self.detector_.n_neighbors_
\ No newline at end of file
+        check_is_fitted(self, ['stream_'])
+        return self._score_windows(self.stream_.transform(X))
+
+    def start_stream(self, X):
+        """Restart the stream of ``score_stream`` after the series X (its last
+        ``slidingWindow - 1`` points are used)."""
+        check_is_fitted(self, ['stream_'])
+        self.stream_.reset(X)
+        return self
+
+    def _score_windows(self, X):
+        """Local outlier factor of the windows X with respect to the training windows."""
+        distances, indices = self.neigh_.kneighbors(X, n_neighbors=self.n_neighbors_)
+        lrd = self._local_reachability_density(distances, indices)
+        return np.mean(self._lrd[indices] / lrd[:, np.newaxis], axis=1)
+
+    def _local_reachability_density(self, distances_X, neighbors_indices):
+        """Local reachability density of points from the distances to, and
+        indices of, their n_neighbors_ nearest training windows."""
+        dist_k = self._distances_fit_X_[neighbors_indices, self.n_neighbors_ - 1]
+        reach_dist_array = np.maximum(distances_X, dist_k)
+        # 1e-10 to avoid `nan' when nb of duplicates > n_neighbors_
+        return 1. / (np.mean(reach_dist_array, axis=1) + 1e-10)
@@ -1,9 +1,8 @@
 import numpy as np
 import logging
-import math
 from stumpy import stumpi
 from TSB_AD.models.base import BaseDetector
-from TSB_AD.utils.utility import zscore
+from TSB_AD.utils.utility import zscore, pad_window_scores
 
 class Left_STAMPi(BaseDetector):
 
@@ -75,8 +74,4 @@ class Left_STAMPi(BaseDetector):
         Pads the anomaly scores to match the length of the input time series.
         Padding is symmetric, using the first and last values.
         """
-        left_padding = [scores[0]] * math.ceil((window_size - 1) / 2)
-        right_padding = [scores[-1]] * ((window_size - 1) // 2)
-        padded_scores = np.array(left_padding + list(scores) + right_padding)
-
-        return padded_scores[:n_samples]
\ No newline at end of file
+        return pad_window_scores(scores, window_size)[:n_samples]
\ No newline at end of file
@@ -6,17 +6,35 @@ Original source: [https://github.com/yzhao062/pyod]
 from __future__ import division
 from __future__ import print_function
 
+from scipy import linalg
+from scipy.stats import chi2
 from sklearn.covariance import MinCovDet
+from sklearn.covariance import _robust_covariance as robust_covariance
+from sklearn.utils import gen_batches
 from sklearn.utils.validation import check_array
 from sklearn.utils.validation import check_is_fitted
-from .feature import Window
+from .feature import get_window_matrix, make_projection, WindowCache, _data_key
 from .base import BaseDetector
-from ..utils.utility import zscore
+from ..utils.utility import window_scores_to_points
 import numpy as np
-import math
 __all__ = ['MCD']
 
 
+class RawMCD:
+    """ Raw MCD estimate (location, covariance, support) of a subsample."""
+    def __init__(self, location, covariance, support):
+        self.location_ = location
+        self.covariance_ = covariance
+        self.support_ = support
+
+    @property
+    def nbytes(self):
+        return self.location_.nbytes + self.covariance_.nbytes + self.support_.nbytes
+
+# LRU cache of the raw estimates on subsamples, see ``feature.WindowCache``
+raw_mcd_cache = WindowCache(max_bytes=1 << 28)
+
+
 class MCD(BaseDetector):
     """Detecting outliers in a Gaussian distributed dataset using
     Minimum Covariance Determinant (MCD): robust estimator of covariance.
@@ -65,6 +83,29 @@ class MCD(BaseDetector):
         If None, the random number generator is the RandomState instance used
         by `np.random`.
 
+    scoring_stride : int, optional (default=1)
+        Only every ``scoring_stride``-th window is used (to fit and to score).
+        Point scores are interpolated between the scored windows, which makes
+        the detector roughly ``scoring_stride`` times faster.
+
+    reduction : str or WindowProjection, optional (default=None)
+        Dimensionality reduction of the windows before the detector sees them:
+        'random_projection', 'paa' or a ``feature.WindowProjection`` (see
+        there for the target dimension). It is fitted in ``fit`` and reused by
+        ``decision_function``.
+
+    subsample : int, optional (default=None)
+        If set and smaller than the number of windows, the raw MCD estimate
+        (the expensive C-steps) is computed on ``subsample`` windows, one
+        drawn at random in each of as many equal time strata, and corrected
+        and re-weighted with all the windows in chunked Mahalanobis passes,
+        in time linear in the number of windows. The raw estimate of a
+        subsample and support_fraction is cached, so refitting on the same
+        windows (e.g. over the other hyper-parameters of a grid) skips it.
+
+    chunk_size : int, optional (default=10000)
+        Number of windows per Mahalanobis pass with ``subsample``.
+
     Attributes
     ----------
     raw_location_ : array-like, shape (n_features,)
@@ -113,7 +154,8 @@ class MCD(BaseDetector):
 
     def __init__(self, slidingWindow=100, sub=True, contamination=0.1, store_precision=True,
                  assume_centered=False, support_fraction=None,
-                 random_state=2024, normalize=True):
+                 random_state=2024, normalize=True, scoring_stride=1, reduction=None, subsample=None,
+                 chunk_size=10000):
         super(MCD, self).__init__(contamination=contamination)
         self.store_precision = store_precision
         self.sub = sub
@@ -122,6 +164,10 @@ class MCD(BaseDetector):
         self.random_state = random_state
         self.slidingWindow = slidingWindow
         self.normalize = normalize
+        self.scoring_stride = scoring_stride
+        self.reduction = reduction
+        self.subsample = subsample
+        self.chunk_size = chunk_size
 
     # noinspection PyIncorrectDocstring
     def fit(self, X, y=None):
@@ -143,38 +189,23 @@ class MCD(BaseDetector):
         n_samples, n_features = X.shape
 
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        self.projection_ = make_projection(self.reduction)
+        X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                              projection=self.projection_)
 
         # Validate inputs X and y (optional)
         X = check_array(X)
         self._set_n_classes(y)
 
-        support_fraction = self.support_fraction
-        while True:
-            try:
-                self.detector_ = MinCovDet(store_precision=self.store_precision,
-                                        assume_centered=self.assume_centered,
-                                        support_fraction=support_fraction,
-                                        random_state=self.random_state)
-                self.detector_.fit(X=X, y=y)
-                break
-            except ValueError:
-                support_fraction = support_fraction + 0.1
-                if support_fraction >= 1:
-                    support_fraction = None
-                    
+        if self.subsample is not None and self.subsample < X.shape[0]:
+            self.detector_ = self._fit_subsampled(X)
+        else:
+            self.detector_ = self._fit_mcd(X)
 
         # Use mahalanabis distance as the outlier score
         self.decision_scores_ = self.detector_.dist_
         # padded decision_scores_
-        if self.decision_scores_.shape[0] < n_samples:
-            self.decision_scores_ = np.array([self.decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(self.decision_scores_) + [self.decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        self.decision_scores_ = window_scores_to_points(self.decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
 
         self._process_decision_scores()
         return self
@@ -199,26 +230,99 @@ class MCD(BaseDetector):
         """
         check_is_fitted(self, ['decision_scores_', 'threshold_', 'labels_'])
         n_samples, n_features = X.shape
-        if n_features == 1: 
-            # Converting time series data into matrix format
-            X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        # Converting time series data into matrix format
+        X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                              projection=self.projection_)
                 
         X = check_array(X)
 
         # Computer mahalanobis distance of the samples
         decision_scores_ = self.detector_.mahalanobis(X)
         # padded decision_scores_
-        if decision_scores_.shape[0] < n_samples:
-            decision_scores_ = np.array([decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(decision_scores_) + [decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        decision_scores_ = window_scores_to_points(decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
 
         return decision_scores_
 
+    def _fit_mcd(self, X):
+        """MinCovDet fitted on X, with support_fraction raised until it fits."""
+        support_fraction = self.support_fraction
+        while True:
+            try:
+                detector = MinCovDet(store_precision=self.store_precision,
+                                     assume_centered=self.assume_centered,
+                                     support_fraction=support_fraction,
+                                     random_state=self.random_state)
+                detector.fit(X=X)
+                return detector
+            except ValueError:
+                support_fraction = support_fraction + 0.1
+                if support_fraction >= 1:
+                    support_fraction = None
+
+    def _fit_subsampled(self, X):
+        """MinCovDet of X from the raw estimate of a stratified time subsample,
+        corrected with ``MinCovDet.correct_covariance`` and re-weighted on all
+        the rows of X as in ``MinCovDet.reweight_covariance``."""
+        n_windows, n_dims = X.shape
+        # one window drawn at random in each of `subsample` equal time strata
+        rng = np.random.RandomState(self.random_state)
+        bounds = np.linspace(0, n_windows, self.subsample + 1).astype(int)
+        indices = bounds[:-1] + (rng.random_sample(self.subsample) * np.diff(bounds)).astype(int)
+
+        key = (_data_key(X), self.subsample, self.support_fraction, self.assume_centered, self.random_state)
+        raw = raw_mcd_cache.get(key)
+        if raw is None:
+            mcd = self._fit_mcd(X[indices])
+            raw = RawMCD(mcd.raw_location_, mcd.raw_covariance_, indices[mcd.raw_support_])
+            raw_mcd_cache.put(key, raw)
+
+        detector = MinCovDet(store_precision=self.store_precision, assume_centered=self.assume_centered,
+                             support_fraction=self.support_fraction, random_state=self.random_state)
+        detector.raw_location_ = raw.location_
+        detector.raw_covariance_ = raw.covariance_
+        # the raw support of all the windows: as large a fraction as on the subsample, the closest ones
+        raw_dist = self._mahalanobis(X, raw.location_, linalg.pinvh(raw.covariance_))
+        n_raw_support = int(round(len(raw.support_) / self.subsample * n_windows))
+        detector.raw_support_ = np.zeros(n_windows, dtype=bool)
+        detector.raw_support_[np.argpartition(raw_dist, n_raw_support - 1)[:n_raw_support]] = True
+        detector.location_ = raw.location_
+        detector.support_ = detector.raw_support_
+        detector.dist_ = raw_dist
+
+        # consistency correction of the raw estimate, by scikit-learn
+        detector.correct_covariance(X)
+
+        # re-weighting: mean and covariance of the windows within the 97.5% quantile
+        support = detector.dist_ < chi2(n_dims).isf(0.025)
+        shift = np.zeros(n_dims) if self.assume_centered else raw.location_
+        n_support, s1, s2 = support.sum(), np.zeros(n_dims), np.zeros((n_dims, n_dims))
+        for rows in gen_batches(n_windows, self.chunk_size):
+            centered = X[rows][support[rows]] - shift
+            s1 += centered.sum(axis=0)
+            s2 += centered.T @ centered
+        if self.assume_centered:
+            location, covariance = np.zeros(n_dims), s2 / n_support
+        else:
+            mean = s1 / n_support
+            location, covariance = shift + mean, s2 / n_support - np.outer(mean, mean)
+        # recent scikit-learn versions make the re-weighted covariance consistent at the normal distribution
+        consistency_factor = getattr(robust_covariance, '_consistency_factor', None)
+        if consistency_factor is not None:
+            covariance = covariance * consistency_factor(n_features=n_dims, alpha=0.975)
+        detector.location_ = location
+        detector._set_covariance(covariance)
+        detector.support_ = support
+        detector.dist_ = self._mahalanobis(X, location, detector.get_precision())
+        return detector
+
+    def _mahalanobis(self, X, location, precision):
+        """Squared Mahalanobis distances of the rows of X, chunk_size rows at a time."""
+        dist = np.empty(X.shape[0])
+        for rows in gen_batches(X.shape[0], self.chunk_size):
+            centered = X[rows] - location
+            dist[rows] = np.einsum('ij,ij->i', centered @ precision, centered)
+        return dist
+
     @property
     def raw_location_(self):
         """The raw robust estimated location before correction and
@@ -12,11 +12,11 @@ import torch
 from torch.utils.data import DataLoader
 from tqdm import tqdm
 from torch import nn
-import math
 
 from .base import BaseDetector
 from ..utils.dataset import ReconstructDataset_Moment
 from ..utils.torch_utility import EarlyStoppingTorch, get_gpu
+from ..utils.utility import pad_window_scores
 
 class MOMENT(BaseDetector):
     def __init__(self, 
@@ -78,9 +78,7 @@ class MOMENT(BaseDetector):
 
         self.__anomaly_score = np.concatenate(self.score_list, axis=0).reshape(-1)
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = pad_window_scores(self.__anomaly_score, self.win_size, len(data))
         self.decision_scores_ = self.__anomaly_score
 
 
@@ -192,8 +190,6 @@ class MOMENT(BaseDetector):
 
         self.__anomaly_score = np.concatenate(self.score_list, axis=0).reshape(-1)
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = pad_window_scores(self.__anomaly_score, self.win_size, len(data))
 
         return self.__anomaly_score
\ No newline at end of file
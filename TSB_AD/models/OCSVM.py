@@ -8,16 +8,34 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
-import math
 from sklearn.svm import OneClassSVM
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.kernel_approximation import Nystroem, RBFSampler
 from sklearn.utils import check_array
 from sklearn.utils.validation import check_is_fitted
 from sklearn.preprocessing import MinMaxScaler
 
-from .feature import Window
+from .feature import get_window_matrix, make_projection, WindowCache, _data_key
 from .base import BaseDetector
 from ..utils.utility import invert_order
-from ..utils.utility import zscore
+from ..utils.utility import window_scores_to_points
+
+Kernel_Approximations = ['nystroem', 'rff']
+
+
+class KernelFeatures:
+    """ A fitted kernel feature map and the features of the data it was
+    fitted on, shared by the approximate OCSVMs that only differ in nu."""
+    def __init__(self, feature_map, features):
+        self.feature_map_ = feature_map
+        self.features_ = features
+
+    @property
+    def nbytes(self):
+        return self.features_.nbytes
+
+# LRU cache of kernel feature maps, see ``feature.WindowCache``
+feature_map_cache = WindowCache(max_bytes=1 << 29)
 
 class OCSVM(BaseDetector):
     """Wrapper of scikit-learn one-class SVM Class with more functionalities.
@@ -79,6 +97,37 @@ class OCSVM(BaseDetector):
         define the threshold on the decision function.
 
 
+    scoring_stride : int, optional (default=1)
+        Only every ``scoring_stride``-th window is used (to fit and to score).
+        Point scores are interpolated between the scored windows, which makes
+        the detector roughly ``scoring_stride`` times faster.
+
+    reduction : str or WindowProjection, optional (default=None)
+        Dimensionality reduction of the windows before the detector sees them:
+        'random_projection', 'paa' or a ``feature.WindowProjection`` (see
+        there for the target dimension). It is fitted in ``fit`` and reused by
+        ``decision_function``.
+
+    approximation : str, optional (default=None)
+        If set, the exact libsvm solver (between O(n^2) and O(n^3) in the
+        number of windows) is replaced by a linear one-class SVM trained by
+        SGD (sklearn SGDOneClassSVM) on approximate kernel features, in
+        linear time:
+
+        - 'nystroem': Nystroem features, for the 'rbf', 'poly' and
+          'sigmoid' kernels.
+        - 'rff': random Fourier features, for the 'rbf' kernel.
+
+        The 'linear' kernel needs no features. The fitted feature map and
+        the features of the training windows are cached, so fitting again on
+        the same windows with another nu only trains the linear model.
+
+    n_components : int, optional (default=100)
+        Number of approximate kernel features.
+
+    random_state : int, optional (default=0)
+        Seed of the kernel approximation and of SGD.
+
     Attributes
     ----------
     support_ : array-like, shape = [n_SV]
@@ -119,7 +168,8 @@ class OCSVM(BaseDetector):
 
     def __init__(self, slidingWindow=100, kernel='rbf', sub=True, degree=3, gamma='auto', coef0=0.0,
                  tol=1e-3, nu=0.5, shrinking=True, cache_size=200,
-                 verbose=False, max_iter=-1, contamination=0.1, normalize=True):
+                 verbose=False, max_iter=-1, contamination=0.1, normalize=True, scoring_stride=1, reduction=None,
+                 approximation=None, n_components=100, random_state=0):
         super(OCSVM, self).__init__(contamination=contamination)
         self.slidingWindow = slidingWindow
         self.sub = sub
@@ -134,6 +184,11 @@ class OCSVM(BaseDetector):
         self.verbose = verbose
         self.max_iter = max_iter
         self.normalize = normalize
+        self.scoring_stride = scoring_stride
+        self.reduction = reduction
+        self.approximation = approximation
+        self.n_components = n_components
+        self.random_state = random_state
 
     def fit(self, X, y=None, sample_weight=None, **params):
         """Fit detector. y is ignored in unsupervised methods.
@@ -158,12 +213,9 @@ class OCSVM(BaseDetector):
         n_samples, n_features = X.shape
 
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        self.projection_ = make_projection(self.reduction)
+        X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                              projection=self.projection_)
 
         # validate inputs X and y (optional)
         X = check_array(X)
@@ -171,6 +223,14 @@ class OCSVM(BaseDetector):
 
         self._set_n_classes(y)
 
+        if self.approximation is not None:
+            self.feature_map_, features = self._kernel_features(X)
+            self.detector_ = SGDOneClassSVM(nu=self.nu, tol=self.tol, random_state=self.random_state)
+            self.detector_.fit(features, sample_weight=sample_weight)
+            self.decision_scores_ = invert_order(self.detector_.decision_function(features))
+            self._process_decision_scores()
+            return self
+
         self.detector_ = OneClassSVM(kernel=self.kernel,
                                      degree=self.degree,
                                      gamma=self.gamma,
@@ -213,22 +273,52 @@ class OCSVM(BaseDetector):
         n_samples, n_features = X.shape
 
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                              projection=self.projection_)
                 
+        if self.approximation is not None and self.feature_map_ is not None:
+            X = self.feature_map_.transform(X)
+
         # invert outlier scores. Outliers comes with higher outlier scores
         decision_scores_ = invert_order(self.detector_.decision_function(X))
         # padded decision_scores_
-        if decision_scores_.shape[0] < n_samples:
-            decision_scores_ = np.array([decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(decision_scores_) + [decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        decision_scores_ = window_scores_to_points(decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
 
         return decision_scores_
 
+    def _kernel_features(self, X):
+        """Fitted kernel feature map (None for the linear kernel) and features
+        of the training windows X, from the cache when they were computed for
+        another nu."""
+        if self.approximation not in Kernel_Approximations:
+            raise ValueError("approximation should be one of {0}. Got {1}".format(Kernel_Approximations,
+                                                                                 self.approximation))
+        if self.kernel == 'linear':
+            return None, X
+        if self.approximation == 'rff' and self.kernel != 'rbf':
+            raise ValueError("random Fourier features only approximate the rbf kernel. Got %s" % self.kernel)
+
+        gamma = self.gamma
+        if gamma == 'auto':
+            gamma = 1. / X.shape[1]
+        elif gamma == 'scale':
+            gamma = 1. / (X.shape[1] * X.var())
+
+        params = (self.approximation, self.kernel, gamma, self.degree, self.coef0, self.n_components, self.random_state)
+        key = (_data_key(X), params)
+        cached = feature_map_cache.get(key)
+        if cached is not None:
+            return cached.feature_map_, cached.features_
+
+        if self.approximation == 'rff':
+            feature_map = RBFSampler(gamma=gamma, n_components=self.n_components, random_state=self.random_state)
+        else:
+            feature_map = Nystroem(kernel=self.kernel, gamma=gamma, degree=self.degree, coef0=self.coef0,
+                                   n_components=min(self.n_components, X.shape[0]), random_state=self.random_state)
+        features = feature_map.fit_transform(X)
+        feature_map_cache.put(key, KernelFeatures(feature_map, features))
+        return feature_map, features
+
     @property
     def support_(self):
         """Indices of support vectors.
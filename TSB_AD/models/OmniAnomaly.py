@@ -7,7 +7,6 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
-import math
 import torch
 import torch.nn.functional as F
 from sklearn.utils import check_array
@@ -20,6 +19,7 @@ import tqdm
 from .base import BaseDetector
 from ..utils.dataset import ReconstructDataset
 from ..utils.torch_utility import EarlyStoppingTorch, get_gpu
+from ..utils.utility import window_scores_to_points
 
 class OmniAnomalyModel(nn.Module):
     def __init__(self, feats, device):
@@ -76,9 +76,11 @@ class OmniAnomaly(BaseDetector):
                  epochs = 50,
                  patience = 3,
                  lr = 0.002,
-                 validation_size=0.2
+                 validation_size=0.2,
+                 scoring_stride=1
                  ):
         super().__init__()
+        self.scoring_stride = scoring_stride
 
         self.__anomaly_score = None
 
@@ -177,7 +179,7 @@ class OmniAnomaly(BaseDetector):
 
     def decision_function(self, data):
         test_loader = DataLoader(
-            dataset=ReconstructDataset(data, window_size=self.win_size),
+            dataset=ReconstructDataset(data, window_size=self.win_size, stride=self.scoring_stride),
             batch_size=self.batch_size,
             shuffle=False
         )
@@ -208,9 +210,7 @@ class OmniAnomaly(BaseDetector):
 
         self.__anomaly_score = scores
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = window_scores_to_points(self.__anomaly_score, self.win_size, self.scoring_stride, len(data))
         
         return self.__anomaly_score
 
@@ -7,17 +7,16 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
-import math
 from scipy.spatial.distance import cdist
 from sklearn.decomposition import PCA as sklearn_PCA
 from sklearn.utils.validation import check_array
 from sklearn.utils.validation import check_is_fitted
 
-from .feature import Window
+from .feature import get_window_matrix, WindowNormalizer, make_projection
 from .base import BaseDetector
 from ..utils.utility import check_parameter
 from ..utils.utility import standardizer    
-from ..utils.utility import zscore
+from ..utils.utility import window_scores_to_points
 
 class PCA(BaseDetector):
     """Principal component analysis (PCA) can be used in detecting outliers.
@@ -123,6 +122,22 @@ class PCA(BaseDetector):
         data to zero mean and unit variance.
         See http://scikit-learn.org/stable/auto_examples/preprocessing/plot_scaling_importance.html
 
+    chunk_size : int, optional (default=None)
+        If set, the window matrix is never built: PCA is fit on at most
+        ``chunk_size`` windows drawn at random, and windows are normalized and
+        projected ``chunk_size`` at a time. If None, the whole matrix is built.
+
+    scoring_stride : int, optional (default=1)
+        Only every ``scoring_stride``-th window is used (to fit and to score).
+        Point scores are interpolated between the scored windows, which makes
+        the detector roughly ``scoring_stride`` times faster.
+
+    reduction : str or WindowProjection, optional (default=None)
+        Dimensionality reduction of the windows before the detector sees them:
+        'random_projection', 'paa' or a ``feature.WindowProjection`` (see
+        there for the target dimension). It is fitted in ``fit`` and reused by
+        ``decision_function``.
+
     Attributes
     ----------
     components_ : array, shape (n_components, n_features)
@@ -188,7 +203,8 @@ class PCA(BaseDetector):
     def __init__(self, slidingWindow=100, sub = True, n_components=None, n_selected_components=None,
                  contamination=0.1, copy=True, whiten=False, svd_solver='auto',
                  tol=0.0, iterated_power='auto', random_state=0,
-                 weighted=True, standardization=True, zero_pruning=True, normalize=True):
+                 weighted=True, standardization=True, zero_pruning=True, normalize=True, scoring_stride=1,
+                 chunk_size=None, reduction=None):
 
         super(PCA, self).__init__(contamination=contamination)
         self.slidingWindow = slidingWindow
@@ -205,6 +221,9 @@ class PCA(BaseDetector):
         self.standardization = standardization
         self.zero_pruning = zero_pruning
         self.normalize = normalize
+        self.scoring_stride = scoring_stride
+        self.reduction = reduction
+        self.chunk_size = chunk_size
 
     # noinspection PyIncorrectDocstring
     def fit(self, X, y=None):
@@ -226,15 +245,20 @@ class PCA(BaseDetector):
         n_samples, n_features = X.shape
 
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
+        self.projection_ = make_projection(self.reduction)
+        if self.chunk_size is None:
+            X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                  projection=self.projection_)
+        else:
+            normalizer = WindowNormalizer(window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                          block_size=self.chunk_size, projection=self.projection_).fit(X)
+            X = normalizer.subsample(self.chunk_size, random_state=self.random_state)
                 
-        # validate inputs X and y (optional)
-        X = check_array(X)
+        # validate inputs X and y (optional); PCA is fitted and scored in float64
+        # whatever the float dtype policy: in float32 the smallest explained
+        # variances, which weight the scores, can round to 0
+        eps = np.finfo(X.dtype if X.dtype.kind == 'f' else np.float64).eps
+        X = check_array(X, dtype=np.float64)
         self._set_n_classes(y)
 
         # PCA is recommended to use on the standardized data (zero mean and
@@ -242,6 +266,7 @@ class PCA(BaseDetector):
         if self.standardization:
             X, self.scaler_ = standardizer(X, keep_scalar=True)
 
+        non_zero_columns = slice(None)
         if self.zero_pruning:
             non_zero_columns = np.any(X != 0, axis=0)
             X = X[:, non_zero_columns]
@@ -283,15 +308,23 @@ class PCA(BaseDetector):
                                     -1 * self.n_selected_components_:, :]
         self.selected_w_components_ = self.w_components_[
                                       -1 * self.n_selected_components_:]
-
-        self.decision_scores_ = np.sum(
-            cdist(X, self.selected_components_) / self.selected_w_components_,
-            axis=1).ravel()
+        # components without explained variance (rank deficient windows, up to
+        # the precision of the windows as in numpy.linalg.matrix_rank) would
+        # make the scores infinite or rounding noise, they are left out
+        singular_values = self.detector_.singular_values_[-1 * self.n_selected_components_:]
+        explained = singular_values > max(X.shape) * eps * self.detector_.singular_values_.max()
+        if explained.any():
+            self.selected_components_ = self.selected_components_[explained]
+            self.selected_w_components_ = self.selected_w_components_[explained]
+
+        if self.chunk_size is None:
+            self.decision_scores_ = self._project(X)
+        else:
+            self.decision_scores_ = np.concatenate([self._project(self._standardize(block)[:, non_zero_columns])
+                                                    for _, block in normalizer.iter_blocks()])
 
         # padded decision_scores_
-        if self.decision_scores_.shape[0] < n_samples:
-            self.decision_scores_ = np.array([self.decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(self.decision_scores_) + [self.decision_scores_[-1]]*((self.slidingWindow-1)//2))
+        self.decision_scores_ = window_scores_to_points(self.decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
 
         self._process_decision_scores()
         return self
@@ -319,25 +352,30 @@ class PCA(BaseDetector):
         n_samples, n_features = X.shape
                     
         # Converting time series data into matrix format
-        X = Window(window = self.slidingWindow).convert(X)
-        if self.normalize: 
-            if n_features == 1:
-                X = zscore(X, axis=0, ddof=0)
-            else: 
-                X = zscore(X, axis=1, ddof=1)
-
-        X = check_array(X)
+        if self.chunk_size is None:
+            X = get_window_matrix(X, window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                  projection=self.projection_)
+            decision_scores_ = self._project(self._standardize(check_array(X)))
+        else:
+            normalizer = WindowNormalizer(window=self.slidingWindow, stride=self.scoring_stride, normalize=self.normalize,
+                                          block_size=self.chunk_size, projection=self.projection_).fit(X)
+            decision_scores_ = np.concatenate([self._project(self._standardize(block))
+                                               for _, block in normalizer.iter_blocks()])
+        # padded decision_scores_
+        decision_scores_ = window_scores_to_points(decision_scores_, self.slidingWindow, self.scoring_stride, n_samples)
+        return decision_scores_
+
+    def _standardize(self, X):
+        X = np.asarray(X, dtype=np.float64)
         if self.standardization:
             X = self.scaler_.transform(X)
+        return X
 
-        decision_scores_ = np.sum(
+    def _project(self, X):
+        """Weighted distances of the windows to the selected eigenvectors."""
+        return np.sum(
             cdist(X, self.selected_components_) / self.selected_w_components_,
             axis=1).ravel()
-        # padded decision_scores_
-        if decision_scores_.shape[0] < n_samples:
-            decision_scores_ = np.array([decision_scores_[0]]*math.ceil((self.slidingWindow-1)/2) + 
-                        list(decision_scores_) + [decision_scores_[-1]]*((self.slidingWindow-1)//2))
-        return decision_scores_
 
     @property
     def explained_variance_(self):
@@ -14,12 +14,12 @@ from torch.utils.data import DataLoader
 import torch.nn.functional as F
 import torch.fft
 from torch.nn.utils import weight_norm
-import math
 import tqdm
 import os
 
 from ..utils.torch_utility import EarlyStoppingTorch, DataEmbedding, adjust_learning_rate, get_gpu
 from ..utils.dataset import ReconstructDataset    
+from ..utils.utility import window_scores_to_points
  
 class Inception_Block_V1(nn.Module):
     def __init__(self, in_channels, out_channels, num_kernels=6, init_weight=True):
@@ -184,8 +184,10 @@ class TimesNet():
                  patience=3,
                  features="M",
                  lradj="type1",
-                 validation_size=0.2):
+                 validation_size=0.2,
+                 scoring_stride=1):
         super().__init__()
+        self.scoring_stride = scoring_stride
 
         self.win_size = win_size
         self.enc_in = enc_in
@@ -284,7 +286,7 @@ class TimesNet():
                         
     def decision_function(self, data):
         test_loader = DataLoader(
-            dataset=ReconstructDataset(data, window_size=self.win_size),
+            dataset=ReconstructDataset(data, window_size=self.win_size, stride=self.scoring_stride),
             batch_size=self.batch_size,
             shuffle=False
         )
@@ -327,9 +329,7 @@ class TimesNet():
         self.__anomaly_score = scores
         self.y_hats = y_hats
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = window_scores_to_points(self.__anomaly_score, self.win_size, self.scoring_stride, len(data))
         
         return self.__anomaly_score
 
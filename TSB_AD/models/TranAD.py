@@ -22,6 +22,7 @@ import tqdm
 from .base import BaseDetector
 from ..utils.dataset import ReconstructDataset
 from ..utils.torch_utility import EarlyStoppingTorch, get_gpu
+from ..utils.utility import window_scores_to_points
 
 class PositionalEncoding(nn.Module):
     def __init__(self, d_model, dropout=0.1, max_len=5000):
@@ -133,9 +134,11 @@ class TranAD(BaseDetector):
                  epochs = 50,
                  patience = 3,
                  lr = 1e-4,
-                 validation_size=0.2
+                 validation_size=0.2,
+                 scoring_stride=1
                  ):
         super().__init__()
+        self.scoring_stride = scoring_stride
 
         self.__anomaly_score = None
 
@@ -244,7 +247,7 @@ class TranAD(BaseDetector):
 
     def decision_function(self, data):
         test_loader = DataLoader(
-            dataset=ReconstructDataset(data, window_size=self.win_size),
+            dataset=ReconstructDataset(data, window_size=self.win_size, stride=self.scoring_stride),
             batch_size=self.batch_size,
             shuffle=False
         )
@@ -269,9 +272,7 @@ class TranAD(BaseDetector):
 
         self.__anomaly_score = scores
 
-        if self.__anomaly_score.shape[0] < len(data):
-            self.__anomaly_score = np.array([self.__anomaly_score[0]]*math.ceil((self.win_size-1)/2) + 
-                        list(self.__anomaly_score) + [self.__anomaly_score[-1]]*((self.win_size-1)//2))
+        self.__anomaly_score = window_scores_to_points(self.__anomaly_score, self.win_size, self.scoring_stride, len(data))
         
         return self.__anomaly_score
 
@@ -449,6 +449,11 @@ class BaseDetector(metaclass=abc.ABCMeta):
 
         return self
 
+    def __sklearn_tags__(self):
+        """Estimator tags, read by scikit-learn >= 1.6 (e.g. in check_is_fitted)."""
+        from sklearn.utils import Tags, TargetTags
+        return Tags(estimator_type=None, target_tags=TargetTags(required=False))
+
     # noinspection PyMethodParameters
     def _get_param_names(cls):
         # noinspection PyPep8
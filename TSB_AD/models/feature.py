@@ -1,19 +1,16 @@
 import numpy as np
 import pandas as pd
+import hashlib
 import math
-from statsmodels.tsa.seasonal import seasonal_decompose
+import os
 import warnings
+from collections import OrderedDict
 from builtins import range
 from numpy.linalg import LinAlgError
 from numpy.lib.stride_tricks import sliding_window_view
 
-with warnings.catch_warnings():
-    # Ignore warnings of the patsy package
-    warnings.simplefilter("ignore", DeprecationWarning)
-
-    from statsmodels.tsa.ar_model import AR
-
-from hurst import compute_Hc
+# statsmodels and hurst are only needed by Stat and are imported there, so that
+# importing Window does not pull them in
 
 class Window:
     """ The class for rolling window feature mapping.
@@ -28,6 +25,454 @@ class Window:
         windows = sliding_window_view(X, window_shape=self.window, axis=0).reshape(shape)[::self.stride, :]        
         return windows
 
+class WindowCache:
+    """ LRU cache of window matrices, shared by the window-based detectors.
+    A tuning run fits many detectors (and many hyper-parameters of the same
+    detector) on the same series and window, so the normalized window matrix is
+    built once and reused. Cached matrices are read-only; the least recently used
+    ones are evicted once their total size goes over ``max_bytes``.
+    """
+    def __init__(self, max_bytes=1 << 30, enabled=True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.nbytes = 0
+        self._cache = OrderedDict()
+
+    def get(self, key):
+        if not self.enabled or key not in self._cache:
+            return None
+        self._cache.move_to_end(key)
+        return self._cache[key]
+
+    def put(self, key, value):
+        if not self.enabled or value.nbytes > self.max_bytes:
+            return
+        if key in self._cache:
+            self.nbytes -= self._cache.pop(key).nbytes
+        self._cache[key] = value
+        self.nbytes += value.nbytes
+        self._evict()
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._cache:
+            _, evicted = self._cache.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        self._cache.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+window_cache = WindowCache()
+
+def set_window_cache(max_bytes=None, enabled=None):
+    """Change the memory budget (in bytes) of the window cache or turn it off."""
+    if max_bytes is not None:
+        window_cache.max_bytes = max_bytes
+    if enabled is not None:
+        window_cache.enabled = enabled
+    if not window_cache.enabled:
+        window_cache.clear()
+    window_cache._evict()
+
+def _data_key(X):
+    X = np.ascontiguousarray(X)
+    return (hashlib.sha1(X.data).hexdigest(), X.shape, X.dtype.str)
+
+def normalization_mode(n_features, normalize=True):
+    """Normalization of the window matrix used by the window-based detectors:
+    per column for univariate series, per window for multivariate ones."""
+    if not normalize:
+        return None
+    return 'column' if n_features == 1 else 'window'
+
+class WindowProjection:
+    """ Dimensionality reduction of the window matrix, applied to each window
+    before the detector sees it.
+
+    Parameters
+    ----------
+    method : str, optional (default='random_projection')
+        - 'random_projection': sparse Johnson-Lindenstrauss projection with
+          density 1 / sqrt(n_dims) (Li et al., 2006)
+        - 'paa': piecewise aggregate approximation, i.e. mean of consecutive
+          segments of each channel of the window
+
+    n_components : int, optional (default=32)
+        Target dimension. With 'paa' each channel gets
+        ``n_components // n_channels`` segments (at least one).
+
+    eps : float, optional (default=None)
+        If set, the target dimension is instead the Johnson-Lindenstrauss
+        bound that keeps pairwise distances of the windows within a factor
+        (1 +- eps).
+
+    random_state : int, optional (default=0)
+
+    The projection only depends on the shape of the window matrix, so fitting
+    it again on the same shape gives the same projection, and the projected
+    matrix is shared through the window cache like the window matrix itself.
+    Nothing is reduced when the target dimension is not below the window
+    dimension.
+    """
+    def __init__(self, method='random_projection', n_components=32, eps=None, random_state=0):
+        if method not in ('random_projection', 'paa'):
+            raise ValueError("method should be 'random_projection' or 'paa'. Got {0}".format(method))
+        self.method = method
+        self.n_components = n_components
+        self.eps = eps
+        self.random_state = random_state
+
+    def fit(self, X, window=None):
+        """
+        Parameters
+        ----------
+        X : numpy array of shape (n_windows, window * n_channels)
+
+        window : int, optional (default=None)
+            Window length, needed by 'paa' on multivariate windows. Defaults to
+            the number of columns of X.
+        """
+        return self._fit_shape(X.shape[0], X.shape[1], window)
+
+    def _fit_shape(self, n_windows, n_dims, window=None):
+        from scipy import sparse
+        window = window or n_dims
+        n_channels = n_dims // window
+        if self.eps is not None:
+            n_components = int(4 * np.log(max(n_windows, 2)) / (self.eps ** 2 / 2 - self.eps ** 3 / 3))
+        else:
+            n_components = self.n_components
+        n_components = max(1, min(int(n_components), n_dims))
+
+        if self.method == 'paa':
+            segments = min(max(1, n_components // n_channels), window)
+            bounds = np.linspace(0, window, segments + 1).astype(int)
+            seg = np.searchsorted(bounds, np.arange(window), side='right') - 1
+            rows = np.arange(n_dims)
+            cols = (rows // window) * segments + seg[rows % window]
+            vals = 1. / np.diff(bounds)[seg[rows % window]]
+            self.n_components_ = n_channels * segments
+        else:
+            self.n_components_ = n_components
+            rng = np.random.RandomState(self.random_state)
+            density = 1 / np.sqrt(n_dims)
+            nnz = rng.binomial(n_dims * n_components, density)
+            flat = rng.choice(n_dims * n_components, nnz, replace=False)
+            rows, cols = np.divmod(flat, n_components)
+            vals = rng.choice([-1., 1.], nnz) / np.sqrt(density * n_components)
+        self.n_dims_ = n_dims
+        self.components_ = None
+        if self.n_components_ < n_dims:
+            self.components_ = sparse.csr_matrix((vals, (rows, cols)), shape=(n_dims, self.n_components_))
+        return self
+
+    @property
+    def key_(self):
+        """Identifies the fitted projection in the window cache."""
+        return (self.method, self.n_dims_, self.n_components_, self.random_state)
+
+    def transform(self, X):
+        if self.components_ is None:
+            return X
+        return np.asarray(X @ self.components_.astype(X.dtype, copy=False))
+
+def make_projection(reduction):
+    """Unfitted WindowProjection for the ``reduction`` parameter of the
+    window-based detectors: None, 'random_projection', 'paa' or a
+    WindowProjection (whose settings are copied)."""
+    if reduction is None:
+        return None
+    if isinstance(reduction, WindowProjection):
+        return WindowProjection(method=reduction.method, n_components=reduction.n_components,
+                                eps=reduction.eps, random_state=reduction.random_state)
+    return WindowProjection(method=reduction)
+
+def get_window_matrix(X, window=100, stride=1, normalize=True, dtype=None, use_cache=True, projection=None):
+    """Window matrix of X, z-normalized as in the window-based detectors.
+
+    Parameters
+    ----------
+    X : numpy array of shape (n_samples, n_features)
+
+    window : int, optional (default=100)
+
+    stride : int, optional (default=1)
+
+    normalize : bool, optional (default=True)
+        If True, windows are z-normalized per column (ddof=0) for univariate
+        series and per window (ddof=1) for multivariate ones.
+
+    dtype : numpy dtype, optional (default=None)
+        dtype of the matrix, e.g. np.float32 to halve its memory. Defaults to
+        the float dtype policy (see ``utils.utility.float_dtype``).
+
+    use_cache : bool, optional (default=True)
+        Look the matrix up in (and add it to) the shared window cache.
+
+    projection : WindowProjection, optional (default=None)
+        Reduction applied to the windows. It is fitted on the matrix if it is
+        not fitted yet.
+
+    Returns
+    -------
+    windows : numpy array of shape (n_windows, window * n_features), or
+        (n_windows, projection.n_components_)
+        Read-only when it comes from the cache.
+    """
+    from ..utils.utility import zscore, get_float_dtype
+
+    X = np.asarray(X).astype(dtype or get_float_dtype(), copy=False)
+    mode = normalization_mode(X.shape[1], normalize)
+    key = None
+    if use_cache and window_cache.enabled:
+        key = (_data_key(X), window, stride, mode)
+        windows = window_cache.get(key)
+    else:
+        windows = None
+
+    if windows is None:
+        windows = Window(window=window, stride=stride).convert(X)
+        if mode == 'column':
+            windows = zscore(windows, axis=0, ddof=0)
+        elif mode == 'window':
+            windows = zscore(windows, axis=1, ddof=1)
+
+        if key is not None:
+            windows.setflags(write=False)
+            window_cache.put(key, windows)
+
+    if projection is None:
+        return windows
+    if not hasattr(projection, 'n_components_'):
+        projection.fit(windows, window=window)
+    if key is not None:
+        key = key + projection.key_
+        projected = window_cache.get(key)
+        if projected is not None:
+            return projected
+    projected = projection.transform(windows)
+    if key is not None and projected is not windows:
+        projected.setflags(write=False)
+        window_cache.put(key, projected)
+    return projected
+
+class WindowNormalizer:
+    """ Normalized sliding windows produced lazily, in blocks of rows.
+    Gives the same matrix as ``get_window_matrix`` without building it: the
+    per-column (univariate) or per-window (multivariate) mean and std are
+    computed from rolling cumulative sums in O(n), and each block of windows
+    is normalized only when it is requested.
+
+    Parameters
+    ----------
+    window : int, optional (default=100)
+
+    stride : int, optional (default=1)
+
+    normalize : bool, optional (default=True)
+
+    block_size : int, optional (default=10000)
+        Number of windows per block.
+
+    dtype : numpy dtype, optional (default=None)
+        dtype of the produced blocks. Defaults to the float dtype policy (see
+        ``utils.utility.float_dtype``).
+
+    projection : WindowProjection, optional (default=None)
+        Reduction applied to every block. It is fitted in ``fit`` if it is not
+        fitted yet.
+    """
+    def __init__(self, window=100, stride=1, normalize=True, block_size=10000, dtype=None, projection=None):
+        self.window = window
+        self.stride = stride
+        self.normalize = normalize
+        self.block_size = block_size
+        self.dtype = dtype
+        self.projection = projection
+
+    def fit(self, X):
+        from ..utils.utility import get_float_dtype
+
+        self.dtype_ = np.dtype(self.dtype or get_float_dtype())
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        self.X_ = X.astype(self.dtype_, copy=False)
+        n_samples, n_features = X.shape
+        self.n_features_ = n_features
+        self.n_windows_ = (n_samples - self.window) // self.stride + 1
+        if self.n_windows_ < 1:
+            raise ValueError('series of length {0} is shorter than the window {1}'.format(n_samples, self.window))
+        self.mode_ = normalization_mode(n_features, self.normalize)
+        if self.projection is not None and not hasattr(self.projection, 'n_components_'):
+            self.projection._fit_shape(self.n_windows_, self.window * n_features, self.window)
+
+        # center on the global mean so that the cumulative sums do not cancel out
+        shift = X.mean()
+        if self.mode_ == 'column':
+            # column j holds x[j], x[j + stride], ..., one cumulative sum per offset modulo stride
+            x = X[:, 0].astype(np.float64) - shift
+            means, stds = np.empty(self.window), np.empty(self.window)
+            for r in range(min(self.stride, self.window)):
+                xr = x[r::self.stride]
+                c1 = np.r_[0., np.cumsum(xr)]
+                c2 = np.r_[0., np.cumsum(xr * xr)]
+                j = np.arange(r, self.window, self.stride)
+                q = j // self.stride
+                s1 = c1[q + self.n_windows_] - c1[q]
+                s2 = c2[q + self.n_windows_] - c2[q]
+                var = np.maximum(s2 / self.n_windows_ - (s1 / self.n_windows_) ** 2, 0)
+                var[var <= 1e-12 * s2 / self.n_windows_] = 0
+                means[j], stds[j] = s1 / self.n_windows_, np.sqrt(var)
+            self.mean_, self.std_ = means + shift, stds
+        elif self.mode_ == 'window':
+            x = X.astype(np.float64) - shift
+            size = self.window * n_features
+            c1 = np.r_[0., np.cumsum(x.sum(axis=1))]
+            c2 = np.r_[0., np.cumsum((x * x).sum(axis=1))]
+            starts = np.arange(self.n_windows_) * self.stride
+            s1 = c1[starts + self.window] - c1[starts]
+            s2 = c2[starts + self.window] - c2[starts]
+            var = np.maximum(s2 - s1 * s1 / size, 0) / (size - 1)
+            # rounding leaves a tiny variance on constant windows
+            var[var <= 1e-12 * s2 / size] = 0
+            self.mean_, self.std_ = s1 / size + shift, np.sqrt(var)
+        return self
+
+    def _normalize(self, windows, rows):
+        if self.mode_ is None:
+            return windows
+        # constant columns/windows are mapped to 0, as zscore does through nan_to_num
+        if self.mode_ == 'column':
+            mean, std = self.mean_, self.std_
+        else:
+            mean, std = self.mean_[rows, None], self.std_[rows, None]
+        mean, std = mean.astype(windows.dtype, copy=False), std.astype(windows.dtype, copy=False)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            res = np.where(std > 0, (windows - mean) / std, 0.)
+        return res
+
+    def _windows(self, start, stop):
+        X = self.X_[start * self.stride:(stop - 1) * self.stride + self.window]
+        return Window(window=self.window, stride=self.stride).convert(X)
+
+    def block(self, start, stop):
+        """Normalized windows ``start`` to ``stop`` (excluded)."""
+        stop = min(stop, self.n_windows_)
+        res = self._project(self._normalize(self._windows(start, stop), slice(start, stop)))
+        return res.astype(self.dtype_, copy=False)
+
+    def _project(self, windows):
+        return windows if self.projection is None else self.projection.transform(windows)
+
+    def iter_blocks(self, block_size=None):
+        """Yield (start, block) pairs covering all the windows in order."""
+        block_size = block_size or self.block_size
+        for start in range(0, self.n_windows_, block_size):
+            yield start, self.block(start, start + block_size)
+
+    def rows(self, indices):
+        """Normalized windows at the given (sorted) indices, e.g. a training subsample."""
+        indices = np.asarray(indices)
+        starts = indices * self.stride
+        # (n_rows, window, n_features) -> channel-major rows, as in Window.convert
+        windows = self.X_[starts[:, None] + np.arange(self.window)].transpose(0, 2, 1).reshape(len(indices), -1)
+        res = self._project(self._normalize(windows, indices))
+        return res.astype(self.dtype_, copy=False)
+
+    def subsample(self, size, random_state=None):
+        """At most ``size`` normalized windows drawn uniformly without replacement,
+        in time order. All the windows are returned when there are fewer."""
+        if size >= self.n_windows_:
+            return self.transform()
+        rng = np.random.RandomState(random_state)
+        return self.rows(np.sort(rng.choice(self.n_windows_, size, replace=False)))
+
+    def transform(self):
+        """The whole normalized window matrix."""
+        out = None
+        for start, block in self.iter_blocks():
+            if out is None:
+                out = np.empty((self.n_windows_, block.shape[1]), dtype=block.dtype)
+            out[start:start + block.shape[0]] = block
+        return out
+
+    def __len__(self):
+        return self.n_windows_
+
+class WindowStream:
+    """ Normalized sliding windows of a series that arrives in batches: every
+    new point closes the window of the ``window`` last points. Only the last
+    ``window - 1`` points are kept, so a batch costs the same whatever the
+    length of the stream so far.
+
+    The columns of a stream are never complete, so univariate windows are
+    normalized with the per-column mean and std of the reference series given
+    to ``fit``; multivariate windows are normalized per window, as in
+    ``get_window_matrix``.
+
+    Parameters
+    ----------
+    window : int, optional (default=100)
+
+    normalize : bool, optional (default=True)
+
+    dtype : numpy dtype, optional (default=None)
+        dtype of the windows. Defaults to the float dtype policy (see
+        ``utils.utility.float_dtype``).
+
+    projection : WindowProjection, optional (default=None)
+        Fitted reduction applied to the windows.
+    """
+    def __init__(self, window=100, normalize=True, dtype=None, projection=None):
+        self.window = window
+        self.normalize = normalize
+        self.dtype = dtype
+        self.projection = projection
+
+    def fit(self, X, stride=1):
+        """Take the normalization of the windows of the reference series X
+        (every ``stride``-th one) and start the stream after X."""
+        normalizer = WindowNormalizer(window=self.window, stride=stride, normalize=self.normalize,
+                                      dtype=self.dtype).fit(X)
+        self.dtype_ = normalizer.dtype_
+        self.mode_ = normalizer.mode_
+        if self.mode_ == 'column':
+            self.mean_, self.std_ = normalizer.mean_, normalizer.std_
+        return self.reset(X)
+
+    def reset(self, X):
+        """Continue the stream after the series X, of at least ``window - 1`` points."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        if X.shape[0] < self.window - 1:
+            raise ValueError('the stream needs {0} points of history, got {1}'.format(self.window - 1, X.shape[0]))
+        self.tail_ = X[X.shape[0] - (self.window - 1):].astype(self.dtype_)
+        return self
+
+    def transform(self, X):
+        """Normalized windows ending at each point of the batch X, in order."""
+        from ..utils.utility import zscore
+
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        series = np.concatenate([self.tail_, X.astype(self.dtype_, copy=False)])
+        self.tail_ = series[series.shape[0] - (self.window - 1):]
+        windows = Window(window=self.window).convert(series)
+        if self.mode_ == 'column':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                windows = np.where(self.std_ > 0, (windows - self.mean_) / self.std_, 0.)
+        elif self.mode_ == 'window':
+            windows = zscore(windows, axis=1, ddof=1)
+        if self.projection is not None:
+            windows = self.projection.transform(windows)
+        return windows.astype(self.dtype_, copy=False)
+
 class tf_Stat:
     '''statisitc feature extraction using the tf_feature package. 
     It calculates 763 features in total so it might be over complicated for some models. 
@@ -36,41 +481,106 @@ class tf_Stat:
     LOF, CBLOF, etc, first train to pass a function that give weights to individual features so that
     inconsequential features won't cloud the important ones (mean, variance, kurtosis, etc).
 
+    The windows (one every ``step`` points) are sent to tsfresh ``batch_size`` at
+    a time as a single long-format frame with one id per window, and tsfresh
+    parallelizes over them with ``n_jobs`` processes.
+
+    Parameters
+    ----------
+    window : int, optional (default=100)
+
+    step : int, optional (default=25)
+
+    fc_parameters : str or dict, optional (default='comprehensive')
+        Features to extract: 'comprehensive' (all 763 features), 'efficient'
+        (without the most expensive ones), 'minimal', or a tsfresh
+        ``default_fc_parameters`` dict.
+
+    n_jobs : int, optional (default=1)
+        Number of processes used by tsfresh.
+
+    batch_size : int, optional (default=1000)
+        Number of windows per call to tsfresh.
+
+    cache_dir : str, optional (default=None)
+        If set, the feature matrix is saved there, keyed by the data, window,
+        step and feature set, and loaded instead of being extracted again.
     '''
-    def __init__(self,  window = 100, step = 25):
+    def __init__(self,  window = 100, step = 25, fc_parameters = 'comprehensive', n_jobs = 1, batch_size = 1000,
+                 cache_dir = None):
         self.window = window
         self.step = step
+        self.fc_parameters = fc_parameters
+        self.n_jobs = n_jobs
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
         self.detector = None
+
+    def _fc_parameters(self):
+        from tsfresh.feature_extraction import ComprehensiveFCParameters, EfficientFCParameters, MinimalFCParameters
+        settings = {'comprehensive': ComprehensiveFCParameters, 'efficient': EfficientFCParameters,
+                    'minimal': MinimalFCParameters}
+        if isinstance(self.fc_parameters, str):
+            if self.fc_parameters not in settings:
+                raise ValueError('fc_parameters should be one of {0} or a dict. Got {1}'.format(
+                    list(settings), self.fc_parameters))
+            return settings[self.fc_parameters]()
+        return self.fc_parameters
+
+    def _cache_path(self, X):
+        key = hashlib.sha1(repr((_data_key(X), self.window, self.step, self.fc_parameters)).encode()).hexdigest()
+        return os.path.join(self.cache_dir, 'tf_Stat_{}.npy'.format(key))
+
     def convert(self, X):
         window = self.window
         step = self.step
         pos = math.ceil(window/2)
         #step <= window
 
+        X = np.asarray(X, dtype=float).ravel()
+        if self.cache_dir is not None:
+            path = self._cache_path(X)
+            if os.path.exists(path):
+                return np.load(path)
+
         length = X.shape[0]
+        num = length - window
+        if num <= 0:
+            raise ValueError('the series should be longer than the window')
+
+        # window j covers X[starts[j]:stops[j]] and gives the features of rows starts[j]:rows[j]
+        starts = np.arange(0, max(num - window, -1) + 1, step)
+        stops = starts + window
+        rows = np.minimum(starts + step, num)
+        if (starts[-1] + step if len(starts) else 0) < num:
+            tail = starts[-1] + step if len(starts) else 0
+            starts, stops, rows = np.r_[starts, tail], np.r_[stops, length], np.r_[rows, num]
+
+        vectors = []
+        for first in range(0, len(starts), self.batch_size):
+            vectors.append(self._extract(X, starts[first:first + self.batch_size], stops[first:first + self.batch_size]))
+        vectors = np.concatenate(vectors)
+
+        M = np.zeros((num, vectors.shape[1] + 1))
+        M[:, 0] = X[pos:pos + num]
+        M[:, 1:] = np.repeat(vectors, rows - starts, axis=0)
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            np.save(path, M)
+        return M
 
-        Xd = pd.DataFrame(X)
-        Xd.columns = pd.Index(['x'], dtype='object')
-        Xd['id'] = 1
-        Xd['time'] = Xd.index
-        
+    def _extract(self, X, starts, stops):
+        """tsfresh features of the windows X[starts[j]:stops[j]], one row per window."""
         from tsfresh import extract_features
-        test = np.array(extract_features(Xd.iloc[0+pos-math.ceil(window/2):0+pos + math.floor(window/2)], column_id="id", column_sort="time", column_kind=None, column_value=None).fillna(0))
-        M = np.zeros((length - window, test.shape[1]+1 ))
-
-        
-        i = 0
-        while i + window <= M.shape[0]:
-            M[i:i+step, 0]= X[pos + i: pos + i + step]
-            vector = np.array(extract_features(Xd.iloc[i+pos-math.ceil(window/2):i+pos + math.floor(window/2)], column_id="id", column_sort="time", column_kind=None, column_value=None).fillna(0))
-
-            M[i:i+step, 1:] = vector
-            i+= step
-        num = M.shape[0]
-        if i <  num:
-            M[i: num, 0]= X[pos + i: pos + num]
-            M[i: num, 1:] = np.array(extract_features(Xd.iloc[i+pos-math.ceil(window/2):], column_id="id", column_sort="time", column_kind=None, column_value=None).fillna(0))
-        return M
+        lengths = stops - starts
+        index = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)])
+        Xd = pd.DataFrame({'id': np.repeat(np.arange(len(starts)), lengths),
+                           'time': index, 'x': X[index]})
+        features = extract_features(Xd, column_id="id", column_sort="time", column_kind=None, column_value=None,
+                                    default_fc_parameters=self._fc_parameters(), n_jobs=self.n_jobs,
+                                    disable_progressbar=True)
+        return np.array(features.sort_index().fillna(0))
 
 class Stat:
     '''statisitc feature extraction. 
@@ -90,6 +600,7 @@ class Stat:
         
         
     def convert(self, X):
+        from statsmodels.tsa.seasonal import seasonal_decompose
         freq = self.freq
         n = self.window
         data_step = self.data_step
@@ -152,8 +663,8 @@ class Stat:
         return M
     def ar_coefficient(self, x):
         """
-        This feature calculator fits the unconditional maximum likelihood
-        of an autoregressive AR(k) process.
+        This feature calculator fits an autoregressive AR(k) process with the
+        Yule-Walker equations (statsmodels' AR, used before, has been removed).
         The k parameter is the maximum lag of the process
 
         .. math::
@@ -172,7 +683,8 @@ class Stat:
         """
         calculated_ar_params = {}
         param = self.param
-        x_as_list = list(x)
+        x = np.asarray(x, dtype=float)
+        acov = np.correlate(x - x.mean(), x - x.mean(), mode='full')[len(x) - 1:] / len(x)
 
         res = {}
 
@@ -183,10 +695,10 @@ class Stat:
             column_name = "coeff_{}__k_{}".format(p, k)
 
             if k not in calculated_ar_params:
-                try:
-                    calculated_AR = AR(x_as_list)
-                    calculated_ar_params[k] = calculated_AR.fit(maxlag=k, solver="mle").params
-                except (LinAlgError, ValueError):
+                if k < len(x):
+                    phi, _ = _yule_walker(acov[None, :k + 1], k)
+                    calculated_ar_params[k] = np.r_[x.mean() * (1 - phi.sum()), phi[0]]
+                else:
                     calculated_ar_params[k] = [np.NaN] * k
 
             mod = calculated_ar_params[k]
@@ -322,5 +834,189 @@ class Stat:
         # Return SampEn
         return -np.log(A / B)
     def hurst_f(self, x):
+        from hurst import compute_Hc
         H,c, M = compute_Hc(x)
-        return [H, c]
\ No newline at end of file
+        return [H, c]
+
+def _yule_walker(acov, order):
+    """Yule-Walker estimate of AR(order) coefficients from biased
+    autocovariances ``acov`` of shape (n_series, >= order + 1).
+    Returns (phi, sigma2) with phi of shape (n_series, order)."""
+    idx = np.abs(np.arange(order)[:, None] - np.arange(order)[None, :])
+    R = acov[:, idx]
+    r = acov[:, 1:order + 1, None]
+    # constant series give a singular Toeplitz matrix and phi = 0
+    R = np.where((acov[:, 0] > 0)[:, None, None], R, np.eye(order))
+    try:
+        phi = np.linalg.solve(R, r)[..., 0]
+    except LinAlgError:
+        phi = (np.linalg.pinv(R) @ r)[..., 0]
+    sigma2 = acov[:, 0] - np.sum(phi * acov[:, 1:order + 1], axis=1)
+    return phi, sigma2
+
+
+class RollingStat(Stat):
+    '''Vectorized version of the per-window features of Stat, computed for all
+    windows ``X[s:s+window]`` (``s`` every ``stride`` points) block by block.
+
+    Features, in this order (see ``feature_names_``):
+    mean, variance, skewness, kurtosis, maximum, minimum, autocorrelation at
+    each lag of ``lags``, AR coefficients for each entry of ``param``, sample
+    entropy and Hurst exponent and constant (simplified R/S, as
+    ``hurst.compute_Hc``).
+
+    Autocovariances come from a batched FFT of each block of windows, the AR
+    coefficients from the Yule-Walker equations on those autocovariances, and
+    sample entropy from the Chebyshev distances between the ``_into_subchunks``
+    templates of each window. The seasonal decomposition of Stat is global, not
+    per window, and is left out.
+
+    Parameters
+    ----------
+    window : int, optional (default=100)
+
+    stride : int, optional (default=1)
+
+    param : list of dict, optional (default=[{"coeff": 0, "k": 5}])
+        AR coefficients to return, as in Stat: coefficient "coeff" (0 being the
+        intercept) of the AR("k") model.
+
+    lags : list of int, optional (default=[1])
+
+    entropy : bool, optional (default=True)
+
+    hurst : bool, optional (default=True)
+        Needs window >= 100, as compute_Hc.
+
+    block_size : int, optional (default=None)
+        Number of windows per block. Defaults to about 2**22 / window**2 when
+        sample entropy is computed (its pairwise distances are O(window**2)
+        per window) and 10000 otherwise.
+    '''
+    def __init__(self, window=100, stride=1, param=[{"coeff": 0, "k": 5}], lags=[1], entropy=True, hurst=True,
+                 block_size=None):
+        self.window = window
+        self.stride = stride
+        self.param = param
+        self.lags = lags
+        self.lag = lags[0] if len(lags) else 1
+        self.entropy = entropy
+        self.hurst = hurst and window >= 100
+        self.block_size = block_size
+        if window < 3:
+            raise ValueError('window should be at least 3')
+
+    @property
+    def feature_names_(self):
+        names = ['mean', 'variance', 'skewness', 'kurtosis', 'maximum', 'minimum']
+        names += ['autocorrelation__lag_{}'.format(lag) for lag in self.lags]
+        names += ['ar_coefficient__coeff_{}__k_{}'.format(p["coeff"], p["k"]) for p in self.param]
+        if self.entropy:
+            names.append('sample_entropy')
+        if self.hurst:
+            names += ['hurst_H', 'hurst_c']
+        return names
+
+    def convert(self, X):
+        """
+        :param X: the time series
+        :type X: numpy.ndarray of shape (n_samples,) or (n_samples, 1)
+        :return: features of every window, non finite values set to 0
+        :return type: numpy.ndarray of shape (n_windows, n_features), float32
+        """
+        x = np.asarray(X, dtype=float).ravel()
+        window, stride = self.window, self.stride
+        n_windows = max((len(x) - window) // stride + 1, 0)
+        block_size = self.block_size or (max(1, (1 << 22) // window ** 2) if self.entropy else 10000)
+
+        M = np.zeros((n_windows, len(self.feature_names_)), dtype=np.float32)
+        for start in range(0, n_windows, block_size):
+            stop = min(start + block_size, n_windows)
+            chunk = x[start * stride:(stop - 1) * stride + window]
+            M[start:stop] = self._features(self._into_subchunks(chunk, window, stride))
+        return M
+
+    def _features(self, W):
+        from scipy.stats import skew, kurtosis
+        window = W.shape[1]
+        mean = W.mean(axis=1)
+        D = W - mean[:, None]
+        acov = self._autocovariance(D)
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            # constant windows: their moments are replaced below
+            warnings.simplefilter("ignore", RuntimeWarning)
+            constant = acov[:, 0] <= 1e-12 * np.maximum(np.mean(W * W, axis=1), 1e-300)
+            F = [mean, acov[:, 0] / (window - 1),
+                 np.where(constant, 0, skew(W, axis=1, bias=False)),
+                 np.where(constant, 0, kurtosis(W, axis=1, bias=False)),
+                 W.max(axis=1), W.min(axis=1)]
+            var0 = acov[:, 0] / window
+            for lag in self.lags:
+                F.append(np.where(constant, np.nan, acov[:, lag] / ((window - lag) * var0)) if lag < window
+                         else np.full(len(W), np.nan))
+
+            biased = np.where(constant[:, None], 0, acov / window)
+            ar_params = {}
+            for p in self.param:
+                k, coeff = p["k"], p["coeff"]
+                if k not in ar_params:
+                    phi, _ = _yule_walker(biased, k)
+                    ar_params[k] = np.column_stack([mean * (1 - phi.sum(axis=1)), phi])
+                F.append(ar_params[k][:, coeff] if coeff <= k else np.full(len(W), np.nan))
+
+            if self.entropy:
+                F.append(self._sample_entropy(W, 0.2 * np.sqrt(var0)))
+            if self.hurst:
+                F += list(self._hurst(W))
+        return np.nan_to_num(np.column_stack(F), nan=0, posinf=0, neginf=0)
+
+    def _autocovariance(self, D):
+        """Sums of lagged products of the centred windows D, for lags 0..max
+        needed, with one zero-padded FFT per block."""
+        window = D.shape[1]
+        max_lag = min(max([0] + list(self.lags) + [p["k"] for p in self.param]), window - 1)
+        n_fft = 1 << int(np.ceil(np.log2(2 * window - 1)))
+        f = np.fft.rfft(D, n=n_fft, axis=1)
+        acov = np.fft.irfft(f * np.conj(f), n=n_fft, axis=1)[:, :max_lag + 1]
+        return np.pad(acov, ((0, 0), (0, max(0, max_lag + 1 - acov.shape[1]))))
+
+    def _sample_entropy(self, W, tolerance):
+        """SampEn with m = 2 of every row of W, as Stat.sample_entropy.
+        Chebyshev distances between templates of length m + 1 are the maximum
+        of the distances of length m and of the next pair of points."""
+        m = 2
+        window = W.shape[1]
+        dist = np.abs(W[:, :, None] - W[:, None, :])
+        tol = tolerance[:, None, None]
+
+        dm = dist[:, :window - m + 1, :window - m + 1]
+        for j in range(1, m):
+            dm = np.maximum(dm, dist[:, j:window - m + 1 + j, j:window - m + 1 + j])
+        B = np.sum(dm <= tol, axis=(1, 2)) - dm.shape[1]
+
+        dm1 = np.maximum(dm[:, :-1, :-1], dist[:, m:, m:])
+        A = np.sum(dm1 <= tol, axis=(1, 2)) - dm1.shape[1]
+        return -np.log(A / B)
+
+    def _hurst(self, W):
+        """H and c of ``hurst.compute_Hc(x)`` (random walk, simplified R/S) of
+        every row of W."""
+        n_windows, window = W.shape
+        sizes = [int(10 ** e) for e in np.arange(1, math.log10(window - 1), 0.25)] + [window]
+        log_rs = []
+        for size in sizes:
+            n_chunks = window // size
+            chunks = W[:, :n_chunks * size].reshape(n_windows, n_chunks, size)
+            R = chunks.max(axis=2) - chunks.min(axis=2)
+            S = np.std(np.diff(chunks, axis=2), axis=2, ddof=1)
+            rs = np.where((R == 0) | (S == 0), np.nan, R / np.where(S == 0, 1, S))
+            with warnings.catch_warnings():
+                # windows without any usable chunk get a NaN exponent
+                warnings.simplefilter("ignore", RuntimeWarning)
+                log_rs.append(np.log10(np.nanmean(rs, axis=1)))
+        log_rs = np.column_stack(log_rs)
+        log_sizes = np.log10(sizes)
+        centred = log_sizes - log_sizes.mean()
+        H = (log_rs - log_rs.mean(axis=1, keepdims=True)) @ centred / np.sum(centred ** 2)
+        c = 10 ** (log_rs.mean(axis=1) - H * log_sizes.mean())
+        return H, c
@@ -0,0 +1,543 @@
+"""Nearest-neighbor graphs shared by the neighbor-based detectors (KNN, LOF, COF).
+
+A grid of ``n_neighbors`` values on the same window matrix needs a single
+neighbor search: the graph of the ``k_max`` nearest neighbors of every row is
+computed once per (matrix, metric) and any ``k <= k_max`` is read from it by
+slicing, since the k nearest neighbors are the first k of the k_max nearest.
+
+The search is exact (scikit-learn NearestNeighbors) or approximate
+(``RPForest``, a forest of random projection trees in NumPy), which is much
+faster on 100-300 dimensional windows where the exact trees degrade to brute
+force. Both answer ``kneighbors`` (NearestNeighbors API) and the forest also
+answers ``query`` (BallTree API).
+
+Window matrices larger than the sharding threshold (see ``set_sharding``)
+are kept out of core: they are written to a memmap (``get_search_matrix``)
+and searched exactly by ``ShardedNeighbors``, one BallTree per time shard,
+so that only the neighbor graph resides in memory.
+"""
+
+import copy
+import os
+import shutil
+import tempfile
+import weakref
+import joblib
+import numpy as np
+import sklearn
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.neighbors import BallTree, NearestNeighbors
+from sklearn.utils import gen_batches
+
+from .feature import WindowCache, WindowNormalizer, get_window_matrix, _data_key
+
+
+Neighbor_Search = ['exact', 'approximate']
+
+# metrics the approximate search supports, all Euclidean
+Euclidean_Metrics = ['euclidean', 'l2', 'minkowski']
+
+
+class RPForest:
+    """ Approximate nearest neighbor search with a forest of random projection
+    trees (Euclidean distance).
+
+    Every tree splits the data recursively at the median of its projection on
+    the direction between two random points of the node, down to leaves of at
+    most ``leaf_size`` points. The candidate neighbors of a query are the
+    points of the leaves it falls in, one per tree: the distances of the
+    queries of a leaf to its points are one matrix product, and the nearest
+    candidates over the trees are returned with their exact distances.
+
+    It pays off for KNN and LOF; for COF the chaining costs dominate, so it
+    is not recommended there (see ``COF``'s neighbor_search).
+
+    Parameters
+    ----------
+    n_trees : int, optional (default=10)
+        Number of trees, the recall/speed knob: more trees find more of the
+        true neighbors, at a cost linear in n_trees.
+
+    leaf_size : int, optional (default=50)
+        Largest number of points of a leaf. Leaves hold at least
+        leaf_size // 2 points, which should exceed the number of neighbors;
+        it is raised to 2 * (n_neighbors + 1) if needed.
+
+    n_neighbors : int, optional (default=5)
+        Number of neighbors returned by default.
+
+    random_state : int, optional (default=0)
+
+    Attributes
+    ----------
+    key_ : tuple
+        The parameters that change the neighbors found.
+    """
+    def __init__(self, n_trees=10, leaf_size=50, n_neighbors=5, random_state=0):
+        self.n_trees = n_trees
+        self.leaf_size = leaf_size
+        self.n_neighbors = n_neighbors
+        self.random_state = random_state
+
+    @property
+    def key_(self):
+        return ('rp_forest', self.n_trees, self.leaf_size, self.random_state)
+
+    def fit(self, X):
+        X = np.asarray(X)
+        self._fit_X = X
+        self._fit_sq = np.einsum('ij,ij->i', X, X)
+        self.leaf_size_ = max(self.leaf_size, 2 * (self.n_neighbors + 1))
+        rng = np.random.RandomState(self.random_state)
+        self.trees_ = [self._build_tree(X, rng) for _ in range(self.n_trees)]
+        return self
+
+    def _build_tree(self, X, rng):
+        """One tree, built level by level: the points of a node are a
+        contiguous segment of ``perm``, split in two halves at every level.
+
+        Internal nodes are numbered from 0, leaves are stored as -(leaf + 1)
+        in ``children``. Returns (normals, thresholds, children, members,
+        leaf of every point)."""
+        n_samples = X.shape[0]
+        perm = np.arange(n_samples)
+        point_leaf = np.zeros(n_samples, dtype=np.intp)
+        normals, thresholds, children = [], [], []
+        leaves = []
+        # segments (start, end, parent, side) to split at this level
+        level = [(0, n_samples, -1, 0)]
+        while level:
+            next_level = []
+            split = [seg for seg in level if seg[1] - seg[0] > self.leaf_size_]
+            for start, end, parent, side in level:
+                if end - start <= self.leaf_size_:
+                    if parent >= 0:
+                        children[parent][side] = -(len(leaves) + 1)
+                    point_leaf[perm[start:end]] = len(leaves)
+                    leaves.append(perm[start:end])
+            if split:
+                starts = np.array([seg[0] for seg in split])
+                ends = np.array([seg[1] for seg in split])
+                sizes = ends - starts
+                first = perm[starts + rng.randint(0, np.iinfo(np.int32).max, len(split)) % sizes]
+                second = perm[starts + rng.randint(0, np.iinfo(np.int32).max, len(split)) % sizes]
+                normal = X[first] - X[second]
+
+                half = sizes // 2
+                for j, (start, end, parent, side) in enumerate(split):
+                    proj = X[perm[start:end]] @ normal[j]
+                    order = np.argsort(proj, kind='stable')
+                    perm[start:end] = perm[start:end][order]
+                    proj = proj[order]
+                    node = len(normals)
+                    normals.append(normal[j])
+                    thresholds.append((proj[half[j] - 1] + proj[half[j]]) / 2)
+                    children.append([0, 0])
+                    if parent >= 0:
+                        children[parent][side] = node
+                    next_level.append((start, start + half[j], node, 0))
+                    next_level.append((start + half[j], end, node, 1))
+            level = next_level
+
+        # members of each leaf, padded with -1
+        members = np.full((len(leaves), max(len(leaf) for leaf in leaves)), -1, dtype=np.intp)
+        for i, leaf in enumerate(leaves):
+            members[i, :len(leaf)] = leaf
+        n_dims = X.shape[1]
+        return (np.array(normals).reshape(-1, n_dims), np.array(thresholds), np.array(children, dtype=np.intp).reshape(-1, 2),
+                members, point_leaf)
+
+    @staticmethod
+    def _leaves(tree, X):
+        """Leaf of the tree each row of X falls in."""
+        normals, thresholds, children = tree[:3]
+        if len(normals) == 0:
+            return np.zeros(X.shape[0], dtype=np.intp)
+        node = np.zeros(X.shape[0], dtype=np.intp)
+        active = np.arange(X.shape[0])
+        while active.size:
+            current = node[active]
+            proj = np.einsum('ij,ij->i', X[active], normals[current])
+            node[active] = children[current, (proj >= thresholds[current]).astype(np.intp)]
+            active = active[node[active] >= 0]
+        return -node - 1
+
+    def kneighbors(self, X=None, n_neighbors=None, return_distance=True):
+        """Approximate nearest neighbors of the rows of X, or of the training
+        points (each excluded from its own neighbors) if X is None, sorted by
+        distance. Same API as sklearn NearestNeighbors.kneighbors."""
+        n_neighbors = self.n_neighbors if n_neighbors is None else n_neighbors
+        if 2 * (n_neighbors + 1) > self.leaf_size_:
+            raise ValueError('n_neighbors={0} needs leaves of more than {1} points, refit with a larger '
+                             'leaf_size'.format(n_neighbors, 2 * (n_neighbors + 1)))
+        query_is_train = X is None
+        X = self._fit_X if query_is_train else np.asarray(X)
+        sq = self._fit_sq if query_is_train else np.einsum('ij,ij->i', X, X)
+
+        distances = np.full((X.shape[0], n_neighbors), np.inf)
+        indices = np.full((X.shape[0], n_neighbors), -1, dtype=np.intp)
+        for tree in self.trees_:
+            leaf = tree[4] if query_is_train else self._leaves(tree, X)
+            cand_dist, cand_ind = self._leaf_candidates(tree[3], X, sq, leaf, query_is_train)
+            distances, indices = _merge_neighbors(distances, indices, cand_dist, cand_ind, n_neighbors)
+
+        # exact distances of the neighbors found, sorted
+        for rows in gen_batches(X.shape[0], 1024):
+            diff = self._fit_X[indices[rows]] - X[rows, None, :]
+            distances[rows] = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+        order = np.argsort(distances, axis=1, kind='stable')
+        distances = np.take_along_axis(distances, order, axis=1)
+        indices = np.take_along_axis(indices, order, axis=1)
+        return (distances, indices) if return_distance else indices
+
+    def _leaf_candidates(self, members, X, sq, leaf, query_is_train):
+        """Squared distances (n_queries, leaf width) of the queries to the
+        points of their leaf, inf where there is no point or it is the query."""
+        cand_dist = np.full((X.shape[0], members.shape[1]), np.inf)
+        cand_ind = np.full((X.shape[0], members.shape[1]), -1, dtype=np.intp)
+        order = np.argsort(leaf, kind='stable')
+        bounds = np.flatnonzero(np.diff(leaf[order])) + 1
+        for rows in np.split(order, bounds):
+            points = members[leaf[rows[0]]]
+            points = points[points >= 0]
+            dist = sq[rows, None] + self._fit_sq[points] - 2 * X[rows] @ self._fit_X[points].T
+            if query_is_train:
+                dist[rows[:, None] == points] = np.inf
+            cand_dist[rows, :len(points)] = dist
+            cand_ind[rows, :len(points)] = points
+        return cand_dist, cand_ind
+
+    def query(self, X, k=1, return_distance=True):
+        """Same as ``kneighbors(X, k)``, with the API of sklearn BallTree.query."""
+        return self.kneighbors(X, n_neighbors=k, return_distance=return_distance)
+
+
+def _merge_neighbors(distances, indices, cand_dist, cand_ind, n_neighbors):
+    """The n_neighbors nearest of two sets of neighbors of the same queries,
+    each index kept once."""
+    distances = np.concatenate([distances, cand_dist], axis=1)
+    indices = np.concatenate([indices, cand_ind], axis=1)
+    order = np.argsort(indices, axis=1, kind='stable')
+    indices = np.take_along_axis(indices, order, axis=1)
+    distances = np.take_along_axis(distances, order, axis=1)
+    distances[:, 1:][indices[:, 1:] == indices[:, :-1]] = np.inf
+    nearest = np.argpartition(distances, n_neighbors - 1, axis=1)[:, :n_neighbors]
+    return np.take_along_axis(distances, nearest, axis=1), np.take_along_axis(indices, nearest, axis=1)
+
+
+def _build_shard(data_path, tree_path, tree_params):
+    """Build the BallTree of one shard from its data file and dump it to
+    tree_path (run in a worker process)."""
+    data = np.load(data_path, mmap_mode='r')
+    tree = BallTree(data, **tree_params)
+    del data
+    joblib.dump(tree, tree_path)
+    os.remove(data_path)
+
+
+def _query_shards(tree_paths, shards, queries, n_neighbors, rows=None):
+    """The n_neighbors nearest neighbors of the queries over all the shards,
+    merged shard by shard. ``rows`` is the slice of the training rows the
+    queries are, whose own index is then excluded."""
+    distances = np.full((queries.shape[0], n_neighbors), np.inf)
+    indices = np.full((queries.shape[0], n_neighbors), -1, dtype=np.intp)
+    for (start, stop), tree_path in zip(shards, tree_paths):
+        tree = joblib.load(tree_path, mmap_mode='r')
+        own = rows is not None and rows.start < stop and start < rows.stop
+        k = min(n_neighbors + own, stop - start)
+        cand_dist, cand_ind = tree.query(queries, k=k)
+        cand_ind += start
+        if own:
+            cand_dist[cand_ind == np.arange(rows.start, rows.stop)[:, None]] = np.inf
+        distances, indices = _merge_neighbors(distances, indices, cand_dist, cand_ind, n_neighbors)
+    order = np.argsort(distances, axis=1, kind='stable')
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+class ShardedNeighbors:
+    """ Exact nearest neighbor search over time shards of the data, for window
+    matrices that do not fit in memory.
+
+    The rows are split into shards of ``shard_size`` consecutive windows,
+    each indexed by its own BallTree, built in a pool of ``n_jobs`` processes
+    and stored on disk. A query block is answered by every shard in turn, the
+    trees being memory-mapped, and the per-shard top k are merged, so only
+    the O(n_queries * k) result is kept in memory. The data itself is only
+    read, e.g. from the memmap of ``get_search_matrix``.
+
+    Parameters
+    ----------
+    n_neighbors : int, optional (default=5)
+        Number of neighbors returned by default.
+
+    shard_size : int, optional (default=200000)
+        Number of rows per shard.
+
+    block_size : int, optional (default=10000)
+        Number of queries per task.
+
+    n_jobs : int, optional (default=1)
+        Number of processes building the trees and answering the queries.
+
+    temp_dir : str, optional (default=None)
+        Where the trees are stored, the system temporary directory by
+        default. They are removed with the object.
+
+    **tree_params :
+        Parameters of sklearn BallTree (leaf_size, metric and its parameters).
+    """
+    def __init__(self, n_neighbors=5, shard_size=200000, block_size=10000, n_jobs=1, temp_dir=None,
+                 **tree_params):
+        self.n_neighbors = n_neighbors
+        self.shard_size = shard_size
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.temp_dir = temp_dir
+        self.tree_params = tree_params
+
+    def fit(self, X):
+        self._fit_X = X
+        self.n_samples_fit_ = X.shape[0]
+        self.dir_ = tempfile.mkdtemp(prefix='tsb_ad_shards_', dir=self.temp_dir)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.dir_, True)
+        self.shards_ = [(start, min(start + self.shard_size, self.n_samples_fit_))
+                        for start in range(0, self.n_samples_fit_, self.shard_size)]
+        data_paths, self.tree_paths_ = [], []
+        for i, (start, stop) in enumerate(self.shards_):
+            data_paths.append(os.path.join(self.dir_, 'shard_{0}.npy'.format(i)))
+            self.tree_paths_.append(os.path.join(self.dir_, 'tree_{0}.pkl'.format(i)))
+            np.save(data_paths[-1], np.asarray(X[start:stop]))
+        Parallel(n_jobs=min(effective_n_jobs(self.n_jobs), len(self.shards_)))(
+            delayed(_build_shard)(data_path, tree_path, self.tree_params)
+            for data_path, tree_path in zip(data_paths, self.tree_paths_))
+        return self
+
+    def kneighbors(self, X=None, n_neighbors=None, return_distance=True):
+        """Distances and indices of the n_neighbors nearest rows of the data
+        for every row of X, sorted by distance. With X None the neighbors of
+        the data's own rows, each row excluded."""
+        n_neighbors = n_neighbors or self.n_neighbors
+        train = X is None
+        data = self._fit_X if train else X
+        blocks = list(gen_batches(data.shape[0], self.block_size))
+        results = Parallel(n_jobs=min(effective_n_jobs(self.n_jobs), len(blocks)))(
+            delayed(_query_shards)(self.tree_paths_, self.shards_, np.asarray(data[rows]), n_neighbors,
+                                   rows if train else None)
+            for rows in blocks)
+        distances = np.concatenate([dist for dist, _ in results])
+        indices = np.concatenate([ind for _, ind in results])
+        return (distances, indices) if return_distance else indices
+
+    def query(self, X, k=1, return_distance=True):
+        """Same as ``kneighbors(X, k)``, with the API of sklearn BallTree.query."""
+        return self.kneighbors(X, n_neighbors=k, return_distance=return_distance)
+
+
+class Sharding:
+    """ When the neighbor search goes out of core, see ``set_sharding``."""
+    def __init__(self, max_bytes=1 << 31, shard_size=200000, n_jobs=None, temp_dir=None):
+        self.max_bytes = max_bytes
+        self.shard_size = shard_size
+        self.n_jobs = n_jobs
+        self.temp_dir = temp_dir
+
+sharding = Sharding()
+
+def set_sharding(max_bytes=None, shard_size=None, n_jobs=None, temp_dir=None):
+    """Change the size (in bytes) of the window matrices above which they are
+    memory-mapped and searched by shards, the number of windows per shard,
+    the number of processes (the detector's n_jobs by default) or the
+    directory of the memmaps and trees."""
+    if max_bytes is not None:
+        sharding.max_bytes = max_bytes
+    if shard_size is not None:
+        sharding.shard_size = shard_size
+    if n_jobs is not None:
+        sharding.n_jobs = n_jobs
+    if temp_dir is not None:
+        sharding.temp_dir = temp_dir
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def get_search_matrix(X, window=100, stride=1, normalize=True, projection=None, block_size=None):
+    """Window matrix of X for a neighbor search, as ``feature.get_window_matrix``
+    (or built by ``feature.WindowNormalizer`` blocks of block_size). Above the
+    sharding threshold it is instead written block by block to a read-only
+    memmap, removed with the array, and never resides in memory."""
+    normalizer = WindowNormalizer(window=window, stride=stride, normalize=normalize, block_size=block_size or 10000,
+                                  projection=projection).fit(X)
+    # the unprojected windows are the largest matrix get_window_matrix builds
+    n_bytes = normalizer.n_windows_ * window * normalizer.n_features_ * normalizer.dtype_.itemsize
+    if n_bytes <= sharding.max_bytes:
+        if block_size is None:
+            return get_window_matrix(X, window=window, stride=stride, normalize=normalize, projection=projection)
+        return normalizer.transform()
+
+    fd, path = tempfile.mkstemp(prefix='tsb_ad_windows_', suffix='.npy', dir=sharding.temp_dir)
+    os.close(fd)
+    out = None
+    for start, block in normalizer.iter_blocks():
+        if out is None:
+            out = np.lib.format.open_memmap(path, mode='w+', dtype=block.dtype,
+                                            shape=(normalizer.n_windows_, block.shape[1]))
+        out[start:start + block.shape[0]] = block
+    out.flush()
+    del out
+    windows = np.load(path, mmap_mode='r')
+    weakref.finalize(windows, _remove_file, path)
+    return windows
+
+
+def make_neighbor_search(neighbor_search):
+    """The approximate search of a detector's ``neighbor_search`` argument
+    (None or 'exact', 'approximate' or an RPForest), None if exact."""
+    if neighbor_search is None or isinstance(neighbor_search, RPForest):
+        return neighbor_search
+    if neighbor_search not in Neighbor_Search:
+        raise ValueError("neighbor_search should be one of {0} or an RPForest. Got {1}".format(Neighbor_Search,
+                                                                                                 neighbor_search))
+    return RPForest() if neighbor_search == 'approximate' else None
+
+
+class NeighborGraph:
+    """ The ``n_neighbors`` nearest neighbors of every row of the data, the row
+    itself excluded, sorted by distance.
+
+    Attributes
+    ----------
+    nn_ : fitted sklearn NearestNeighbors
+        Index of the data, to query new points.
+
+    distances_ : numpy array of shape (n_samples, n_neighbors)
+
+    indices_ : numpy array of shape (n_samples, n_neighbors)
+    """
+    def __init__(self, nn, distances, indices):
+        self.nn_ = nn
+        self.distances_ = distances
+        self.indices_ = indices
+        # per-detector quantities derived from the graph, e.g. COF chaining costs
+        self.derived_ = {}
+
+    @property
+    def n_neighbors(self):
+        return self.distances_.shape[1]
+
+    @property
+    def nbytes(self):
+        # the index holds a copy of the data (the forest shares it, the shards are on disk)
+        data_bytes = 0 if isinstance(self.nn_, ShardedNeighbors) else self.nn_._fit_X.nbytes
+        return (self.distances_.nbytes + self.indices_.nbytes + data_bytes
+                + sum(v.nbytes for v in self.derived_.values()))
+
+    def kneighbors(self, n_neighbors):
+        """Distances and indices of the ``n_neighbors`` nearest neighbors of
+        every row, ``n_neighbors <= self.n_neighbors``."""
+        if n_neighbors > self.n_neighbors:
+            raise ValueError('the graph holds {0} neighbors, {1} requested'.format(self.n_neighbors, n_neighbors))
+        return self.distances_[:, :n_neighbors], self.indices_[:, :n_neighbors]
+
+
+class NeighborGraphCache(WindowCache):
+    """ LRU cache of neighbor graphs, see ``WindowCache``.
+
+    ``k_max`` is the minimum number of neighbors computed for a new graph, so
+    that a grid over n_neighbors up to k_max is served by one search.
+    """
+    def __init__(self, max_bytes=1 << 30, enabled=True, k_max=None):
+        super(NeighborGraphCache, self).__init__(max_bytes=max_bytes, enabled=enabled)
+        self.k_max = k_max
+
+graph_cache = NeighborGraphCache()
+
+def set_neighbor_cache(max_bytes=None, enabled=None, k_max=None):
+    """Change the memory budget (in bytes) of the neighbor graph cache, turn
+    it off, or set the number of neighbors computed for every new graph (e.g.
+    the largest n_neighbors of a tuning grid)."""
+    if k_max is not None:
+        graph_cache.k_max = k_max
+    if max_bytes is not None:
+        graph_cache.max_bytes = max_bytes
+    if enabled is not None:
+        graph_cache.enabled = enabled
+    if not graph_cache.enabled:
+        graph_cache.clear()
+    graph_cache._evict()
+
+def get_neighbor_graph(X, n_neighbors, use_cache=True, neighbor_search=None, **nn_params):
+    """Neighbor graph of the rows of X with at least ``n_neighbors`` neighbors
+    (at most n_samples - 1).
+
+    Parameters
+    ----------
+    X : numpy array of shape (n_samples, n_features)
+
+    n_neighbors : int
+
+    use_cache : bool, optional (default=True)
+        Look the graph up in (and add it to) the shared graph cache. A cached
+        graph with at least n_neighbors neighbors is returned as is.
+
+    neighbor_search : RPForest, optional (default=None)
+        Approximate search to use instead of the exact one, see
+        ``make_neighbor_search``. Only for Euclidean metrics; of nn_params
+        only the metric and p are then used.
+
+    **nn_params :
+        Parameters of sklearn NearestNeighbors (metric, p, algorithm, ...).
+        All but n_jobs identify the graph in the cache. Above the sharding
+        threshold (see ``set_sharding``) the exact search is done by a
+        ``ShardedNeighbors`` with the same metric.
+
+    Returns
+    -------
+    graph : NeighborGraph
+    """
+    X = np.asarray(X)
+    n_neighbors = max(1, min(n_neighbors, X.shape[0] - 1))
+    if neighbor_search is not None:
+        metric, p = nn_params.get('metric', 'minkowski'), nn_params.get('p', 2)
+        if metric not in Euclidean_Metrics or (metric == 'minkowski' and p != 2):
+            raise ValueError("the approximate neighbor search needs the Euclidean distance. Got metric={0}, "
+                             "p={1}".format(metric, p))
+    key = None
+    if use_cache and graph_cache.enabled:
+        if neighbor_search is None:
+            params = sorted((name, repr(value)) for name, value in nn_params.items() if name != 'n_jobs')
+        else:
+            params = neighbor_search.key_
+        key = (_data_key(X), tuple(params))
+        graph = graph_cache.get(key)
+        if graph is not None and graph.n_neighbors >= n_neighbors:
+            return graph
+
+    k = max(1, min(max(n_neighbors, graph_cache.k_max or 0), X.shape[0] - 1))
+    if neighbor_search is None and X.nbytes > sharding.max_bytes and _shardable(nn_params):
+        tree_params = dict(leaf_size=nn_params.get('leaf_size', 30), metric=nn_params.get('metric', 'minkowski'))
+        if tree_params['metric'] == 'minkowski':
+            tree_params['p'] = nn_params.get('p', 2)
+        tree_params.update(nn_params.get('metric_params') or {})
+        nn = ShardedNeighbors(n_neighbors=k, shard_size=sharding.shard_size, temp_dir=sharding.temp_dir,
+                              n_jobs=sharding.n_jobs or nn_params.get('n_jobs') or 1, **tree_params).fit(X)
+    elif neighbor_search is None:
+        nn = NearestNeighbors(n_neighbors=k, **nn_params).fit(X)
+    else:
+        nn = copy.copy(neighbor_search)
+        nn.n_neighbors = k
+        nn.fit(X)
+    distances, indices = nn.kneighbors()
+    graph = NeighborGraph(nn, distances, indices)
+    if key is not None:
+        graph_cache.put(key, graph)
+    return graph
+
+
+def _shardable(nn_params):
+    """Whether the metric of nn_params is one BallTree supports."""
+    metric = nn_params.get('metric', 'minkowski')
+    return isinstance(metric, str) and metric in BallTree.valid_metrics
@@ -3,6 +3,16 @@ import torch.utils.data
 import numpy as np
 epsilon = 1e-8
 
+def _window_view(data, window_size, stride, sample_num):
+    """ (sample_num, window_size, n_features) view of the rows of ``data``.
+    Windows share the memory of ``data``; they are only copied when the
+    DataLoader collates a batch, so a dataset takes O(n) memory instead of
+    O(n * window_size).
+    """
+    if sample_num == 0:
+        return data.new_empty((0, window_size) + tuple(data.shape[1:]))
+    return data.unfold(0, window_size, stride)[:sample_num].movedim(-1, 1)
+
 class ReconstructDataset(torch.utils.data.Dataset):
     def __init__(self, data, window_size, stride=1, normalize=True):
         super().__init__()
@@ -21,14 +31,7 @@ class ReconstructDataset(torch.utils.data.Dataset):
 
     def _generate_samples(self):
         data = torch.tensor(self.data, dtype=torch.float32)
-
-        if self.univariate:
-            data = data.squeeze()
-            X = torch.stack([data[i * self.stride : i * self.stride + self.window_size] for i in range(self.sample_num)])
-            X = X.unsqueeze(-1)
-        else:
-            X = torch.stack([data[i * self.stride : i * self.stride + self.window_size, :] for i in range(self.sample_num)])
-
+        X = _window_view(data, self.window_size, self.stride, self.sample_num)
         return X, X
 
     def __len__(self):
@@ -58,13 +61,11 @@ class ForecastDataset(torch.utils.data.Dataset):
         return (data - mean) / std
 
     def _generate_samples(self):
-        """ Generate windowed samples efficiently using vectorized slicing. """
+        """ Windowed samples as views of a single tensor. """
         data = torch.tensor(self.data, dtype=torch.float32)
 
-        indices = np.arange(0, self.sample_num * self.stride, self.stride)
-
-        X = torch.stack([data[i : i + self.window_size] for i in indices])
-        Y = torch.stack([data[i + self.window_size : i + self.window_size + self.pred_len] for i in indices])
+        X = _window_view(data, self.window_size, self.stride, self.sample_num)
+        Y = _window_view(data[self.window_size:], self.pred_len, self.stride, self.sample_num)
 
         return X, Y  # Inputs & targets
 
@@ -166,14 +167,7 @@ class ReconstructDataset_Moment(torch.utils.data.Dataset):
 
     def _generate_samples(self):
         data = torch.tensor(self.data, dtype=torch.float32)
-        indices = np.arange(0, self.sample_num * self.stride, self.stride)
-
-        if self.univariate:
-            X = torch.stack([data[i : i + self.window_size] for i in indices])
-        else:
-            X = torch.stack([data[i : i + self.window_size, :] for i in indices])
-
-        return X
+        return _window_view(data, self.window_size, self.stride, self.sample_num)
 
     def __len__(self):
         return self.sample_num
@@ -0,0 +1,146 @@
+"""Piecewise aggregate approximation (PAA) of a series before running a detector.
+
+The series is cut into segments of ``factor`` points and each segment is
+replaced by:
+
+    'mean'     : its mean, so the series gets ``factor`` times shorter.
+    'envelope' : its minimum and its maximum, in the order in which they
+                 occur, so the series gets ``factor / 2`` times shorter but
+                 keeps its spikes.
+
+The detector runs on the short series, with its window-related
+hyper-parameters rescaled, and its scores are mapped back to the original
+points: every point of a segment gets the score of the segment.
+"""
+
+import inspect
+import numpy as np
+
+PAA_Methods = ['mean', 'envelope']
+
+# hyper-parameters of the runners that are lengths in number of points
+Window_Params = ['slidingWindow', 'window_size', 'win_size', 'local_neighbor_window', 'max_region_size',
+                 'max_sign_change_distance']
+
+
+def _check(factor, method):
+    if method not in PAA_Methods:
+        raise ValueError("paa_method should be one of {0}. Got {1}".format(PAA_Methods, method))
+    if int(factor) != factor or factor < 1:
+        raise ValueError("paa_factor should be a positive integer. Got {0}".format(factor))
+
+
+def length_ratio(factor, method='mean'):
+    """How many original points one point of the reduced series stands for."""
+    return factor if method == 'mean' else factor / 2
+
+
+def paa(data, factor, method='mean'):
+    """Reduce a series with piecewise aggregate approximation.
+
+    Parameters
+    ----------
+    data : numpy array of shape (n_samples, n_features) or (n_samples,)
+
+    factor : int
+        Number of points per segment. The last segment may be shorter.
+
+    method : {'mean', 'envelope'}, optional (default='mean')
+
+    Returns
+    -------
+    reduced : numpy array of shape (n_segments, n_features), or
+        (2 * n_segments, n_features) for 'envelope'
+    """
+    _check(factor, method)
+    data = np.asarray(data)
+    if data.dtype.kind != 'f':
+        data = data.astype(float)
+    squeeze = data.ndim == 1
+    if squeeze:
+        data = data.reshape(-1, 1)
+    n_samples, n_features = data.shape
+    starts = np.arange(0, n_samples, factor)
+
+    if method == 'mean':
+        counts = np.diff(np.r_[starts, n_samples]).reshape(-1, 1)
+        reduced = np.add.reduceat(data, starts, axis=0) / counts
+    else:
+        # pad the last segment with its last value, which changes neither its min nor its max
+        n_segments = len(starts)
+        padded = np.concatenate([data, np.repeat(data[-1:], n_segments * factor - n_samples, axis=0)])
+        segments = padded.reshape(n_segments, factor, n_features)
+        i_min = segments.argmin(axis=1)
+        i_max = segments.argmax(axis=1)
+        first = np.where(i_min <= i_max, i_min, i_max)[:, None, :]
+        second = np.where(i_min <= i_max, i_max, i_min)[:, None, :]
+        reduced = np.concatenate([np.take_along_axis(segments, first, axis=1),
+                                  np.take_along_axis(segments, second, axis=1)], axis=1)
+        reduced = reduced.reshape(2 * n_segments, n_features)
+    return reduced.ravel() if squeeze else reduced
+
+
+def upsample_scores(scores, factor, n_samples, method='mean'):
+    """Map the scores of a series reduced by :func:`paa` back to the
+    ``n_samples`` original points.
+
+    With 'envelope' a segment gets the largest score of its two points.
+    """
+    _check(factor, method)
+    scores = np.asarray(scores).ravel()
+    if method == 'envelope':
+        scores = scores[:len(scores) // 2 * 2].reshape(-1, 2).max(axis=1)
+    scores = np.repeat(scores, factor)[:n_samples]
+    if len(scores) < n_samples:
+        scores = np.pad(scores, (0, n_samples - len(scores)), mode='edge')
+    return scores
+
+
+def rescale_window_params(function, kwargs, factor, method='mean'):
+    """Return the keyword arguments of a runner with its window-related
+    hyper-parameters (see ``Window_Params``) divided by the PAA length ratio.
+
+    Defaults of ``function`` that are not set in ``kwargs`` are rescaled too.
+    Periodicity-based runners need nothing: they estimate the period on the
+    reduced series.
+    """
+    ratio = length_ratio(factor, method)
+    kwargs = dict(kwargs)
+    for name, param in inspect.signature(function).parameters.items():
+        if name not in Window_Params:
+            continue
+        value = kwargs.get(name, param.default)
+        if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+            kwargs[name] = max(1, int(round(value / ratio)))
+    return kwargs
+
+
+def run_downsampled(function, datas, kwargs, factor, method='mean'):
+    """Run a detector runner on the PAA of its input series.
+
+    Parameters
+    ----------
+    function : callable
+        A ``run_<model>`` function of model_wrapper.
+
+    datas : tuple of numpy arrays
+        Its positional series arguments, e.g. ``(data,)`` or
+        ``(data_train, data_test)``. Scores are mapped back to the length of
+        the last one.
+
+    kwargs : dict
+        Its hyper-parameters.
+
+    factor : int
+
+    method : {'mean', 'envelope'}, optional (default='mean')
+
+    Returns
+    -------
+    score : numpy array of shape (n_samples,)
+    """
+    _check(factor, method)
+    n_samples = len(datas[-1])
+    reduced = [paa(data, factor, method) for data in datas]
+    score = function(*reduced, **rescale_window_params(function, kwargs, factor, method))
+    return upsample_scores(score, factor, n_samples, method)
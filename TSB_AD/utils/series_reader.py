@@ -0,0 +1,339 @@
+"""Chunked readers for time series that are too long to be loaded at once.
+
+A series is stored either as a TSB-AD CSV file (value columns followed by a
+``Label`` column) or as a binary cache made of two ``.npy`` files next to it:
+
+    <name>.data.npy  : float array of shape (n_samples, n_features)
+    <name>.label.npy : int8 array of shape (n_samples,)
+
+The binary cache can be memory-mapped, so a chunk only touches the rows it
+covers.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+DATA_SUFFIX = '.data.npy'
+LABEL_SUFFIX = '.label.npy'
+
+
+def binary_cache_paths(file_path):
+    """Return the (data, label) ``.npy`` paths of the binary cache of a series.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the CSV file, of one of the cache files, or of the cache
+        prefix without any extension.
+
+    Returns
+    -------
+    data_path, label_path : str
+    """
+    for suffix in (DATA_SUFFIX, LABEL_SUFFIX, '.csv'):
+        if file_path.endswith(suffix):
+            file_path = file_path[:-len(suffix)]
+            break
+    return file_path + DATA_SUFFIX, file_path + LABEL_SUFFIX
+
+
+def has_binary_cache(file_path):
+    data_path, label_path = binary_cache_paths(file_path)
+    return os.path.exists(data_path) and os.path.exists(label_path)
+
+
+def load_binary(file_path, mmap_mode='r'):
+    """Load a series from its binary cache.
+
+    Parameters
+    ----------
+    file_path : str
+        See :func:`binary_cache_paths`.
+
+    mmap_mode : {None, 'r', 'r+', 'c'}, optional (default='r')
+        Passed to ``np.load``. With the default the arrays are memory-mapped
+        and nothing is read until it is sliced.
+
+    Returns
+    -------
+    data : numpy array of shape (n_samples, n_features)
+    label : numpy array of shape (n_samples,)
+    """
+    data_path, label_path = binary_cache_paths(file_path)
+    return np.load(data_path, mmap_mode=mmap_mode), np.load(label_path, mmap_mode=mmap_mode)
+
+
+def write_binary(file_path, data, label):
+    """Write a series to the binary cache layout.
+
+    Parameters
+    ----------
+    file_path : str
+        See :func:`binary_cache_paths`.
+
+    data : numpy array of shape (n_samples, n_features) or (n_samples,)
+
+    label : numpy array of shape (n_samples,)
+
+    Returns
+    -------
+    data_path, label_path : str
+    """
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+    label = np.asarray(label).astype(np.int8).ravel()
+    if data.shape[0] != label.shape[0]:
+        raise ValueError("data and label have different lengths: {0} and {1}".format(
+            data.shape[0], label.shape[0]))
+
+    data_path, label_path = binary_cache_paths(file_path)
+    np.save(data_path, data)
+    np.save(label_path, label)
+    return data_path, label_path
+
+
+def csv_to_binary(file_path, out_path=None, chunk_size=1000000, label_column='Label'):
+    """Convert a TSB-AD CSV file to the binary cache layout without loading
+    the whole file. Rows with missing values are dropped, as in the runners.
+
+    Parameters
+    ----------
+    file_path : str
+        The CSV file.
+
+    out_path : str, optional (default=None)
+        Cache prefix to write to. Defaults to ``file_path`` without ``.csv``.
+
+    chunk_size : int, optional (default=1000000)
+        Number of CSV rows parsed at a time.
+
+    label_column : str, optional (default='Label')
+
+    Returns
+    -------
+    data_path, label_path : str
+    """
+    data_path, label_path = binary_cache_paths(out_path if out_path is not None else file_path)
+
+    # first pass: number of rows that survive dropna and number of channels
+    n_samples, n_features = 0, None
+    for df in pd.read_csv(file_path, chunksize=chunk_size):
+        df = df.dropna()
+        n_samples += len(df)
+        n_features = df.shape[1] - 1
+
+    data = np.lib.format.open_memmap(data_path, mode='w+', dtype=np.float64, shape=(n_samples, n_features))
+    label = np.lib.format.open_memmap(label_path, mode='w+', dtype=np.int8, shape=(n_samples,))
+
+    start = 0
+    for df in pd.read_csv(file_path, chunksize=chunk_size):
+        df = df.dropna()
+        stop = start + len(df)
+        data[start:stop] = df.drop(columns=[label_column]).values.astype(float)
+        label[start:stop] = df[label_column].astype(int).to_numpy()
+        start = stop
+
+    data.flush()
+    label.flush()
+    del data, label
+    return data_path, label_path
+
+
+class SeriesChunk:
+    """A block of consecutive rows of a series.
+
+    Attributes
+    ----------
+    data : numpy array of shape (n_rows, n_features)
+        The rows of the chunk, including the overlap with the previous chunk.
+
+    label : numpy array of shape (n_rows,) or None
+        The labels of those rows, if the source has a label column.
+
+    start : int
+        Global index of ``data[0]`` in the whole series.
+
+    overlap : int
+        Number of leading rows that were already part of the previous chunk.
+        ``data[overlap:]`` holds the rows that are new in this chunk.
+
+    index : int
+        Position of the chunk in the sequence of chunks.
+    """
+
+    def __init__(self, data, label, start, overlap, index):
+        self.data = data
+        self.label = label
+        self.start = start
+        self.overlap = overlap
+        self.index = index
+
+    @property
+    def stop(self):
+        """Global index one past the last row of the chunk."""
+        return self.start + self.data.shape[0]
+
+    @property
+    def core_start(self):
+        """Global index of the first row that is new in this chunk."""
+        return self.start + self.overlap
+
+    @property
+    def core_data(self):
+        return self.data[self.overlap:]
+
+    @property
+    def core_label(self):
+        return None if self.label is None else self.label[self.overlap:]
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __repr__(self):
+        return 'SeriesChunk(index={0}, start={1}, stop={2}, overlap={3})'.format(
+            self.index, self.start, self.stop, self.overlap)
+
+
+class ChunkedSeriesReader:
+    """Iterate over a series in fixed-size blocks without loading it whole.
+
+    Every chunk after the first one is prefixed with the last ``overlap``
+    rows of the previous chunk, so that a window-based detector run on a chunk
+    sees every window that ends in its new rows. Setting ``overlap`` to the
+    detector window (or ``window - 1``) gives the same windows as on the full
+    series. A last block shorter than ``chunk_size`` is appended to the
+    previous chunk, so that no chunk is too short for a detector window.
+
+    Parameters
+    ----------
+    file_path : str
+        A TSB-AD CSV file or a binary cache (see :func:`binary_cache_paths`).
+
+    chunk_size : int, optional (default=100000)
+        Number of new rows in each chunk (up to ``2 * chunk_size - 1`` in the
+        last one).
+
+    overlap : int, optional (default=0)
+        Number of rows repeated from the end of the previous chunk.
+
+    source : {'auto', 'csv', 'binary'}, optional (default='auto')
+        Where to read from. 'auto' uses the binary cache when it exists and
+        falls back to the CSV file.
+
+    label_column : str, optional (default='Label')
+        Name of the label column in the CSV file.
+
+    dtype : numpy dtype, optional (default=float)
+        dtype of the returned data blocks.
+    """
+
+    def __init__(self, file_path, chunk_size=100000, overlap=0, source='auto',
+                 label_column='Label', dtype=float):
+        if chunk_size < 1:
+            raise ValueError('chunk_size should be positive. Got %s' % chunk_size)
+        if overlap < 0:
+            raise ValueError('overlap should be non-negative. Got %s' % overlap)
+        if source not in ('auto', 'csv', 'binary'):
+            raise ValueError("source should be 'auto', 'csv' or 'binary'. Got %s" % source)
+        if source == 'auto':
+            source = 'binary' if has_binary_cache(file_path) else 'csv'
+
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.source = source
+        self.label_column = label_column
+        self.dtype = dtype
+
+    def __iter__(self):
+        if self.source == 'binary':
+            blocks = self._binary_blocks()
+        else:
+            blocks = self._csv_blocks()
+
+        tail_data, tail_label = None, None
+        start = 0
+        for index, (data, label) in enumerate(self._merge_short_tail(blocks)):
+            overlap = 0
+            if tail_data is not None and tail_data.shape[0] > 0:
+                overlap = tail_data.shape[0]
+                data = np.concatenate([tail_data, data], axis=0)
+                label = np.concatenate([tail_label, label], axis=0)
+
+            yield SeriesChunk(data, label, start - overlap, overlap, index)
+
+            start += data.shape[0] - overlap
+            if self.overlap > 0:
+                tail_data = data[-self.overlap:]
+                tail_label = label[-self.overlap:]
+
+    def _merge_short_tail(self, blocks):
+        """The blocks, the last one appended to the one before it if it is
+        shorter than chunk_size."""
+        held = []
+        for block in blocks:
+            held.append(block)
+            if len(held) == 3:
+                yield held.pop(0)
+        if len(held) == 2 and held[1][0].shape[0] < self.chunk_size:
+            held = [(np.concatenate([held[0][0], held[1][0]], axis=0),
+                     np.concatenate([held[0][1], held[1][1]], axis=0))]
+        for block in held:
+            yield block
+
+    def _binary_blocks(self):
+        data, label = load_binary(self.file_path, mmap_mode='r')
+        for start in range(0, data.shape[0], self.chunk_size):
+            stop = start + self.chunk_size
+            yield (np.asarray(data[start:stop], dtype=self.dtype),
+                   np.asarray(label[start:stop]).astype(int))
+
+    def _csv_blocks(self):
+        for df in pd.read_csv(self.file_path, chunksize=self.chunk_size):
+            df = df.dropna()
+            if len(df) == 0:
+                continue
+            data = df.drop(columns=[self.label_column]).values.astype(self.dtype)
+            label = df[self.label_column].astype(int).to_numpy()
+            yield data, label
+
+    def read_labels(self):
+        """Return the whole label column, which is small compared to the data."""
+        if self.source == 'binary':
+            _, label = load_binary(self.file_path, mmap_mode='r')
+            return np.asarray(label).astype(int)
+        labels = [df.dropna()[self.label_column].astype(int).to_numpy()
+                  for df in pd.read_csv(self.file_path, chunksize=self.chunk_size)]
+        return np.concatenate(labels) if labels else np.zeros(0, dtype=int)
+
+
+def stitch_chunk_scores(chunk_scores, chunks, n_samples=None):
+    """Assemble per-chunk point scores into one score array.
+
+    Every row takes the score of the chunk in which it is new, i.e. the
+    overlap rows of a chunk are only used as left context for its own rows.
+
+    Parameters
+    ----------
+    chunk_scores : list of numpy arrays
+        Point scores of each chunk, aligned with ``chunk.data``.
+
+    chunks : list of SeriesChunk or (start, overlap) tuples
+
+    n_samples : int, optional (default=None)
+        Length of the output. Defaults to the end of the last chunk.
+
+    Returns
+    -------
+    score : numpy array of shape (n_samples,)
+    """
+    bounds = [(c.start, c.overlap) if isinstance(c, SeriesChunk) else tuple(c) for c in chunks]
+    if n_samples is None:
+        n_samples = max(start + len(s) for (start, _), s in zip(bounds, chunk_scores))
+    score = np.zeros(n_samples)
+    for (start, overlap), s in zip(bounds, chunk_scores):
+        s = np.asarray(s).ravel()[overlap:]
+        score[start + overlap:start + overlap + len(s)] = s
+    return score
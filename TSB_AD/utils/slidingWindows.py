@@ -1,31 +1,103 @@
-from statsmodels.tsa.stattools import acf
-from scipy.signal import argrelextrema
+from collections import OrderedDict
 import numpy as np
-from statsmodels.graphics.tsaplots import plot_acf
+import hashlib, os
 
-# determine sliding window (period) based on ACF
-def find_length_rank(data, rank=1):
-    data = data.squeeze()
-    if len(data.shape)>1: return 0
-    if rank==0: return 1
-    data = data[:min(20000, len(data))]
-    
-    base = 3
-    auto_corr = acf(data, nlags=400, fft=True)[base:]
-    
-    # plot_acf(data, lags=400, fft=True)
-    # plt.xlabel('Lags')
-    # plt.ylabel('Autocorrelation')
-    # plt.title('Autocorrelation Function (ACF)')
-    # plt.savefig('/data/liuqinghua/code/ts/TSAD-AutoML/AutoAD_Solution/candidate_pool/cd_diagram/ts_acf.png')
+class PeriodCache:
+    """Cache of the periods found by find_length_rank.
+
+    Entries are keyed by a hash of the (truncated) series content and the rank,
+    so the same period is not recomputed for every detector, hyper-parameter
+    combination and evaluation run on one file. An in-process LRU is always
+    used; when ``cache_dir`` is set, periods are also stored there as small
+    text files so that they are shared across processes and runs.
+    """
+    def __init__(self, maxsize=1024, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, '{}_{}.txt'.format(*key))
+
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.cache_dir is not None:
+            try:
+                with open(self._path(key)) as f:
+                    period = int(f.read())
+            except (OSError, ValueError):
+                return None
+            self._store(key, period)
+            return period
+        return None
+
+    def put(self, key, period):
+        self._store(key, period)
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._path(key) + '.{}.tmp'.format(os.getpid())
+            with open(tmp_path, 'w') as f:
+                f.write(str(int(period)))
+            os.replace(tmp_path, self._path(key))
+
+    def _store(self, key, period):
+        self._entries[key] = period
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+period_cache = PeriodCache(cache_dir=os.environ.get('TSB_AD_PERIOD_CACHE_DIR'))
+
+def set_period_cache(maxsize=None, cache_dir=None):
+    """Configure the shared period cache. ``cache_dir`` enables the on-disk cache."""
+    if maxsize is not None:
+        period_cache.maxsize = maxsize
+    period_cache.cache_dir = cache_dir
+
+def _series_key(data, rank):
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    return hashlib.sha1(data.tobytes()).hexdigest(), rank
 
-    local_max = argrelextrema(auto_corr, np.greater)[0]
+def acf(x, nlags=400):
+    """Sample autocorrelation of a 1-D series computed with the FFT.
 
-    # print('auto_corr: ', auto_corr)
-    # print('local_max: ', local_max)
+    Same estimator as statsmodels ``acf(x, nlags=nlags, fft=True)``
+    (demeaned, biased autocovariance normalized by lag 0), without importing
+    statsmodels. Returns an array of length ``min(nlags + 1, len(x))``.
+    """
+    return _batched_acf([x], nlags=nlags)[0]
+
+def _batched_acf(series, nlags=400):
+    """ACF of several 1-D series with one FFT pass. Returns a list of arrays."""
+    lengths = [len(x) for x in series]
+    # zero padding to at least 2n+1 points turns the circular correlation
+    # into the linear one
+    nfft = 1 << (2 * max(lengths)).bit_length()
+    X = np.zeros((len(series), nfft))
+    for i, x in enumerate(series):
+        x = np.asarray(x, dtype=np.float64)
+        X[i, :len(x)] = x - np.mean(x)
+    F = np.fft.rfft(X, axis=1)
+    acov = np.fft.irfft(F * np.conj(F), n=nfft, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return [acov[i, :min(nlags + 1, n)] / acov[i, 0] for i, n in enumerate(lengths)]
+
+def argrelmax(x):
+    """Indices of the strict local maxima of a 1-D array. Same result as
+    scipy.signal.argrelextrema(x, np.greater)[0], without importing
+    scipy.signal."""
+    return np.flatnonzero((x[1:-1] > x[:-2]) & (x[1:-1] > x[2:])) + 1
+
+def _period_from_acf(auto_corr, rank=1, base=3):
+    auto_corr = auto_corr[base:]
+    local_max = argrelmax(auto_corr)
 
     try:
-        # max_local_max = np.argmax([auto_corr[lcm] for lcm in local_max])
         sorted_local_max = np.argsort([auto_corr[lcm] for lcm in local_max])[::-1]    # Ascending order
         max_local_max = sorted_local_max[0]     # Default
         if rank == 1: max_local_max = sorted_local_max[0]
@@ -43,14 +115,69 @@ def find_length_rank(data, rank=1):
                 if i > sorted_local_max[id_tmp]: 
                     max_local_max = i           
                     break
-        # print('sorted_local_max: ', sorted_local_max)
-        # print('max_local_max: ', max_local_max)
         if local_max[max_local_max]<3 or local_max[max_local_max]>300:
             return 125
         return local_max[max_local_max]+base
     except:
         return 125
+
+def _find_length_rank(data, rank=1):
+    base = 3
+    auto_corr = acf(data, nlags=400)
     
+    # plot_acf(data, lags=400, fft=True)
+    # plt.xlabel('Lags')
+    # plt.ylabel('Autocorrelation')
+    # plt.title('Autocorrelation Function (ACF)')
+    # plt.savefig('/data/liuqinghua/code/ts/TSAD-AutoML/AutoAD_Solution/candidate_pool/cd_diagram/ts_acf.png')
+
+    return _period_from_acf(auto_corr, rank, base)
+
+# determine sliding window (period) based on ACF
+def find_length_rank(data, rank=1, use_cache=True):
+    data = data.squeeze()
+    if len(data.shape)>1: return 0
+    if rank==0: return 1
+    data = data[:min(20000, len(data))]
+
+    if use_cache:
+        key = _series_key(data, rank)
+        period = period_cache.get(key)
+        if period is not None:
+            return period
+        period = _find_length_rank(data, rank)
+        period_cache.put(key, period)
+        return period
+    return _find_length_rank(data, rank)
+
+def find_length_rank_batch(data, rank=1, use_cache=True):
+    """Batched find_length_rank.
+
+    ``data`` is either a list of 1-D series or a 2-D array of shape
+    (n_samples, n_channels), in which case the period of every channel is
+    returned. The ACFs of all series that are not cached yet are computed in
+    one FFT pass.
+    """
+    if isinstance(data, np.ndarray) and data.ndim == 2:
+        series = [data[:, i] for i in range(data.shape[1])]
+    else:
+        series = [np.asarray(x).squeeze() for x in data]
+    if rank == 0: return [1] * len(series)
+
+    series = [x[:min(20000, len(x))] for x in series]
+    periods = [None] * len(series)
+    keys = [_series_key(x, rank) if use_cache else None for x in series]
+    if use_cache:
+        periods = [period_cache.get(key) for key in keys]
+
+    todo = [i for i, p in enumerate(periods) if p is None]
+    if todo:
+        auto_corrs = _batched_acf([series[i] for i in todo], nlags=400)
+        for i, auto_corr in zip(todo, auto_corrs):
+            periods[i] = _period_from_acf(auto_corr, rank)
+            if use_cache:
+                period_cache.put(keys[i], periods[i])
+    return [int(p) for p in periods]
 
 # determine sliding window (period) based on ACF, Original version
 def find_length(data):
@@ -59,10 +186,10 @@ def find_length(data):
     data = data[:min(20000, len(data))]
     
     base = 3
-    auto_corr = acf(data, nlags=400, fft=True)[base:]
+    auto_corr = acf(data, nlags=400)[base:]
     
     
-    local_max = argrelextrema(auto_corr, np.greater)[0]
+    local_max = argrelmax(auto_corr)
     try:
         max_local_max = np.argmax([auto_corr[lcm] for lcm in local_max])
         if local_max[max_local_max]<3 or local_max[max_local_max]>300:
@@ -221,4 +221,38 @@ def ecdf_terminate_equals_inplace(matrix: np.ndarray, probabilities: np.ndarray)
     for cx in range(probabilities.shape[1]):
         for rx in range(probabilities.shape[0] - 2, -1, -1):
             if matrix[rx, cx] == matrix[rx + 1, cx]:
-                probabilities[rx, cx] = probabilities[rx + 1, cx]
\ No newline at end of file
+                probabilities[rx, cx] = probabilities[rx + 1, cx]
+
+
+class FittedECDF:
+    """
+    Column wise empirical cumulative distributions of a fitted feature matrix, to be evaluated on new samples.
+    The sorted training columns are kept and the ECDF of a value is found by binary search (np.searchsorted),
+    so evaluating a sample costs O(n_features * log(n_samples)) instead of a sort of the training data with it.
+
+    ``left(X)`` on the training matrix equals column_ecdf(X) and ``right(X)`` equals column_ecdf(-X). With
+    ``include_self`` every sample of X is counted as one more training sample, i.e. each sample gets the ECDF of
+    the training data with that sample appended, which is never 0.
+    """
+
+    def fit(self, X):
+        X = np.asarray(X)
+        if X.ndim != 2:
+            raise ValueError('Matrix needs to be two dimensional for the ECDF computation.')
+        self.sorted_ = np.sort(X, axis=0)
+        self.n_samples_ = X.shape[0]
+        return self
+
+    def _counts(self, X, side):
+        counts = np.empty(X.shape, dtype=np.intp)
+        for cx in range(X.shape[1]):
+            counts[:, cx] = np.searchsorted(self.sorted_[:, cx], X[:, cx], side=side)
+        return counts
+
+    def left(self, X, include_self=False):
+        """P(x_train <= x) per column, for every row of X."""
+        return (self._counts(X, 'right') + include_self) / (self.n_samples_ + include_self)
+
+    def right(self, X, include_self=False):
+        """P(x_train >= x) per column, for every row of X."""
+        return (self.n_samples_ - self._counts(X, 'left') + include_self) / (self.n_samples_ + include_self)
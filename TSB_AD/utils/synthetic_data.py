@@ -0,0 +1,266 @@
+"""Seeded synthetic time series with labelled anomalies, for scaling tests.
+
+The series are generated block by block, so series of any length and channel
+count can be written to disk without holding them in memory. Everything is
+derived from the seed: the same parameters always give the same series,
+whatever the block size used for writing.
+
+Usage:
+    python -m TSB_AD.utils.synthetic_data --out_dir Datasets/ --n_series 3 --length 10000000
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from .series_reader import binary_cache_paths
+
+Anomaly_Types = ['point', 'contextual', 'collective']
+
+# noise is drawn in units of this many values, each unit from its own seeded
+# stream, so that it does not depend on the block size
+NOISE_UNIT = 65536
+# default number of values per generated block
+BLOCK_VALUES = 1 << 22
+
+
+class SyntheticSeriesGenerator:
+    """Periodic + trend + noise series with injected anomalies.
+
+    Each channel is ``amplitude * sin(2 pi t / period + phase) + trend * t / length
+    + noise``. Channel 0 uses exactly ``period``, ``amplitude`` and ``trend``;
+    the other channels get randomly perturbed values.
+
+    Anomalies are placed after the training part (``train_ratio``) and never
+    overlap:
+
+    - 'point': a single spike of ``anomaly_scale`` times the signal range.
+    - 'contextual': the periodic component is inverted on a segment, so values
+      stay within the normal range but do not match their context.
+    - 'collective': a segment is shifted by ``anomaly_scale`` times the
+      amplitude.
+
+    Parameters
+    ----------
+    length : int, optional (default=10000)
+
+    n_channels : int, optional (default=1)
+
+    period : int, optional (default=100)
+
+    amplitude : float, optional (default=1.0)
+
+    trend : float, optional (default=0.0)
+        Total increase of the trend over the whole series.
+
+    noise_std : float, optional (default=0.1)
+
+    anomaly_types : list of str, optional (default=['point', 'contextual', 'collective'])
+
+    n_anomalies : int, optional (default=10)
+
+    anomaly_length : int, optional (default=None)
+        Maximum length of contextual and collective anomalies. Defaults to
+        ``period``.
+
+    anomaly_scale : float, optional (default=3.0)
+
+    train_ratio : float, optional (default=0.2)
+        Fraction of the series kept free of anomalies.
+
+    seed : int, optional (default=2024)
+
+    block_size : int, optional (default=None)
+        Number of rows generated at a time. Does not change the series.
+        Defaults to about 4M values per block.
+    """
+
+    def __init__(self, length=10000, n_channels=1, period=100, amplitude=1.0, trend=0.0, noise_std=0.1,
+                 anomaly_types=Anomaly_Types, n_anomalies=10, anomaly_length=None, anomaly_scale=3.0,
+                 train_ratio=0.2, seed=2024, block_size=None):
+        for anomaly_type in anomaly_types:
+            if anomaly_type not in Anomaly_Types:
+                raise ValueError("anomaly type should be one of {0}. Got {1}".format(Anomaly_Types, anomaly_type))
+        self.length = length
+        self.n_channels = n_channels
+        self.period = period
+        self.amplitude = amplitude
+        self.trend = trend
+        self.noise_std = noise_std
+        self.anomaly_types = list(anomaly_types)
+        self.n_anomalies = n_anomalies if self.anomaly_types else 0
+        self.anomaly_length = anomaly_length if anomaly_length is not None else period
+        self.anomaly_scale = anomaly_scale
+        self.train_ratio = train_ratio
+        self.seed = seed
+        self.block_size = block_size if block_size is not None else max(1, BLOCK_VALUES // n_channels)
+        self._noise_unit = max(1, NOISE_UNIT // n_channels)
+
+        rng = np.random.default_rng([seed, 0])
+        d = n_channels
+        self.periods_ = period * np.r_[1., rng.uniform(0.8, 1.2, d - 1)]
+        self.phases_ = np.r_[0., rng.uniform(0, 2 * np.pi, d - 1)]
+        self.amplitudes_ = amplitude * np.r_[1., rng.uniform(0.5, 1.5, d - 1)]
+        self.trends_ = trend * np.r_[1., rng.uniform(0.5, 1.5, d - 1)]
+        self.train_index_ = int(length * train_ratio)
+        self.anomalies_ = self._place_anomalies(np.random.default_rng([seed, 1]))
+
+    def _place_anomalies(self, rng):
+        """Return a sorted list of (type, start, end, channels, sign)."""
+        anomalies, taken = [], []
+        max_len = max(1, self.anomaly_length)
+        low, high = self.train_index_, self.length - max_len
+        if high <= low:
+            return anomalies
+        for _ in range(self.n_anomalies):
+            for _ in range(100):
+                anomaly_type = self.anomaly_types[rng.integers(len(self.anomaly_types))]
+                seg_len = 1 if anomaly_type == 'point' else int(rng.integers(max(1, max_len // 2), max_len + 1))
+                start = int(rng.integers(low, high))
+                end = start + seg_len
+                # keep a gap of one period between anomalies
+                if all(end + self.period <= s or start >= e + self.period for s, e in taken):
+                    break
+            else:
+                break
+            n_affected = int(rng.integers(1, self.n_channels + 1))
+            channels = np.sort(rng.choice(self.n_channels, n_affected, replace=False))
+            sign = 1. if rng.random() < 0.5 else -1.
+            taken.append((start, end))
+            anomalies.append((anomaly_type, start, end, channels, sign))
+        return sorted(anomalies, key=lambda a: a[1])
+
+    @property
+    def first_anomaly_index_(self):
+        return self.anomalies_[0][1] if self.anomalies_ else self.length
+
+    def _periodic(self, t):
+        return self.amplitudes_ * np.sin(2 * np.pi * t[:, None] / self.periods_ + self.phases_)
+
+    def _noise(self, start, stop):
+        parts, size = [], self._noise_unit
+        for unit in range(start // size, (stop - 1) // size + 1):
+            rng = np.random.default_rng([self.seed, 2, unit])
+            noise = rng.normal(0, self.noise_std, (size, self.n_channels))
+            lo = max(start, unit * size) - unit * size
+            hi = min(stop, (unit + 1) * size) - unit * size
+            parts.append(noise[lo:hi])
+        return np.concatenate(parts, axis=0)
+
+    def iter_blocks(self):
+        """Yield (start, data, label) blocks of ``block_size`` rows."""
+        for start in range(0, self.length, self.block_size):
+            stop = min(start + self.block_size, self.length)
+            t = np.arange(start, stop, dtype=np.float64)
+            periodic = self._periodic(t)
+            data = periodic + self.trends_ * (t[:, None] / self.length) + self._noise(start, stop)
+            label = np.zeros(stop - start, dtype=np.int8)
+
+            for anomaly_type, a_start, a_end, channels, sign in self.anomalies_:
+                if a_end <= start or a_start >= stop:
+                    continue
+                rows = slice(max(a_start, start) - start, min(a_end, stop) - start)
+                label[rows] = 1
+                for c in channels:
+                    if anomaly_type == 'point':
+                        data[rows, c] += sign * self.anomaly_scale * (self.amplitudes_[c] + 3 * self.noise_std)
+                    elif anomaly_type == 'contextual':
+                        data[rows, c] -= 2 * periodic[rows, c]
+                    elif anomaly_type == 'collective':
+                        data[rows, c] += sign * self.anomaly_scale * self.amplitudes_[c]
+            yield start, data, label
+
+    def generate(self):
+        """Return the whole series as (data, label). Only for series that fit in memory."""
+        data = np.empty((self.length, self.n_channels))
+        label = np.empty(self.length, dtype=int)
+        for start, block_data, block_label in self.iter_blocks():
+            data[start:start + len(block_label)] = block_data
+            label[start:start + len(block_label)] = block_label
+        return data, label
+
+    def file_name(self, index=1, dataset_name='Synthetic', domain='Synthetic'):
+        """TSB-AD file name, from which the runners read the training index."""
+        return '{0:03d}_{1}_id_{2}_{3}_tr_{4}_1st_{5}.csv'.format(
+            index, dataset_name, index, domain, self.train_index_, self.first_anomaly_index_)
+
+    def write_csv(self, file_path):
+        columns = ['Data'] if self.n_channels == 1 else ['Data_{}'.format(i) for i in range(self.n_channels)]
+        for start, data, label in self.iter_blocks():
+            df = pd.DataFrame(data, columns=columns)
+            df['Label'] = label
+            df.to_csv(file_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+        return file_path
+
+    def write_binary(self, file_path):
+        """Write to the binary cache layout read by series_reader."""
+        data_path, label_path = binary_cache_paths(file_path)
+        data = np.lib.format.open_memmap(data_path, mode='w+', dtype=np.float64, shape=(self.length, self.n_channels))
+        label = np.lib.format.open_memmap(label_path, mode='w+', dtype=np.int8, shape=(self.length,))
+        for start, block_data, block_label in self.iter_blocks():
+            data[start:start + len(block_label)] = block_data
+            label[start:start + len(block_label)] = block_label
+        data.flush()
+        label.flush()
+        del data, label
+        return data_path, label_path
+
+
+def generate_dataset(out_dir, n_series=1, dataset_name='Synthetic', formats=('csv', 'binary'), seed=2024, **kwargs):
+    """Write ``n_series`` synthetic series in the TSB-AD directory layout.
+
+    Series go to ``<out_dir>/<dataset_name>/`` and the list of file names to
+    ``<out_dir>/File_List/<dataset_name>.csv``, so that they can be passed to
+    the runners with ``--dataset_dir`` and ``--file_lsit``. Series ``i`` uses
+    seed ``seed + i``; other keyword arguments go to SyntheticSeriesGenerator.
+
+    Returns
+    -------
+    file_list : list of str
+    """
+    data_dir = os.path.join(out_dir, dataset_name)
+    list_dir = os.path.join(out_dir, 'File_List')
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(list_dir, exist_ok=True)
+
+    file_list = []
+    for i in range(n_series):
+        generator = SyntheticSeriesGenerator(seed=seed + i, **kwargs)
+        file_name = generator.file_name(index=i + 1, dataset_name=dataset_name)
+        file_path = os.path.join(data_dir, file_name)
+        if 'csv' in formats:
+            generator.write_csv(file_path)
+        if 'binary' in formats:
+            generator.write_binary(file_path)
+        file_list.append(file_name)
+
+    pd.DataFrame({'file_name': file_list}).to_csv(os.path.join(list_dir, dataset_name + '.csv'), index=False)
+    return file_list
+
+
+if __name__ == '__main__':
+
+    ## ArgumentParser
+    parser = argparse.ArgumentParser(description='Generating synthetic TSB-AD series')
+    parser.add_argument('--out_dir', type=str, default='Datasets/')
+    parser.add_argument('--dataset_name', type=str, default='Synthetic')
+    parser.add_argument('--n_series', type=int, default=1)
+    parser.add_argument('--length', type=int, default=10000)
+    parser.add_argument('--n_channels', type=int, default=1)
+    parser.add_argument('--period', type=int, default=100)
+    parser.add_argument('--trend', type=float, default=0.0)
+    parser.add_argument('--noise_std', type=float, default=0.1)
+    parser.add_argument('--anomaly_types', type=str, nargs='+', default=Anomaly_Types)
+    parser.add_argument('--n_anomalies', type=int, default=10)
+    parser.add_argument('--anomaly_length', type=int, default=None)
+    parser.add_argument('--formats', type=str, nargs='+', default=['csv', 'binary'])
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args()
+
+    file_list = generate_dataset(args.out_dir, n_series=args.n_series, dataset_name=args.dataset_name,
+                                 formats=args.formats, seed=args.seed, length=args.length,
+                                 n_channels=args.n_channels, period=args.period, trend=args.trend,
+                                 noise_std=args.noise_std, anomaly_types=args.anomaly_types,
+                                 n_anomalies=args.n_anomalies, anomaly_length=args.anomaly_length)
+    print('Generated: ', file_list)
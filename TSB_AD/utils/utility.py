@@ -7,6 +7,9 @@ from joblib.parallel import cpu_count
 import numpy as np
 from numpy import percentile
 import numbers
+import random
+import sys
+from contextlib import contextmanager
 
 import sklearn
 from sklearn.metrics import precision_score
@@ -16,13 +19,83 @@ from sklearn.utils import check_array
 from sklearn.utils import check_consistent_length
 from sklearn.utils import check_random_state
 from sklearn.utils.random import sample_without_replacement
-import torch.nn as nn
 
 MAX_INT = np.iinfo(np.int32).max
 MIN_INT = -1 * MAX_INT
 
+# seed waiting to be applied to torch, see seed_everything
+_torch_seed = None
+
+# dtype of the data, windows and scores of the classical detectors, see float_dtype
+_float_dtype = np.dtype(np.float64)
+
+def seed_everything(seed=2024):
+    """Seed random and numpy now, and torch as soon as it is needed.
+
+    torch is seeded right away if it is already imported. Otherwise the seed
+    is kept until seed_torch is called by the model wrapper before the first
+    torch-based detector runs, so that processes running only classical
+    detectors never import torch.
+    """
+    global _torch_seed
+    random.seed(seed)
+    np.random.seed(seed)
+    _torch_seed = seed
+    if 'torch' in sys.modules:
+        seed_torch()
+
+def seed_torch():
+    """Apply the seed registered by seed_everything to torch (once)."""
+    global _torch_seed
+    if _torch_seed is None:
+        return
+    import torch
+    torch.manual_seed(_torch_seed)
+    torch.cuda.manual_seed(_torch_seed)
+    torch.cuda.manual_seed_all(_torch_seed)
+    torch.backends.cudnn.benchmark = False
+    torch.backends.cudnn.deterministic = True
+    _torch_seed = None
+
+    print("CUDA available: ", torch.cuda.is_available())
+    print("cuDNN version: ", torch.backends.cudnn.version())
+
+def get_float_dtype():
+    """Current float dtype policy (numpy.float64 unless changed)."""
+    return _float_dtype
+
+def set_float_dtype(dtype):
+    """Set the float dtype of the classical detectors (model_wrapper's
+    Float_Dtype_AD_Pool): np.float32 keeps the data, window matrices,
+    distances and scores in single precision, halving their memory. Back ends
+    that only work in float64 (e.g. sklearn's BallTree, PCA) still convert
+    internally, and the other detectors get float64 series."""
+    global _float_dtype
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("dtype should be float32 or float64. Got {0}".format(dtype))
+    _float_dtype = dtype
+
+@contextmanager
+def float_dtype(dtype):
+    """Context manager setting the float dtype policy, e.g.
+
+        with float_dtype(np.float32):
+            score = run_Unsupervise_AD('Sub_KNN', data)
+
+    dtype=None leaves the policy unchanged."""
+    previous = _float_dtype
+    if dtype is not None:
+        set_float_dtype(dtype)
+    try:
+        yield
+    finally:
+        set_float_dtype(previous)
+
 def zscore(a, axis=0, ddof=0):
     a = np.asanyarray(a)
+    if a.dtype.kind != 'f':
+        a = a.astype(_float_dtype)
     mns = a.mean(axis=axis)
     sstd = a.std(axis=axis, ddof=ddof)
 
@@ -34,6 +107,118 @@ def zscore(a, axis=0, ddof=0):
 
     return np.nan_to_num(res)
 
+def pad_window_scores(scores, window, n_samples=None):
+    """Map window scores (one per window start, stride 1) to point scores by
+    repeating the first score ``ceil((window-1)/2)`` times at the start and the
+    last one ``(window-1)//2`` times at the end, so that every window score is
+    aligned with the centre of its window.
+
+    Parameters
+    ----------
+    scores : numpy array of shape (n_windows,)
+
+    window : int
+        Window length.
+
+    n_samples : int, optional (default=None)
+        Length of the series. Scores that already cover the series are
+        returned unchanged and the padded scores are cut to ``n_samples``.
+
+    Returns
+    -------
+    scores : numpy array of shape (n_samples,)
+    """
+    scores = np.asarray(scores)
+    if n_samples is not None and scores.shape[0] >= n_samples:
+        return scores
+    padded = np.pad(scores, (int(np.ceil((window - 1) / 2)), (window - 1) // 2), mode='edge')
+    return padded if n_samples is None else padded[:n_samples]
+
+def window_scores_to_points(scores, window, stride=1, n_samples=None):
+    """Map the scores of every ``stride``-th window to point scores.
+
+    The scores are linearly interpolated to every window start, then padded
+    as in :func:`pad_window_scores`, so the alignment is the same as when all
+    the windows are scored. With ``stride=1`` this is ``pad_window_scores``.
+
+    Parameters
+    ----------
+    scores : numpy array of shape (n_windows,)
+        Score of the windows starting at 0, stride, 2 * stride, ...
+
+    window : int
+        Window length.
+
+    stride : int, optional (default=1)
+
+    n_samples : int, optional (default=None)
+        Length of the series.
+
+    Returns
+    -------
+    scores : numpy array of shape (n_samples,)
+    """
+    scores = np.asarray(scores)
+    if stride > 1 and scores.shape[0] > 0:
+        scores = scores.ravel()
+        n_starts = n_samples - window + 1 if n_samples is not None else (scores.shape[0] - 1) * stride + 1
+        scores = np.interp(np.arange(n_starts), np.arange(scores.shape[0]) * stride, scores)
+    scores = pad_window_scores(scores, window, n_samples)
+    # scores are only cast down: under the default policy they keep their dtype
+    if _float_dtype == np.float32 and scores.dtype.kind == 'f':
+        scores = scores.astype(np.float32, copy=False)
+    return scores
+
+def reverse_windowing(scores, window, stride=1, n_samples=None):
+    """Map window scores to point scores, each point taking the mean score of
+    the windows that cover it. NaN scores are ignored and points covered by no
+    window get 0.
+
+    Runs in O(n_samples + n_windows) with difference arrays, for any stride.
+
+    Parameters
+    ----------
+    scores : numpy array of shape (n_windows,)
+        Score of the windows starting at 0, stride, 2 * stride, ...
+
+    window : int
+        Window length.
+
+    stride : int, optional (default=1)
+
+    n_samples : int, optional (default=None)
+        Length of the series. Defaults to the end of the last window.
+
+    Returns
+    -------
+    scores : numpy array of shape (n_samples,)
+    """
+    scores = np.asarray(scores, dtype=float).ravel()
+    n_windows = scores.shape[0]
+    if n_samples is None:
+        n_samples = stride * (n_windows - 1) + window if n_windows else 0
+
+    valid = ~np.isnan(scores)
+    begins = np.arange(n_windows) * stride
+    ends = np.minimum(begins + window, n_samples)
+    keep = begins < n_samples
+    begins, ends, valid, values = begins[keep], ends[keep], valid[keep], np.where(valid, scores, 0.)[keep]
+
+    total = np.zeros(n_samples + 1)
+    count = np.zeros(n_samples + 1)
+    # window starts are distinct, and so are window ends apart from the ones cut at n_samples
+    np.add.at(total, begins, values)
+    np.add.at(total, ends, -values)
+    np.add.at(count, begins, valid)
+    np.add.at(count, ends, -valid.astype(float))
+    total = np.cumsum(total[:-1])
+    count = np.rint(np.cumsum(count[:-1]))
+
+    mapped = np.zeros(n_samples)
+    covered = count > 0
+    mapped[covered] = total[covered] / count[covered]
+    return mapped
+
 def pairwise_distances_no_broadcast(X, Y):
     """Utility function to calculate row-wise euclidean distance of two matrix.
     Different from pair-wise calculation, this function would not broadcast.
@@ -737,6 +922,7 @@ def _pprint(params, offset=0, printer=repr):
     return lines
 
 def get_activation_by_name(name):
+    import torch.nn as nn
     activations = {
         'relu': nn.ReLU(),
         'sigmoid': nn.Sigmoid(),
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# License: Apache-2.0 License
+
+"""Agreement of the approximate neighbor search with the exact one on TSB-AD-U.
+
+Every neighbor-based detector is run on each file (with its optimal
+hyper-parameters) with the exact search and with random projection forests
+of several sizes (``neighbor_search=RPForest(n_trees=...)``). We report the
+run time, the speedup, the rank correlation of the approximate scores with
+the exact ones and the change of the accuracy metrics. Each detector first gets
+an untimed warm-up run (imports, numba compilation).
+
+COF (its 'knn' method) can be selected but is not run by default: on series of
+a few thousand points its chaining costs dominate the neighbor search, so the
+forest brings no speedup and its missed neighbors change the COF ranking much
+more than the KNN/LOF ones.
+"""
+
+import pandas as pd
+import numpy as np
+import argparse, time, os
+from scipy.stats import spearmanr
+from TSB_AD.evaluation.metrics import get_metrics
+from TSB_AD.utils.slidingWindows import find_length_rank
+from TSB_AD.model_wrapper import *
+from TSB_AD.models.neighbors import RPForest, set_neighbor_cache
+from TSB_AD.HP_list import Optimal_Uni_algo_HP_dict
+
+Neighbor_AD_Pool = ['Sub_KNN', 'Sub_LOF', 'KNN', 'LOF', 'COF']
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Approximate neighbor search benchmark')
+    parser.add_argument('--dataset_dir', type=str, default='../Datasets/TSB-AD-U/')
+    parser.add_argument('--file_lsit', type=str, default='../Datasets/File_List/TSB-AD-U-Eva.csv')
+    parser.add_argument('--AD_Name', type=str, nargs='+', default=['Sub_KNN', 'Sub_LOF'])
+    parser.add_argument('--n_trees', type=int, nargs='+', default=[1, 5, 10, 20])
+    parser.add_argument('--max_files', type=int, default=None)
+    parser.add_argument('--save_path', type=str, default='eval/approx_nn.csv')
+    args = parser.parse_args()
+
+    # every run gets its own neighbor search
+    set_neighbor_cache(enabled=False)
+
+    file_list = pd.read_csv(args.file_lsit)['file_name'].values[:args.max_files]
+
+    write_csv = []
+    warmed_up = set()
+    for filename in file_list:
+        df = pd.read_csv(os.path.join(args.dataset_dir, filename)).dropna()
+        data = df.iloc[:, 0:-1].values.astype(float)
+        label = df['Label'].astype(int).to_numpy()
+        slidingWindow = find_length_rank(data[:,0].reshape(-1, 1), rank=1)
+
+        for AD_Name in args.AD_Name:
+            if AD_Name not in Neighbor_AD_Pool:
+                raise Exception(f"{AD_Name} does not support neighbor_search")
+            Optimal_Det_HP = dict(Optimal_Uni_algo_HP_dict.get(AD_Name, {}))
+            if AD_Name == 'COF':
+                # the neighbor search is only used by the neighbor graph COF
+                Optimal_Det_HP['method'] = 'knn'
+            if AD_Name not in warmed_up:
+                # untimed: otherwise the exact run pays the imports and the numba compilation
+                run_Unsupervise_AD(AD_Name, data, **Optimal_Det_HP)
+                warmed_up.add(AD_Name)
+            exact = None
+            for n_trees in [0] + args.n_trees:
+                neighbor_search = RPForest(n_trees=n_trees) if n_trees else None
+                start_time = time.time()
+                output = run_Unsupervise_AD(AD_Name, data, neighbor_search=neighbor_search, **Optimal_Det_HP)
+                run_time = time.time() - start_time
+                if not isinstance(output, np.ndarray):
+                    print(f'At {filename} with {AD_Name} ({n_trees} trees): {output}')
+                    break
+                if exact is None:
+                    exact = output
+
+                evaluation_result = get_metrics(output, label, slidingWindow=slidingWindow)
+                write_csv.append(dict(file=filename, AD_Name=AD_Name, n_trees=n_trees, Time=run_time,
+                                      Spearman=spearmanr(output, exact)[0], **evaluation_result))
+                print(f'{filename} | {AD_Name} | {n_trees or "exact"} trees: {run_time:.3f}s, '
+                      f'Spearman {write_csv[-1]["Spearman"]:.3f}, VUS-PR {evaluation_result["VUS-PR"]:.3f}')
+
+    results = pd.DataFrame(write_csv)
+    metrics = [c for c in results.columns if c not in ('file', 'AD_Name', 'n_trees', 'Time', 'Spearman')]
+
+    # change with respect to the exact search on the same file (n_trees 0)
+    base = results[results['n_trees'] == 0].set_index(['file', 'AD_Name'])
+    keys = list(zip(results['file'], results['AD_Name']))
+    results['Speedup'] = [base['Time'].get(k, np.nan) / t for k, t in zip(keys, results['Time'])]
+    results['Delta VUS-PR'] = [v - base['VUS-PR'].get(k, np.nan) for k, v in zip(keys, results['VUS-PR'])]
+
+    summary = results.groupby(['AD_Name', 'n_trees'])[['Time', 'Speedup', 'Spearman', 'Delta VUS-PR'] + metrics].mean()
+    print(summary[['Time', 'Speedup', 'Spearman', 'VUS-PR', 'Delta VUS-PR']].to_string(float_format='%.3f'))
+
+    os.makedirs(os.path.dirname(args.save_path) or '.', exist_ok=True)
+    results.to_csv(args.save_path, index=False)
+    summary.to_csv(args.save_path.replace('.csv', '_summary.csv'))
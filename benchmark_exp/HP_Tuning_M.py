@@ -4,26 +4,16 @@
 
 import pandas as pd
 import numpy as np
-import torch
-import random, argparse, time, os
+import argparse, time, os
 import itertools
 from TSB_AD.evaluation.metrics import get_metrics
 from TSB_AD.utils.slidingWindows import find_length_rank
+from TSB_AD.utils.utility import seed_everything
 from TSB_AD.model_wrapper import *
 from TSB_AD.HP_list import Multi_algo_HP_dict
 
-# seeding
-seed = 2024
-torch.manual_seed(seed)
-torch.cuda.manual_seed(seed)
-torch.cuda.manual_seed_all(seed)
-np.random.seed(seed)
-random.seed(seed)
-torch.backends.cudnn.benchmark = False
-torch.backends.cudnn.deterministic = True
-
-print("CUDA available: ", torch.cuda.is_available())
-print("cuDNN version: ", torch.backends.cudnn.version())
+# seeding (torch is only imported and seeded if the detector needs it)
+seed_everything(2024)
 
 if __name__ == '__main__':
 
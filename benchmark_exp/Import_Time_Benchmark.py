@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# License: Apache-2.0 License
+
+"""Measure the import time of the TSB-AD entry points with `python -X importtime`.
+
+Each module is imported in a fresh interpreter, several times, and we report the
+median cumulative import time, the slowest imported packages and which of the
+heavy optional dependencies got loaded.
+"""
+
+import argparse, os, re, subprocess, sys
+import numpy as np
+import pandas as pd
+
+Entry_Points = ['TSB_AD.model_wrapper', 'TSB_AD.main', 'TSB_AD.evaluation.metrics', 'TSB_AD.utils.slidingWindows',
+                'TSB_AD.models.IForest', 'TSB_AD.models.KNN', 'TSB_AD.models.LOF', 'TSB_AD.models.PCA']
+Heavy_Modules = ['torch', 'statsmodels', 'tslearn', 'stumpy', 'autogluon', 'scipy.signal', 'transformers']
+
+LINE_RE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def import_time(module, python=sys.executable):
+    """Return (total_us, {module: cumulative_us}) for importing `module` in a new interpreter."""
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, cwd=repo_root)
+    if proc.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{proc.stderr[-2000:]}')
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative.get(module, 0), cumulative
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Import time benchmark')
+    parser.add_argument('--modules', type=str, nargs='+', default=Entry_Points)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--save_path', type=str, default=None)
+    args = parser.parse_args()
+
+    write_csv = []
+    for module in args.modules:
+        totals = []
+        for _ in range(args.repeat):
+            total, cumulative = import_time(module)
+            totals.append(total)
+
+        top_level = {name: t for name, t in cumulative.items() if '.' not in name and name != module}
+        slowest = sorted(top_level.items(), key=lambda kv: -kv[1])[:args.top]
+        loaded = [name for name in Heavy_Modules if name in cumulative]
+
+        print(f'{module}: {np.median(totals)/1e3:.1f} ms (median of {args.repeat})')
+        print('    slowest: ' + ', '.join(f'{name} {t/1e3:.1f} ms' for name, t in slowest))
+        print('    heavy modules loaded: ' + (', '.join(loaded) if loaded else 'none'))
+        write_csv.append([module, np.median(totals)/1e3, np.min(totals)/1e3, ' '.join(loaded)])
+
+    if args.save_path:
+        w_csv = pd.DataFrame(write_csv, columns=['module', 'median_ms', 'min_ms', 'heavy_modules'])
+        w_csv.to_csv(args.save_path, index=False)
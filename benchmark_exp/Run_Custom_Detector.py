@@ -4,8 +4,7 @@
 
 import pandas as pd
 import numpy as np
-import torch
-import random, argparse, time, os, logging
+import argparse, time, os, logging
 from sklearn.preprocessing import MinMaxScaler
 
 from TSB_AD.evaluation.metrics import get_metrics
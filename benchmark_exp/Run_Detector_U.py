@@ -4,25 +4,16 @@
 
 import pandas as pd
 import numpy as np
-import torch
-import random, argparse, time, os, logging
+import argparse, time, os, logging
 from TSB_AD.evaluation.metrics import get_metrics
 from TSB_AD.utils.slidingWindows import find_length_rank
+from TSB_AD.utils.utility import seed_everything
+from TSB_AD.utils.series_reader import ChunkedSeriesReader
 from TSB_AD.model_wrapper import *
 from TSB_AD.HP_list import Optimal_Uni_algo_HP_dict
 
-# seeding
-seed = 2024
-torch.manual_seed(seed)
-torch.cuda.manual_seed(seed)
-torch.cuda.manual_seed_all(seed)
-np.random.seed(seed)
-random.seed(seed)
-torch.backends.cudnn.benchmark = False
-torch.backends.cudnn.deterministic = True
-
-print("CUDA available: ", torch.cuda.is_available())
-print("cuDNN version: ", torch.backends.cudnn.version())
+# seeding (torch is only imported and seeded if the detector needs it)
+seed_everything(2024)
 
 if __name__ == '__main__':
 
@@ -35,6 +26,9 @@ if __name__ == '__main__':
     parser.add_argument('--save_dir', type=str, default='eval/metrics/uni/')
     parser.add_argument('--save', type=bool, default=False)
     parser.add_argument('--AD_Name', type=str, default='IForest')
+    # read and score long series chunk by chunk (detectors of Chunk_AD_Pool only)
+    parser.add_argument('--chunk_size', type=int, default=None)
+    parser.add_argument('--chunk_overlap', type=int, default=None, help='defaults to 3 periods of the series')
     args = parser.parse_args()
 
 
@@ -52,20 +46,30 @@ if __name__ == '__main__':
         print('Processing:{} by {}'.format(filename, args.AD_Name))
 
         file_path = os.path.join(args.dataset_dir, filename)
-        df = pd.read_csv(file_path).dropna()
-        data = df.iloc[:, 0:-1].values.astype(float)
-        label = df['Label'].astype(int).to_numpy()
-        # print('data: ', data.shape)
-        # print('label: ', label.shape)
+        if args.chunk_size is not None:
+            # the period is estimated on the first chunk, the series is never loaded whole
+            head = pd.read_csv(file_path, nrows=args.chunk_size).dropna()
+            slidingWindow = find_length_rank(head.iloc[:, 0].values.astype(float).reshape(-1, 1), rank=1)
+            overlap = args.chunk_overlap if args.chunk_overlap is not None else 3 * slidingWindow
+            reader = ChunkedSeriesReader(file_path, chunk_size=args.chunk_size, overlap=overlap)
+            label = reader.read_labels()
+        else:
+            df = pd.read_csv(file_path).dropna()
+            data = df.iloc[:, 0:-1].values.astype(float)
+            label = df['Label'].astype(int).to_numpy()
+            # print('data: ', data.shape)
+            # print('label: ', label.shape)
 
-        feats = data.shape[1]
-        slidingWindow = find_length_rank(data[:,0].reshape(-1, 1), rank=1)
-        train_index = filename.split('.')[0].split('_')[-3]
-        data_train = data[:int(train_index), :]
+            feats = data.shape[1]
+            slidingWindow = find_length_rank(data[:,0].reshape(-1, 1), rank=1)
+            train_index = filename.split('.')[0].split('_')[-3]
+            data_train = data[:int(train_index), :]
 
         start_time = time.time()
 
-        if args.AD_Name in Semisupervise_AD_Pool:
+        if args.chunk_size is not None:
+            output = run_Unsupervise_AD_chunked(args.AD_Name, reader, **Optimal_Det_HP)
+        elif args.AD_Name in Semisupervise_AD_Pool:
             output = run_Semisupervise_AD(args.AD_Name, data_train, data, **Optimal_Det_HP)
         elif args.AD_Name in Unsupervise_AD_Pool:
             output = run_Unsupervise_AD(args.AD_Name, data, **Optimal_Det_HP)
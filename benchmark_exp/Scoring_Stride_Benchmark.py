@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# License: Apache-2.0 License
+
+"""Accuracy/throughput tradeoff of the strided scoring mode on TSB-AD-U.
+
+Every detector is run with each scoring stride on each file (with its optimal
+hyper-parameters) and we report the run time, the throughput and the accuracy
+metrics, plus their change with respect to stride 1. Each detector first gets
+an untimed warm-up run (imports, numba compilation), and the reported time is
+the median over ``--repeats`` runs.
+"""
+
+import pandas as pd
+import numpy as np
+import argparse, time, os
+from TSB_AD.evaluation.metrics import get_metrics
+from TSB_AD.utils.slidingWindows import find_length_rank
+from TSB_AD.utils.utility import seed_everything
+from TSB_AD.model_wrapper import *
+from TSB_AD.HP_list import Optimal_Uni_algo_HP_dict
+from TSB_AD.models.feature import set_window_cache
+from TSB_AD.models.neighbors import set_neighbor_cache
+from TSB_AD.models.MCD import raw_mcd_cache
+from TSB_AD.models.OCSVM import feature_map_cache
+
+# seeding (torch is only imported and seeded if the detector needs it)
+seed_everything(2024)
+
+def run_detector(AD_Name, data_train, data, stride, Optimal_Det_HP):
+    if AD_Name in Semisupervise_AD_Pool:
+        return run_Semisupervise_AD(AD_Name, data_train, data, scoring_stride=stride, **Optimal_Det_HP)
+    return run_Unsupervise_AD(AD_Name, data, scoring_stride=stride, **Optimal_Det_HP)
+
+Stride_AD_Pool = ['Sub_IForest', 'Sub_LOF', 'Sub_KNN', 'Sub_PCA', 'Sub_HBOS', 'KMeansAD_U', 'Sub_OCSVM', 'Sub_MCD',
+                  'USAD', 'OmniAnomaly', 'TranAD', 'TimesNet', 'FITS', 'Donut', 'AnomalyTransformer']
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Strided scoring benchmark')
+    parser.add_argument('--dataset_dir', type=str, default='../Datasets/TSB-AD-U/')
+    parser.add_argument('--file_lsit', type=str, default='../Datasets/File_List/TSB-AD-U-Eva.csv')
+    parser.add_argument('--AD_Name', type=str, nargs='+', default=['Sub_IForest', 'Sub_LOF', 'Sub_KNN', 'Sub_PCA', 'Sub_HBOS'])
+    parser.add_argument('--strides', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--max_files', type=int, default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--save_path', type=str, default='eval/scoring_stride.csv')
+    args = parser.parse_args()
+
+    # the repeated runs must not reuse the windows, neighbor graphs or fits of the previous ones
+    set_window_cache(enabled=False)
+    set_neighbor_cache(enabled=False)
+    raw_mcd_cache.enabled = feature_map_cache.enabled = False
+
+    file_list = pd.read_csv(args.file_lsit)['file_name'].values[:args.max_files]
+
+    write_csv = []
+    warmed_up = set()
+    for filename in file_list:
+        df = pd.read_csv(os.path.join(args.dataset_dir, filename)).dropna()
+        data = df.iloc[:, 0:-1].values.astype(float)
+        label = df['Label'].astype(int).to_numpy()
+        slidingWindow = find_length_rank(data[:,0].reshape(-1, 1), rank=1)
+        train_index = filename.split('.')[0].split('_')[-3]
+        data_train = data[:int(train_index), :]
+
+        for AD_Name in args.AD_Name:
+            if AD_Name not in Stride_AD_Pool:
+                raise Exception(f"{AD_Name} does not support scoring_stride")
+            Optimal_Det_HP = Optimal_Uni_algo_HP_dict.get(AD_Name, {})
+            if AD_Name not in warmed_up:
+                # untimed: otherwise the first stride pays the imports and the numba compilation
+                run_detector(AD_Name, data_train, data, args.strides[0], Optimal_Det_HP)
+                warmed_up.add(AD_Name)
+            for stride in args.strides:
+                run_times = []
+                for _ in range(args.repeats):
+                    start_time = time.time()
+                    output = run_detector(AD_Name, data_train, data, stride, Optimal_Det_HP)
+                    run_times.append(time.time() - start_time)
+                    if not isinstance(output, np.ndarray):
+                        break
+                run_time = float(np.median(run_times))
+                if not isinstance(output, np.ndarray):
+                    print(f'At {filename} with {AD_Name} (stride {stride}): {output}')
+                    continue
+
+                evaluation_result = get_metrics(output, label, slidingWindow=slidingWindow)
+                write_csv.append(dict(file=filename, AD_Name=AD_Name, stride=stride, Time=run_time,
+                                      Throughput=len(label) / run_time, **evaluation_result))
+                print(f'{filename} | {AD_Name} | stride {stride}: {run_time:.3f}s, '
+                      f'VUS-PR {evaluation_result["VUS-PR"]:.3f}')
+
+    results = pd.DataFrame(write_csv)
+    metrics = [c for c in results.columns if c not in ('file', 'AD_Name', 'stride', 'Time', 'Throughput')]
+
+    # change with respect to stride 1 on the same file
+    base = results[results['stride'] == 1].set_index(['file', 'AD_Name'])
+    keys = list(zip(results['file'], results['AD_Name']))
+    results['Speedup'] = [base['Time'].get(k, np.nan) / t for k, t in zip(keys, results['Time'])]
+    results['Delta VUS-PR'] = [v - base['VUS-PR'].get(k, np.nan) for k, v in zip(keys, results['VUS-PR'])]
+
+    summary = results.groupby(['AD_Name', 'stride'])[['Time', 'Throughput', 'Speedup', 'Delta VUS-PR'] + metrics].mean()
+    print(summary[['Throughput', 'Speedup', 'VUS-PR', 'Delta VUS-PR', 'AUC-PR']].to_string(float_format='%.3f'))
+
+    os.makedirs(os.path.dirname(args.save_path) or '.', exist_ok=True)
+    results.to_csv(args.save_path, index=False)
+    summary.to_csv(args.save_path.replace('.csv', '_summary.csv'))
@@ -0,0 +1,44 @@
+"""Neighbor graph COF (method='knn') against Fast COF."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from TSB_AD.models.COF import COF
+from TSB_AD.models.neighbors import graph_cache, set_neighbor_cache
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Datasets', 'TSB-AD-U',
+                         '001_NAB_id_1_Facility_tr_1007_1st_2014.csv')
+
+
+@pytest.fixture
+def no_graph_cache():
+    enabled = graph_cache.enabled
+    set_neighbor_cache(enabled=False)
+    yield
+    set_neighbor_cache(enabled=enabled)
+
+
+@pytest.fixture
+def series():
+    # 4031 points with 1595 distinct values: many duplicate points and distance ties
+    return pd.read_csv(DATA_PATH).dropna().iloc[:, 0:-1].values.astype(float)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('n_neighbors', [2, 5, 30])
+def test_knn_equals_fast_on_duplicates(series, n_neighbors, no_graph_cache):
+    # univariate points: the graph is searched with a tree
+    fast = COF(n_neighbors=n_neighbors, method='fast').fit(series).decision_scores_
+    knn = COF(n_neighbors=n_neighbors, method='knn').fit(series).decision_scores_
+    assert np.array_equal(knn, fast)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_knn_equals_fast_on_duplicate_windows(series, no_graph_cache):
+    # windows of 18 points: the graph is searched by brute force
+    X = np.lib.stride_tricks.sliding_window_view(series[:1500, 0], 18)
+    fast = COF(n_neighbors=10, method='fast').fit(X).decision_scores_
+    knn = COF(n_neighbors=10, method='knn', n_jobs=2, working_memory=1).fit(X).decision_scores_
+    assert np.array_equal(knn, fast)
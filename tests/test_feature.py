@@ -0,0 +1,71 @@
+"""Window matrices of models.feature."""
+
+import math
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from TSB_AD.models.feature import WindowNormalizer, get_window_matrix, tf_Stat
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Datasets', 'TSB-AD-U',
+                         '001_NAB_id_1_Facility_tr_1007_1st_2014.csv')
+
+
+@pytest.fixture
+def series():
+    return pd.read_csv(DATA_PATH).dropna().iloc[:, 0:-1].values.astype(float)
+
+
+@pytest.mark.parametrize('n_features', [1, 3])
+@pytest.mark.parametrize('stride', [1, 3])
+def test_window_normalizer_equals_window_matrix(series, n_features, stride):
+    # univariate: normalized per column, multivariate: per window
+    X = np.concatenate([np.roll(series, 7 * i) for i in range(n_features)], axis=1)
+    expected = get_window_matrix(X, window=18, stride=stride, dtype=np.float64, use_cache=False)
+    normalizer = WindowNormalizer(window=18, stride=stride, block_size=1000, dtype=np.float64).fit(X)
+    blocks = np.concatenate([block for _, block in normalizer.iter_blocks()])
+    np.testing.assert_allclose(blocks, expected, rtol=0, atol=1e-11)
+    rows = np.arange(0, len(expected), 37)
+    np.testing.assert_allclose(normalizer.rows(rows), expected[rows], rtol=0, atol=1e-11)
+
+
+def loop_tf_stat(X, window, step, fc_parameters):
+    # the former tf_Stat.convert, one tsfresh call per window
+    from tsfresh import extract_features
+    length = len(X)
+    pos = math.ceil(window / 2)
+    Xd = pd.DataFrame(X)
+    Xd.columns = pd.Index(['x'], dtype='object')
+    Xd['id'] = 1
+    Xd['time'] = Xd.index
+
+    def features(frame):
+        return np.array(extract_features(frame, column_id="id", column_sort="time", column_kind=None,
+                                         column_value=None, default_fc_parameters=fc_parameters,
+                                         disable_progressbar=True).fillna(0))
+
+    test = features(Xd.iloc[0 + pos - math.ceil(window / 2):0 + pos + math.floor(window / 2)])
+    M = np.zeros((length - window, test.shape[1] + 1))
+    i = 0
+    while i + window <= M.shape[0]:
+        M[i:i + step, 0] = X[pos + i: pos + i + step]
+        M[i:i + step, 1:] = features(Xd.iloc[i + pos - math.ceil(window / 2):i + pos + math.floor(window / 2)])
+        i += step
+    num = M.shape[0]
+    if i < num:
+        M[i: num, 0] = X[pos + i: pos + num]
+        M[i: num, 1:] = features(Xd.iloc[i + pos - math.ceil(window / 2):])
+    return M
+
+
+@pytest.mark.filterwarnings('ignore')
+@pytest.mark.parametrize('length', [300, 307])
+def test_batched_tf_stat_equals_loop(series, length):
+    pytest.importorskip('tsfresh')
+    from tsfresh.feature_extraction import MinimalFCParameters
+    X = series[:length, 0]
+    expected = loop_tf_stat(X, window=40, step=10, fc_parameters=MinimalFCParameters())
+    # several tsfresh calls of 4 windows
+    batched = tf_Stat(window=40, step=10, fc_parameters='minimal', batch_size=4).convert(X)
+    np.testing.assert_allclose(batched, expected, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,39 @@
+"""Float32 dtype policy of the model wrapper (dtype of run_Unsupervise_AD)."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from TSB_AD import model_wrapper
+from TSB_AD.model_wrapper import run_Unsupervise_AD
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Datasets', 'TSB-AD-U',
+                         '001_NAB_id_1_Facility_tr_1007_1st_2014.csv')
+
+
+@pytest.fixture
+def multivariate_series():
+    data = pd.read_csv(DATA_PATH).dropna().iloc[:, 0:-1].values.astype(float)
+    # the bundled series with a lagged copy and its square: the window matrix is
+    # rank deficient, and in float32 some explained variances round to 0
+    return np.c_[data, np.roll(data, 7), data ** 2]
+
+
+def test_pca_float32_multivariate_scores_are_finite(multivariate_series):
+    score = run_Unsupervise_AD('PCA', multivariate_series, dtype=np.float32)
+    assert isinstance(score, np.ndarray)
+    assert score.shape == (len(multivariate_series),)
+    assert np.isfinite(score).all()
+
+
+def test_float32_policy_only_applies_to_classical_detectors(monkeypatch):
+    seen = {}
+
+    def run_MatrixProfile(data, periodicity=1, n_jobs=1):
+        seen['dtype'] = data.dtype
+        return np.zeros(len(data))
+
+    monkeypatch.setattr(model_wrapper, 'run_MatrixProfile', run_MatrixProfile)
+    run_Unsupervise_AD('MatrixProfile', np.random.RandomState(0).randn(500, 1), dtype=np.float32)
+    assert seen['dtype'] == np.float64
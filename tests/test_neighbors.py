@@ -0,0 +1,42 @@
+"""Sharded exact neighbor search (neighbors.set_sharding) against the in-memory one."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from TSB_AD.model_wrapper import run_Unsupervise_AD
+from TSB_AD.models import feature, neighbors
+from TSB_AD.models.feature import set_window_cache
+from TSB_AD.models.neighbors import set_neighbor_cache, set_sharding
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Datasets', 'TSB-AD-U',
+                         '001_NAB_id_1_Facility_tr_1007_1st_2014.csv')
+
+
+@pytest.fixture
+def no_caches():
+    window_enabled, graph_enabled = feature.window_cache.enabled, neighbors.graph_cache.enabled
+    set_window_cache(enabled=False)
+    set_neighbor_cache(enabled=False)
+    yield
+    set_window_cache(enabled=window_enabled)
+    set_neighbor_cache(enabled=graph_enabled)
+
+
+@pytest.fixture
+def restore_sharding():
+    max_bytes, shard_size = neighbors.sharding.max_bytes, neighbors.sharding.shard_size
+    yield
+    set_sharding(max_bytes=max_bytes, shard_size=shard_size)
+
+
+@pytest.mark.parametrize('model_name', ['Sub_KNN', 'Sub_LOF'])
+def test_sharded_search_gives_the_same_scores(model_name, no_caches, restore_sharding):
+    data = pd.read_csv(DATA_PATH).dropna().iloc[:, 0:-1].values.astype(float)
+    in_memory = run_Unsupervise_AD(model_name, data)
+    # every window matrix is searched by shards of 700 windows
+    set_sharding(max_bytes=1000, shard_size=700)
+    sharded = run_Unsupervise_AD(model_name, data)
+    assert isinstance(sharded, np.ndarray)
+    np.testing.assert_allclose(sharded, in_memory, rtol=0, atol=1e-12)
@@ -0,0 +1,32 @@
+"""Chunked reading and scoring of a series (utils.series_reader)."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from TSB_AD.model_wrapper import run_Unsupervise_AD_chunked
+from TSB_AD.utils.series_reader import ChunkedSeriesReader, stitch_chunk_scores
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Datasets', 'TSB-AD-U',
+                         '001_NAB_id_1_Facility_tr_1007_1st_2014.csv')
+
+
+@pytest.mark.parametrize('chunk_size', [1000, 1990, 2000])
+def test_short_tail_is_merged_into_the_previous_chunk(chunk_size):
+    # 4031 points, not a multiple of the chunk size
+    data = pd.read_csv(DATA_PATH).dropna().iloc[:, 0:-1].values.astype(float)
+    chunks = list(ChunkedSeriesReader(DATA_PATH, chunk_size=chunk_size, overlap=18))
+    assert all(len(chunk.core_data) >= chunk_size for chunk in chunks)
+    assert chunks[-1].stop == len(data)
+    assert np.array_equal(np.concatenate([chunk.core_data for chunk in chunks]), data)
+    rows = stitch_chunk_scores([chunk.data[:, 0] for chunk in chunks], chunks)
+    assert np.array_equal(rows, data[:, 0])
+
+
+@pytest.mark.parametrize('model_name', ['Sub_PCA', 'Sub_IForest'])
+def test_chunked_scores_cover_the_series(model_name):
+    score = run_Unsupervise_AD_chunked(model_name, ChunkedSeriesReader(DATA_PATH, chunk_size=1990, overlap=18))
+    assert isinstance(score, np.ndarray)
+    assert score.shape == (4031,)
+    assert np.isfinite(score).all()
@@ -0,0 +1,33 @@
+"""Empirical cumulative distributions of utils.stat_models."""
+
+import numpy as np
+import pytest
+
+from TSB_AD.utils.stat_models import FittedECDF, column_ecdf
+
+
+@pytest.fixture
+def matrix():
+    # few distinct values per column: many ties
+    return np.random.RandomState(0).randint(0, 7, size=(300, 4)).astype(float)
+
+
+def test_fitted_ecdf_equals_column_ecdf(matrix):
+    ecdf = FittedECDF().fit(matrix)
+    np.testing.assert_allclose(ecdf.left(matrix), column_ecdf(matrix), rtol=1e-12)
+    np.testing.assert_allclose(ecdf.right(matrix), column_ecdf(-matrix), rtol=1e-12)
+
+
+def test_fitted_ecdf_include_self_appends_the_sample(matrix):
+    train, new = matrix[:-20], matrix[-20:]
+    ecdf = FittedECDF().fit(train)
+    left, right = ecdf.left(new, include_self=True), ecdf.right(new, include_self=True)
+    for i, row in enumerate(new):
+        appended = np.vstack([train, row])
+        np.testing.assert_allclose(left[i], column_ecdf(appended)[-1], rtol=1e-12)
+        np.testing.assert_allclose(right[i], column_ecdf(-appended)[-1], rtol=1e-12)
+
+
+def test_fitted_ecdf_needs_a_matrix():
+    with pytest.raises(ValueError):
+        FittedECDF().fit(np.arange(10.))
@@ -0,0 +1,31 @@
+"""Score helpers of utils.utility."""
+
+import numpy as np
+import pytest
+
+from TSB_AD.utils.utility import reverse_windowing
+
+
+def loop_reverse_windowing(scores, window, stride, n_samples):
+    # the former KMeansAD._custom_reverse_windowing, looping over window intersections
+    begins = np.array([i * stride for i in range(scores.shape[0])])
+    ends = begins + window
+    mapped = np.full(n_samples, fill_value=np.nan)
+    indices = np.unique(np.r_[begins, ends])
+    for i, j in zip(indices[:-1], indices[1:]):
+        window_indices = np.flatnonzero((begins <= i) & (j - 1 < ends))
+        mapped[i:j] = np.nanmean(scores[window_indices])
+    np.nan_to_num(mapped, copy=False)
+    return mapped
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('window, stride', [(10, 1), (10, 3), (7, 7), (5, 9)])
+@pytest.mark.parametrize('padding', [0, 4])
+def test_reverse_windowing_equals_loop(window, stride, padding):
+    scores = np.random.RandomState(0).rand(200)
+    # NaN scores are ignored, and points whose windows are all NaN get 0
+    scores[[3, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62]] = np.nan
+    n_samples = stride * (len(scores) - 1) + window + padding
+    expected = loop_reverse_windowing(scores, window, stride, n_samples)
+    np.testing.assert_allclose(reverse_windowing(scores, window, stride, n_samples), expected, rtol=1e-12, atol=0)